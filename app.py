@@ -2,9 +2,15 @@ import streamlit as st
 
 from classes.chess_user import ChessUser
 from classes.comparison import Comparison
-from helpers.request_helpers import get_random_compatriot, get_random_gm, get_puzzle
-from helpers.plot_helpers import plot_pie
-from helpers.vars import indices, select_options
+from helpers.request_helpers import (
+    get_random_compatriot,
+    get_random_gm,
+    get_puzzle,
+    get_archives,
+)
+from helpers.plot_helpers import plot_pie, downsample
+from helpers.position_helpers import standard_fen
+from helpers.vars import indices, select_options, opening_tree_depth, history_page_size
 
 # placeholder vars for managing state
 usage = None
@@ -26,7 +32,7 @@ with st.sidebar:
     st.text_input("Enter your Chess.com username to get started.", key="username")
 
     if username := st.session_state.username:
-        user = ChessUser(username)
+        user = ChessUser(username, slim=True)
         st.divider()
         if user.profile is None:
             st.write("That username isn't right. Do you want to try another?")
@@ -38,8 +44,12 @@ with st.sidebar:
                 ["Check out my stats", "Compare stats"],
                 index=None,
             )
-            user.load_game_history()
-            user_game_history_df = user.wrangle_game_history_df()
+            if not user.load_stored_game_history():
+                user.update_game_history_store()
+            if st.button("Refresh my games", icon=":material/refresh:"):
+                get_archives.clear()
+                user.update_game_history_store()
+            user_game_history_df = user.game_history_df
             user.add_accuracy_stats()
             match usage:
                 case "Check out my stats":
@@ -78,6 +88,7 @@ if usage == "Check out my stats":
         with col_3:
             if include_op_rating := st.checkbox("Include opponent rating?", value=False, key=f"{section}_op_rating"):
                 dims.append("op_rating")
+        dims.extend(st.multiselect("Include other columns?", list(user.derived_columns), key=f"{section}_derived"))
         
     with tab_openings:
         st.subheader(":rainbow[Openings]")
@@ -88,24 +99,33 @@ if usage == "Check out my stats":
                 "My most played openings",
                 "My most succesful openings",
                 "My most accurate openings",
+                "My opening tree",
+                "My most common positions",
+                "How I score from a position",
                 "EVERYTHING!",
             ],
             index=None,
         )
+        opening_level = st.selectbox(
+            "Group openings by",
+            ["eco", "opening_variation", "opening_family"],
+            format_func={"eco": "Full name", "opening_variation": "Variation", "opening_family": "Family"}.get,
+        )
         # opening counts
         if openings_selection == "My most played openings":
             dims = []
             add_select_dim_options("most_played_openings")
-            opening_counts_df = user.query_game_history("url", ["eco", *dims])
+            opening_counts_df = user.query_game_history("url", [opening_level, *dims])
             st.dataframe(opening_counts_df)
         # best openings by result
         elif openings_selection == "My most succesful openings":
             dims = []
             add_select_dim_options("most_succesful_openings")
-            opening_results_df = (
-                user.query_game_history("result", ["eco", *dims])
-                .sort_values(by="win_pc", ascending=False)
-                .head(10)
+            opening_results_df = user.query(
+                ["win_pc", "draw_pc", "loss_pc"],
+                [opening_level, *dims],
+                sort="win_pc",
+                limit=10,
             )
             st.dataframe(opening_results_df)
         # best openings by accuracy
@@ -113,21 +133,49 @@ if usage == "Check out my stats":
             dims = []
             add_select_dim_options("most_accurate_openings")
             opening_accuracies_df = (
-                user.query_game_history("accuracy", ["eco", *dims])
-                .sort_values(by="accuracy", ascending=False)
+                user.query(["accuracy"], [opening_level, *dims], sort="accuracy")
+                .dropna()
                 .head(10)
             )
             st.dataframe(opening_accuracies_df)
+        # opening tree
+        elif openings_selection == "My opening tree":
+            opening_tree = user.get_opening_tree()
+            col_1, col_2 = st.columns(2)
+            with col_1:
+                tree_colour = st.selectbox("Colour", opening_tree.colours, index=None, key="tree_colour")
+            with col_2:
+                tree_time_class = st.selectbox("Time class", opening_tree.time_classes, index=None, key="tree_time_class")
+            node = 0
+            for ply in range(opening_tree_depth):
+                children_df = opening_tree.children(node, tree_colour, tree_time_class)
+                if children_df.empty:
+                    break
+                st.dataframe(children_df)
+                move = st.selectbox(f"Ply {ply + 1}", children_df.index, index=None, key=f"tree_ply_{ply}")
+                if move is None:
+                    break
+                node = opening_tree.find_node([move], node)
+        # positions
+        elif openings_selection == "My most common positions":
+            min_ply = st.slider("Skip the first n plies", 0, 40, 8)
+            st.dataframe(user.get_common_positions(min_ply))
+        elif openings_selection == "How I score from a position":
+            fen = st.text_input("Position (FEN)", value=standard_fen)
+            if fen:
+                try:
+                    st.dataframe(user.get_position_stats(fen))
+                except ValueError as e:
+                    st.error(e)
         # EVERYTHING!
         elif openings_selection == "EVERYTHING!":
             dims = []
             add_select_dim_options("everything")
-            counts_df = user.query_game_history("url", ["eco", *dims])
-            accuracies_df = user.query_game_history("accuracy", ["eco", *dims])
-            success_df = user.query_game_history("result", ["eco", *dims])
-            everything_df = counts_df.merge(
-                accuracies_df, on=["eco", *dims], how="inner"
-            ).merge(success_df, on=["eco", *dims], how="inner")
+            everything_df = user.query(
+                ["games_played", "accuracy", "win_pc", "draw_pc", "loss_pc"],
+                [opening_level, *dims],
+                sort="games_played",
+            )
             st.dataframe(everything_df)
 
     with tab_opponents:
@@ -140,13 +188,13 @@ if usage == "Check out my stats":
                 "My top-10 wins by rating differential",
                 "My win percentages per opponent",
                 "My accuracy per opponent",
+                "Me vs. a specific opponent",
             ],
             index=None,
         )
         # opponent counts
         if opponents_selection == "My most played opponents":
-            dims = []
-            opponent_counts_df = user.query_game_history("url", ["opponent", *dims]).head(10)
+            opponent_counts_df = user.get_most_played_opponents(10)[["games_played"]]
             st.bar_chart(opponent_counts_df, horizontal=True, x_label="Games played", color="#5D3FD3")
         # top-5 wins by rating differential
         if opponents_selection == "My top-10 wins by rating differential":
@@ -164,6 +212,13 @@ if usage == "Check out my stats":
             add_select_dim_options("accuracy_per_opponent")
             acc_by_opp_df = user.query_game_history("accuracy", ["opponent", *dims]).sort_values(by="opponent", ascending=True)
             st.dataframe(acc_by_opp_df)
+        # head-to-head with one opponent
+        if opponents_selection == "Me vs. a specific opponent":
+            opponent_index = user.get_opponent_index()
+            opponent = st.selectbox("Which opponent?", sorted(opponent_index.names), index=None)
+            if opponent:
+                st.dataframe(user.get_opponent_stats(opponent).to_frame().T, hide_index=True)
+                st.dataframe(user.get_opponent_games(opponent).sort_index(ascending=False))
 
     with tab_accuracy:
         st.subheader(":rainbow[Accuracy]")
@@ -190,7 +245,7 @@ if usage == "Check out my stats":
         if acc_selection == "My accuracy per opponent rating":
             dims = []
             acc_by_opp_rat = user.query_game_history("accuracy", ["op_rating", *dims])
-            st.line_chart(acc_by_opp_rat, x_label="Opponent rating", y_label="Accuracy", color="#5D3FD3")
+            st.line_chart(downsample(acc_by_opp_rat), x_label="Opponent rating", y_label="Accuracy", color="#5D3FD3")
 
     with tab_history:
         st.subheader(":rainbow[History]")
@@ -200,6 +255,7 @@ if usage == "Check out my stats":
             [
                 "My current vs. best ratings",
                 "My rating history",
+                "My recent form",
                 "My full game history",
             ],
             index=None,
@@ -223,17 +279,60 @@ if usage == "Check out my stats":
             ],
             index=None,
         )
-            if time_selection: 
-                rating_history_df = user.game_history_df[user.game_history_df['time_class'] == time_selection.lower()]['rating'].reset_index(drop=True)
-                st.line_chart(rating_history_df)
+            period_selection = st.selectbox(
+                "Over what period?",
+                ["All time", "Last year", "Last 30 days"],
+            )
+            freq_selection = st.selectbox(
+                "Per",
+                ["Day", "Week", "Month"],
+                index=1,
+            )
+            if time_selection:
+                rating_ohlc_df = user.get_rating_ohlc(
+                    time_selection.lower(),
+                    freq_selection.lower(),
+                    {"All time": None, "Last year": 365, "Last 30 days": 30}[period_selection],
+                )
+                st.line_chart(downsample(rating_ohlc_df[["high", "close", "low"]]), x_label="Date", y_label="Rating")
+                st.dataframe(rating_ohlc_df.sort_index(ascending=False))
                 st.write("No te preocupes. Cada historia tiene sus altibajos.")
+        # rolling form
+        if hist_selection == "My recent form":
+            form_time_class = st.selectbox("Which time class?", ["bullet", "blitz", "rapid", "daily"], index=None, key="form_time_class")
+            window_kind = st.radio("Window", ["Games", "Days"], horizontal=True)
+            window_size = st.slider(f"Last n {window_kind.lower()}", 5, 100, 20)
+            if form_time_class:
+                form_df = user.get_rolling_form(
+                    form_time_class,
+                    games=window_size if window_kind == "Games" else None,
+                    days=window_size if window_kind == "Days" else None,
+                )
+                st.line_chart(downsample(form_df[["win_pc", "score_pc", "accuracy"]]), x_label="Date")
+                st.line_chart(downsample(form_df["rating_change"]), x_label="Date", y_label="Rating change", color="#5D3FD3")
         # full game history
         if hist_selection == "My full game history":
             st.write(f"You've played {user.game_history_df.shape[0]} games. Here they are in all their glory!")
-            st.dataframe(user_game_history_df)
-            st.caption(
-                "Click the column headers to sort or hide the columns, and see the other table options by hovering over the top-right of the table."
-            )
+            col_1, col_2, col_3, col_4 = st.columns(4)
+            with col_1:
+                sort_by = st.selectbox("Sort by", ["end_time", *user_game_history_df.columns], key="history_sort_by")
+            with col_2:
+                ascending = st.toggle("Oldest/lowest first", value=False, key="history_ascending")
+            with col_3:
+                history_time_classes = st.multiselect("Time class", ["bullet", "blitz", "rapid", "daily"], key="history_time_classes")
+            with col_4:
+                history_results = st.multiselect("Result", ["win", "draw", "loss"], key="history_results")
+            history_filters = {}
+            if history_time_classes:
+                history_filters["time_class"] = history_time_classes
+            if history_results:
+                history_filters["result"] = history_results
+            n_rows = len(user.get_history_order(sort_by, ascending, history_filters))
+            n_pages = max((n_rows - 1) // history_page_size + 1, 1)
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, key="history_page")
+            history_page_df, n_rows = user.get_history_page(page - 1, history_page_size, sort_by, ascending, history_filters)
+            st.dataframe(history_page_df)
+            st.caption(f"Page {page} of {n_pages} ({n_rows} games).")
 
 ### Compare stats
 
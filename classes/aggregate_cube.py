@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+
+class AggregateCube:
+    """
+    Game tallies for every observed combination of a set of dimensions
+
+    The cube is built with one groupby over the game history. Queries
+    grouping by and filtering on the cube's dimensions are then answered
+    by rolling up its cells, whose number is bounded by the number of
+    distinct combinations rather than the number of games.
+
+    Attributes:
+        dims [list]: the names of the cube's dimensions
+        cells [pd.DataFrame]: one row per observed combination of dims,
+            with the dims and the tallies as columns
+    """
+
+    tallies = ["games", "wins", "draws", "losses", "accuracy_sum", "accuracy_count"]
+
+    # measure_registry measures computed from rolled-up tallies
+    measure_formulas = {
+        "games_played": lambda t: t["games"],
+        "win_pc": lambda t: (t["wins"] / t["games"] * 100).round(1),
+        "draw_pc": lambda t: (t["draws"] / t["games"] * 100).round(1),
+        "loss_pc": lambda t: (t["losses"] / t["games"] * 100).round(1),
+        "accuracy": lambda t: (t["accuracy_sum"] / t["accuracy_count"]).round(2),
+        "accuracy_count": lambda t: t["accuracy_count"],
+    }
+
+    def __init__(self, columns: dict, results, accuracies):
+        """
+        Builds the cube from per-game arrays.
+
+        Args:
+            columns [dict]: dimension names to per-game values (already
+                bucketed where needed, e.g. opponent ratings)
+            results [ArrayLike]: "win", "draw" or "loss" for each game
+            accuracies [ArrayLike]: the user's accuracy in each game (NaN if
+                unknown)
+        """
+
+        results = np.asarray(results)
+        accuracies = np.asarray(accuracies, dtype="float64")
+        known = ~np.isnan(accuracies)
+        self.dims = list(columns)
+        self.cells = (
+            pd.DataFrame(
+                {
+                    **columns,
+                    "games": np.ones(len(results), dtype=np.int64),
+                    "wins": (results == "win").astype(np.int64),
+                    "draws": (results == "draw").astype(np.int64),
+                    "losses": (results == "loss").astype(np.int64),
+                    "accuracy_sum": np.where(known, accuracies, 0.0),
+                    "accuracy_count": known.astype(np.int64),
+                }
+            )
+            .groupby(self.dims, observed=True)
+            .sum()
+            .reset_index()
+        )
+
+    def rollup(
+        self, keys: dict, measures: list[str], mask: np.ndarray | None = None
+    ) -> pd.DataFrame:
+        """
+        Returns measures grouped by keys, summed over the cube's cells.
+
+        Args:
+            keys [dict]: group-by names to values aligned with cells, e.g.
+                cube dims or columns derived from them
+            measures [list]: names of measures in measure_formulas
+            mask [None/np.ndarray]: a boolean mask of the cells to include
+
+        Returns:
+            A df of the measures indexed by the keys
+        """
+
+        if mask is None:
+            mask = np.ones(len(self.cells), dtype=bool)
+        data = {name: pd.Series(values).array[mask] for name, values in keys.items()}
+        for tally in self.tallies:
+            data[tally] = self.cells[tally].to_numpy()[mask]
+        totals = pd.DataFrame(data).groupby(list(keys), observed=True).sum()
+        return pd.DataFrame(
+            {name: self.measure_formulas[name](totals) for name in measures}
+        )
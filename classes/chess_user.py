@@ -1,4 +1,5 @@
-import re
+import copy
+import os
 
 import pandas as pd
 import asyncio
@@ -6,7 +7,75 @@ import httpx
 import numpy
 
 from helpers.loggers import data_logger
-from helpers.request_helpers import get_profile, get_stats, return_game_history
+from helpers.request_helpers import (
+    get_profile,
+    get_stats,
+    get_archives,
+    archive_month,
+    get_game_history_by_month,
+    return_game_history,
+)
+from helpers.storage_helpers import (
+    list_stored_months,
+    read_game_history_store,
+    write_month_partition,
+    list_raw_field_months,
+    write_raw_fields,
+    read_raw_fields,
+)
+from helpers.shared_cache_helpers import (
+    read_shared_history,
+    publish_shared_history,
+    history_version,
+)
+from helpers.memo_helpers import memoize_result
+from helpers.pgn_store_helpers import (
+    list_pgn_months,
+    write_pgn_month,
+    read_pgn,
+    read_month_pgns,
+)
+from helpers.wrangle_helpers import (
+    wrangle_games,
+    wrangle_chunks,
+    split_games,
+    concat_game_histories,
+    to_utc_timestamp,
+)
+from helpers.pgn_helpers import header_to_column_name, extract_pgn_headers
+from helpers.decode_helpers import game_field_types
+from helpers.vars import (
+    move_phases,
+    time_trouble_fraction,
+    opening_tree_depth,
+    wrangled_game_fields,
+    aggregate_cube_dims,
+    history_page_size,
+    stored_raw_fields,
+)
+from helpers.tcn_helpers import move_codes_to_uci
+from helpers.derived_helpers import (
+    DerivedColumn,
+    derived_column_registry,
+    pgn_header_column,
+    pgn_header_columns,
+    pgn_headers_input,
+)
+from helpers.rating_helpers import rating_ohlc
+from helpers.query_helpers import (
+    measure_registry,
+    fact_measures,
+    filter_mask,
+    bucket_ratings,
+)
+from classes.game_moves import GameMoves, TcnMoves
+from classes.opening_tree import OpeningTree
+from classes.opening_dictionary import OpeningDictionary
+from classes.position_index import PositionIndex
+from classes.aggregate_cube import AggregateCube
+from classes.top_k_index import TopKIndex
+from classes.opponent_index import OpponentIndex
+from classes.rolling_stats import RollingStats
 
 
 class ChessUser:
@@ -31,13 +100,44 @@ class ChessUser:
         total_games [int]: the user's games as calculated by add_game_totals
         total_points [None/int]: the user's points as calculated by get_head_to_head
         game_history [list]: a list of dicts, each representing a game
+            (None once wrangled if slim)
+        slim [bool]: whether raw games are freed once wrangled (their PGNs
+            and moves are kept in side-stores, see store_pgns and
+            store_raw_fields)
         game_history_df [pd.DataFrame]: a df of the user's total game history
+        game_moves [None/GameMoves]: moves and clock times cached by get_game_moves
+        tcn_moves [None/TcnMoves]: decoded TCN moves cached by get_tcn_moves
+        last_month [None/str]: the latest "YYYY-MM" archive month wrangled
+        seen_uuids [set]: uuids of the games in game_history_df
         avg_accuracy [float]: the user's mean game accuracy
         highest_accuracy [float]: the user's highest game accuracy
         lowest_accuracy [float]: the user's lowest game accuracy
+        derived_columns [dict]: registry of DerivedColumns by name, shared
+            by all instances (see register_derived_column)
+        derived_column_cache [dict]: derived columns computed by get_column
+        aggregate_cube [None/AggregateCube]: tallies by aggregate_cube_dims,
+            cached by get_aggregate_cube
+        top_k_indexes [dict]: TopKIndexes of wins by column, cached by
+            get_top_k_index
+        opponent_index [None/OpponentIndex]: head-to-head aggregates, cached
+            by get_opponent_index
+        rolling_stats [dict]: RollingStats by time class, cached by
+            get_rolling_stats
+        sort_permutations [dict]: row orders by column, cached by
+            get_sort_permutation
+        data_version_cache [None/tuple]: game_history_df and its version,
+            cached by data_version
     """
 
-    def __init__(self, username: str):
+    derived_columns = {
+        **derived_column_registry,
+        "opening_family": DerivedColumn(("eco",), OpeningDictionary.family_column),
+        "opening_variation": DerivedColumn(
+            ("eco",), OpeningDictionary.variation_column
+        ),
+    }
+
+    def __init__(self, username: str, slim: bool = False):
         """
         Initialises the instance using the passed username string.
 
@@ -47,15 +147,107 @@ class ChessUser:
 
         Args:
             username [str]: should be a chess.com username
+            slim [bool]: if True, raw games are freed once wrangled and raw
+                fields are read from the side-stores or re-fetched when
+                needed (see get_raw_game_field)
         """
 
         self.username = username
+        self.slim = slim
         self.profile = get_profile(username)
         self.name = None
         self.stats = None
         self.available_metrics = None
         self.country = None
         self.total_points = None
+        self.last_month = None
+        self.seen_uuids = set()
+        self.clear_history_caches()
+
+    def clear_history_caches(self) -> None:
+        """
+        Clears data derived from game_history_df.
+
+        Called whenever game_history_df is replaced or extended so that
+        lazily computed data is rebuilt on next use.
+        """
+
+        self.game_moves = None
+        self.tcn_moves = None
+        self.opening_tree = None
+        self.position_index = None
+        self.aggregate_cube = None
+        self.top_k_indexes = {}
+        self.opponent_index = None
+        self.rolling_stats = {}
+        self.sort_permutations = {}
+        self.derived_column_cache = {}
+        self.data_version_cache = None
+
+    @classmethod
+    def register_derived_column(
+        cls, name: str, inputs: tuple[str, ...], compute
+    ) -> None:
+        """
+        Registers a derived column so that get_column and query_game_history
+        can use it.
+
+        Args:
+            name [str]: the column name
+            inputs [tuple]: the names of the columns compute takes, in order
+            compute [Callable]: a vectorised function of the input columns
+                returning one value per game
+        """
+
+        cls.derived_columns[name] = DerivedColumn(tuple(inputs), compute)
+
+    def get_column(self, name: str) -> pd.Series:
+        """
+        Returns a per-game column aligned with game_history_df.
+
+        Columns of game_history_df and its end_time index are returned as
+        they are. Registered derived columns are computed from their inputs
+        (including the parsed PGN headers, see get_pgn_headers) on first
+        access and cached until game_history_df changes, so they cost
+        nothing until used. Other names are read as raw game fields
+        if they're in the archive game schema (game_field_types).
+
+        Args:
+            name [str]: the column name
+
+        Returns:
+            A series with the same index as game_history_df
+
+        Raises:
+            KeyError: if name isn't a column, derived column or raw game field
+        """
+
+        df = self.game_history_df
+        if name in df.columns:
+            return df[name]
+        if name == df.index.name:
+            return df.index.to_series(name=name)
+        if name in self.derived_columns:
+            if name not in self.derived_column_cache:
+                column = self.derived_columns[name]
+                inputs = [
+                    (
+                        self.get_pgn_headers()
+                        if key == pgn_headers_input
+                        else self.get_column(key)
+                    )
+                    for key in column.inputs
+                ]
+                values = column.compute(*inputs)
+                if isinstance(values, pd.Series):
+                    values = values.array
+                self.derived_column_cache[name] = pd.Series(
+                    values, index=df.index, name=name
+                )
+            return self.derived_column_cache[name]
+        if name not in game_field_types:
+            raise KeyError(f"Unknown column: {name}")
+        return pd.Series(self.get_raw_game_field(name), index=df.index, name=name)
 
     def add_stats(self) -> None:
         """
@@ -69,6 +261,30 @@ class ChessUser:
         self.available_metrics = set(self.stats.keys())
         self.country = self.profile["country"].split("/")[-1]
 
+    def data_version(self) -> str | None:
+        """
+        Returns the version of game_history_df (None if it isn't loaded).
+
+        Used to key memoized query results, so they're missed once the
+        history changes (see memoize_result). The version hashes every
+        game's uuid, so it's cached for the current game_history_df.
+        """
+
+        df = getattr(self, "game_history_df", None)
+        if df is None:
+            return None
+        if self.data_version_cache is None or self.data_version_cache[0] is not df:
+            self.data_version_cache = (df, history_version(df))
+        return self.data_version_cache[1]
+
+    def stats_version(self) -> str:
+        """
+        Returns the version of the stats dict used to key memoized results.
+        """
+
+        return repr(self.stats)
+
+    @memoize_result(lambda self: self.stats_version())
     def get_current_v_best(self) -> pd.DataFrame:
         """
         Returns a dataframe with columns for the user's current and best ratings.
@@ -114,185 +330,1425 @@ class ChessUser:
             )
             raise e
 
-
     def load_game_history(self):
         self.game_history = return_game_history(self.username)
 
-
     def wrangle_game_history_df(self):
+        chunks = split_games(self.game_history, os.cpu_count())
+        self.game_history_df = concat_game_histories(
+            wrangle_chunks(chunks, self.username) or [wrangle_games([], self.username)]
+        )
+        self.clear_history_caches()
+        self.last_month = None
+        self.seen_uuids = set(self.game_history_df["uuid"])
+        if self.slim:
+            monthly_games = {}
+            for game in self.game_history:
+                month = pd.Timestamp(game["end_time"], unit="s").strftime("%Y-%m")
+                monthly_games.setdefault(month, []).append(game)
+            self.store_pgns(monthly_games)
+            self.store_raw_fields(monthly_games)
+            self.game_history = None
 
-        accumulator = {
-            "colour": [],
-            "time_class": [],
-            "time_control": [],
-            "rated": [],
-            "rating": [],
-            "opponent": [],
-            "op_rating": [],
-            "rating_differential": [],
-            "result": [],
-            "result_type": [],
-            "eco": [],
-            "accuracy": [],
-            "op_accuracy": [],
-            "url": [],
-        }
+        return self.game_history_df
 
-        # https://www.chess.com/news/view/published-data-api#game-results
-        draws = [
-            "stalemate",
-            "agreed",
-            "repetition",
-            "50move",
-            "timevsinsufficient",
-            "insufficient",
-        ]
-        losses = [
-            "checkmated",
-            "timeout",
-            "resigned",
-            "abandoned",
-            "kingofthehill",
-            "threecheck",
-            "bughousepartnerlose",
-        ]
-        try:
-            for game in self.game_history:
+    def load_stored_game_history(self, columns: list[str] | None = None) -> bool:
+        """
+        Loads game_history_df from the persistent game history store.
 
-                accumulator["time_class"].append(game["time_class"])
-                accumulator["time_control"].append(game["time_control"])
-                accumulator["rated"].append(game["rated"])
-                accumulator["url"].append(game["url"])
-                
-                if game.get("eco"):
-                    accumulator["eco"].append(game["eco"].split("/")[-1])
-                elif (eco_match := re.search(r'openings\/(.*)"]\n\[UTCDate', game["pgn"])):
-                    accumulator["eco"].append(eco_match.group(1))
-                else:
-                    accumulator["eco"].append("Undefined")
-                
-
-                white, black = game["white"], game["black"]
-                accuracies = game.get("accuracies", None)
-
-                if white["username"] == self.username:
-                    accumulator["colour"].append("white")
-                    accumulator["rating"].append(white["rating"])
-                    accumulator["opponent"].append(black["username"])
-                    accumulator["op_rating"].append(black["rating"])
-                    accumulator["accuracy"].append(
-                        accuracies["white"] if accuracies else None
-                    )
-                    accumulator["op_accuracy"].append(
-                        accuracies["black"] if accuracies else None
-                    )
-                    if white["result"] == "win":
-                        accumulator["result"].append("win")
-                        accumulator["result_type"].append(black["result"])
-                    elif white["result"] in draws:
-                        accumulator["result"].append("draw")
-                        accumulator["result_type"].append(white["result"])
-                    else:
-                        accumulator["result"].append("loss")
-                        accumulator["result_type"].append(white["result"])
-
-                else:
-                    accumulator["colour"].append("black")
-                    accumulator["rating"].append(black["rating"])
-                    accumulator["opponent"].append(white["username"])
-                    accumulator["op_rating"].append(white["rating"])
-                    accumulator["accuracy"].append(
-                        accuracies["black"] if accuracies else None
-                    )
-                    accumulator["op_accuracy"].append(
-                        accuracies["white"] if accuracies else None
-                    )
-                    if black["result"] == "win":
-                        accumulator["result"].append("win")
-                        accumulator["result_type"].append(white["result"])
-                    elif black["result"] in draws:
-                        accumulator["result"].append("draw")
-                        accumulator["result_type"].append(black["result"])
-                    else:
-                        accumulator["result"].append("loss")
-                        accumulator["result_type"].append(black["result"])
-
-                rating_dif = accumulator['rating'][-1] - accumulator["op_rating"][-1]
-                accumulator["rating_differential"].append(rating_dif)
-
-            self.game_history_df = pd.DataFrame(accumulator)
-
-            return self.game_history_df
-        
-        except KeyError as e:
-            data_logger.error(
-                f"Key error in wrangle_game_history_df: {str(e)}, game keys = {game.keys()}"
+        No JSON is parsed and nothing is wrangled. The host-wide shared
+        cache is tried first: its Arrow file is memory-mapped, so every
+        worker process shares one copy. Otherwise the stored Parquet
+        partitions are read directly, optionally projected to a subset
+        of columns, and a full history is published to the shared cache
+        for the other workers.
+
+        Args:
+            columns [None/list]: the columns to load (all columns if None)
+
+        Returns:
+            True if a stored history was found and loaded, otherwise False.
+            A shared cache entry without stored partitions (e.g. after the
+            store was cleared) is ignored, as there's no store to extend.
+        """
+
+        df = read_shared_history(self.username, columns=columns)
+        if df is None:
+            df = read_game_history_store(self.username, columns=columns)
+            if df is None:
+                return False
+            if columns is None:
+                publish_shared_history(self.username, df)
+        months = list_stored_months(self.username)
+        if not months:
+            return False
+
+        self.game_history_df = df
+        self.clear_history_caches()
+        self.last_month = months[-1]
+        if "uuid" not in df:
+            df = read_game_history_store(self.username, columns=["uuid"])
+        self.seen_uuids = set(df["uuid"])
+        return True
+
+    def wrangle_new_games(
+        self, monthly_archives: dict[str, list[dict]]
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Wrangles and appends the games that aren't in game_history_df yet.
+
+        The high-water mark (last_month and seen_uuids) identifies games
+        already in game_history_df: months before last_month are complete
+        and are never requested again, and any game whose uuid has been
+        seen is skipped. Only the unseen games are wrangled, they are
+        appended to game_history_df in one concat and the accuracy stats
+        are updated from the new rows alone. Position and top-k indexes are
+        extended with the new rows rather than rebuilt (top-k indexes,
+        the opponent index and rolling stats only if the new games all end
+        after the existing ones, as they rely on row order). The position
+        and opponent indexes built for the old history, by this or another
+        instance, are copied and extended and then memoized for the new
+        history, so the shared old indexes aren't modified.
+
+        Args:
+            monthly_archives [dict]: "YYYY-MM" months to lists of games
+
+        Returns:
+            A dict of months to dfs of the newly wrangled games
+        """
+
+        new_games = {}
+        for month, games in monthly_archives.items():
+            unseen = [game for game in games if game["uuid"] not in self.seen_uuids]
+            if unseen:
+                new_games[month] = unseen
+
+        if not new_games:
+            return {}
+
+        new_dfs = dict(
+            zip(new_games, wrangle_chunks(list(new_games.values()), self.username))
+        )
+        for month, new_df in new_dfs.items():
+            self.seen_uuids.update(new_df["uuid"])
+            self.last_month = max(month, self.last_month or month)
+
+        new_df = concat_game_histories(list(new_dfs.values()))
+        position_index = self.current_position_index()
+        top_k_indexes, opponent_index, rolling_stats, n_old = {}, None, {}, 0
+        if getattr(self, "game_history_df", None) is None:
+            self.game_history_df = new_df
+        else:
+            n_old = len(self.game_history_df)
+            if n_old == 0 or self.game_history_df.index[-1] <= new_df.index[0]:
+                top_k_indexes = self.top_k_indexes
+                opponent_index = self.opponent_index
+                if opponent_index is None:
+                    opponent_index = ChessUser.build_opponent_index.cached(self)
+                rolling_stats = self.rolling_stats
+            self.game_history_df = concat_game_histories([self.game_history_df, new_df])
+        self.clear_history_caches()
+        for col, top_k_index in top_k_indexes.items():
+            self.add_to_top_k_index(top_k_index, col, n_old)
+        self.top_k_indexes = top_k_indexes
+        if opponent_index is not None:
+            self.opponent_index = self.add_to_opponent_index(
+                opponent_index.copy(), n_old
             )
-            raise e
+            ChessUser.build_opponent_index.cache(self, self.opponent_index)
+        if rolling_stats:
+            self.rolling_stats = self.add_to_rolling_stats(rolling_stats, n_old)
+        if position_index is not None:
+            raw_games = {
+                game["uuid"]: game for games in new_games.values() for game in games
+            }
+            self.position_index = self.add_to_position_index(
+                copy.copy(position_index),
+                new_df,
+                [raw_games[uuid] for uuid in new_df["uuid"]],
+            )
+            ChessUser.build_position_index.cache(self, self.position_index)
 
-    def add_accuracy_stats(self):
-        accuracies = self.game_history_df["accuracy"]
+        if getattr(self, "accuracy_count", None) is not None:
+            self.add_accuracy_stats(new_df)
 
-        avg_accuracy = accuracies.mean()
-        highest_accuracy = accuracies.max()
-        lowest_accuracy = accuracies.min()
+        return new_dfs
 
-        self.avg_accuracy = round(avg_accuracy, 2)
-        self.highest_accuracy = highest_accuracy
-        self.lowest_accuracy = lowest_accuracy
+    def update_game_history_store(self) -> pd.DataFrame:
+        """
+        Fetches, wrangles and stores games that aren't in the store yet.
 
-    def query_game_history(
-        self, fact: str, dims: list[str], rated_only: bool = False
-    ) -> pd.DataFrame:
+        Only archive months from the latest stored month onwards are
+        requested and only unseen games are wrangled (see wrangle_new_games),
+        so the cost of a refresh is proportional to the number of new games.
+        New months are written as new partitions; the latest stored month
+        is the only existing partition that is rewritten. Archives are
+        decoded with only the fields the wrangler reads, the PGNs and the
+        stored_raw_fields, which go to the side-stores rather than into
+        memory. If there were new games the updated history is published
+        to the shared cache.
 
-        q_df = self.game_history_df.copy()
-        
-        if rated_only:
-            q_df = q_df.query("`rated`  == True")
-        
+        Args:
+            N/A
 
-        q_df = q_df[[*dims, fact]]
+        Returns:
+            The updated game_history_df
+        """
 
-        if "op_rating" in dims:
-            q_df["op_rating"] = q_df["op_rating"].round(decimals=-2)
+        if getattr(self, "game_history_df", None) is None:
+            self.load_stored_game_history()
 
-        if fact == "accuracy":
-            q_df = q_df.query("accuracy.notna()")
-            q_df = q_df.groupby([*dims]).mean(numeric_only=True).round(2)
-        elif fact == 'result':
-            q_df = (
-                q_df.groupby([*dims])
-                .agg(
-                    win_pc=(
-                        "result",
-                        lambda x: sum(y == "win" for y in x) / len(x) * 100,
-                    ),
-                    draw_pc=(
-                        "result",
-                        lambda x: sum(y == "draw" for y in x) / len(x) * 100,
-                    ),
-                    loss_pc=(
-                        "result",
-                        lambda x: sum(y == "loss" for y in x) / len(x) * 100,
+        stored_months = list_stored_months(self.username)
+        archive_urls = [
+            url
+            for url in get_archives(self.username) or []
+            if self.last_month is None or archive_month(url) >= self.last_month
+        ]
+        fields = wrangled_game_fields | stored_raw_fields | {"pgn"}
+        monthly_archives = asyncio.run(
+            get_game_history_by_month(self.username, archive_urls, fields)
+        )
+
+        new_dfs = self.wrangle_new_games(monthly_archives)
+        new_uuids = {month: set(new_df["uuid"]) for month, new_df in new_dfs.items()}
+        new_games = {
+            month: [g for g in monthly_archives[month] if g["uuid"] in uuids]
+            for month, uuids in new_uuids.items()
+        }
+        self.store_pgns(new_games)
+        self.store_raw_fields(new_games)
+        for month, new_df in new_dfs.items():
+            if month in stored_months:
+                stored_df = read_game_history_store(self.username, months=[month])
+                new_df = concat_game_histories([stored_df, new_df])
+            write_month_partition(self.username, month, new_df)
+        if new_dfs:
+            publish_shared_history(self.username, self.game_history_df)
+
+        if getattr(self, "game_history_df", None) is None:
+            self.game_history_df = wrangle_games([], self.username)
+        return self.game_history_df
+
+    def store_pgns(self, monthly_games: dict[str, list[dict]]) -> None:
+        """
+        Writes the PGNs of raw games to the user's PGN side-store.
+
+        The side-store holds one block-compressed file per archive month
+        keyed by game uuid (see write_pgn_month), so PGNs don't have to be
+        held in memory or re-fetched to be read later.
+
+        Args:
+            monthly_games [dict]: "YYYY-MM" months to lists of raw games
+        """
+
+        for month, games in monthly_games.items():
+            pgns = {game["uuid"]: game["pgn"] for game in games if "pgn" in game}
+            if pgns:
+                write_pgn_month(self.username, month, pgns)
+
+    def store_raw_fields(self, monthly_games: dict[str, list[dict]]) -> None:
+        """
+        Writes the stored_raw_fields of raw games to the raw field side-store.
+
+        The side-store holds one Parquet file per archive month keyed by
+        game uuid (see write_raw_fields), so the fields the move decoders
+        and position index read don't have to be held in memory or
+        re-fetched.
+
+        Args:
+            monthly_games [dict]: "YYYY-MM" months to lists of raw games
+        """
+
+        for month, games in monthly_games.items():
+            games = [game for game in games if stored_raw_fields <= game.keys()]
+            if games:
+                write_raw_fields(
+                    self.username,
+                    month,
+                    pd.DataFrame(
+                        {
+                            field: [game[field] for game in games]
+                            for field in ["uuid", *sorted(stored_raw_fields)]
+                        }
                     ),
                 )
-                .round(1)
+
+    def get_stored_raw_field(self, field: str) -> list:
+        """
+        Returns a stored raw field for every row of game_history_df.
+
+        Months of game_history_df that aren't in the raw field side-store
+        yet (e.g. stored before it existed) are fetched once and written
+        to it, so later calls don't hit the API.
+
+        Args:
+            field [str]: one of stored_raw_fields, e.g. "tcn"
+
+        Returns:
+            A list of values aligned with the rows of game_history_df (None
+            for games that couldn't be fetched)
+        """
+
+        months = sorted(set(self.game_history_df.index.strftime("%Y-%m")))
+        stored_months = set(list_raw_field_months(self.username))
+        missing = [month for month in months if month not in stored_months]
+        if missing:
+            archive_urls = [
+                url
+                for url in get_archives(self.username) or []
+                if archive_month(url) in missing
+            ]
+            self.store_raw_fields(
+                asyncio.run(
+                    get_game_history_by_month(
+                        self.username, archive_urls, {"uuid", *stored_raw_fields}
+                    )
+                )
             )
-        elif fact == 'url':
-            q_df = q_df.groupby([*dims]).count()
-            q_df = q_df.rename(columns={'url': 'games_played'}).sort_values(by='games_played', ascending=False)
 
-        
+        stored = read_raw_fields(self.username, months, [field])
+        if stored is None:
+            return [None] * len(self.game_history_df)
+        values = stored[field].reindex(self.game_history_df["uuid"])
+        return values.astype(object).where(values.notna(), None).to_list()
+
+    def get_stored_pgns(self) -> list | None:
+        """
+        Returns the PGN of every row of game_history_df from the side-store.
+
+        Args:
+            N/A
+
+        Returns:
+            A list of PGNs aligned with the rows of game_history_df, or None
+            if any month of game_history_df isn't in the side-store
+        """
+
+        months = self.game_history_df.index.strftime("%Y-%m")
+        if not set(months) <= set(list_pgn_months(self.username)):
+            return None
+        by_uuid = {}
+        for month in set(months):
+            by_uuid.update(read_month_pgns(self.username, month))
+        return [by_uuid.get(uuid) for uuid in self.game_history_df["uuid"]]
+
+    def fetch_raw_games(
+        self, fields: set[str], months: list[str] | None = None
+    ) -> list[dict]:
+        """
+        Re-fetches raw game fields from the Chess.com API.
+
+        Only the archives of the given months are requested and only the
+        url and the requested fields of each game are decoded, so the
+        result is much smaller than the full raw history.
+
+        Args:
+            fields [set]: the game fields to decode, e.g. {"pgn"}
+            months [None/list]: "YYYY-MM" months to fetch (all months in
+                game_history_df if None)
+
+        Returns:
+            A list of game dicts holding url and the requested fields
+        """
+
+        if months is None:
+            months = set(self.game_history_df.index.strftime("%Y-%m"))
+        archive_urls = [
+            url
+            for url in get_archives(self.username) or []
+            if archive_month(url) in months
+        ]
+        monthly_archives = asyncio.run(
+            get_game_history_by_month(self.username, archive_urls, {"url", *fields})
+        )
+        return [game for games in monthly_archives.values() for game in games]
+
+    def get_raw_games(self, fields: set[str]) -> list[dict]:
+        """
+        Returns raw games holding at least the given fields.
+
+        The raw history is used if it's held. Otherwise it's loaded, unless
+        the user is slim, in which case only the given fields are
+        re-fetched and nothing is kept.
+
+        Args:
+            fields [set]: the game fields needed
+
+        Returns:
+            A list of game dicts
+        """
+
+        if getattr(self, "game_history", None) is None and not self.slim:
+            self.load_game_history()
+        if getattr(self, "game_history", None) is not None:
+            return self.game_history
+        return self.fetch_raw_games(fields)
+
+    def get_raw_game_field(self, field: str) -> list:
+        """
+        Returns a raw game field for every row of game_history_df.
+
+        Values are matched to rows by game url, so the order of the raw
+        games doesn't matter. The raw games come from get_raw_games, except
+        when the raw history isn't held: stored_raw_fields are then read
+        from the raw field side-store and PGNs from the PGN side-store if
+        every month is stored.
+
+        Args:
+            field [str]: a key of the raw game dicts, e.g. "pgn"
+
+        Returns:
+            A list of values aligned with the rows of game_history_df
+        """
+
+        if getattr(self, "game_history", None) is None:
+            if field in stored_raw_fields:
+                return self.get_stored_raw_field(field)
+            if field == "pgn":
+                pgns = self.get_stored_pgns()
+                if pgns is not None:
+                    return pgns
+        by_url = {game["url"]: game.get(field) for game in self.get_raw_games({field})}
+        return [by_url.get(url) for url in self.game_history_df["url"]]
+
+    @memoize_result(lambda self: self.data_version(), latest_only=True)
+    def get_pgn_headers(self) -> pd.DataFrame:
+        """
+        Returns the PGN headers of every game in game_history_df.
+
+        The header block of every PGN is parsed in one pass and memoized by
+        data version, so the PGN header columns all read from it rather
+        than re-reading and re-parsing the PGNs per column. Headers are
+        stored as categoricals as most of their values repeat.
+
+        Args:
+            N/A
+
+        Returns:
+            A dataframe with one column per header name, indexed like
+            game_history_df
+        """
+
+        headers = extract_pgn_headers(self.get_raw_game_field("pgn"))
+        return pd.DataFrame(headers, index=self.game_history_df.index).astype(
+            "category"
+        )
+
+    def get_game_field(self, url: str, field: str):
+        """
+        Returns a raw field of a single game, e.g. its PGN for a detail view.
+
+        If the raw history isn't held, a PGN is read from the PGN
+        side-store, which only decompresses the block holding the game.
+        Otherwise only the game's month is re-fetched.
+
+        Args:
+            url [str]: the game's url
+            field [str]: a key of the raw game dict
 
-        if q_df.index.name != "op_rating" and fact == "accuracy":
-            return q_df.sort_values(by=fact, ascending=False)
-        
+        Returns:
+            The field's value, or None if the game or field wasn't found
+        """
+
+        if getattr(self, "game_history", None) is not None:
+            games = self.game_history
         else:
-            return q_df
+            rows = self.game_history_df[self.game_history_df["url"] == url]
+            if len(rows) == 0:
+                return None
+            month = rows.index[0].strftime("%Y-%m")
+            if field == "pgn":
+                pgn = read_pgn(self.username, month, rows["uuid"].iloc[0])
+                if pgn is not None:
+                    return pgn
+            games = self.fetch_raw_games({field}, [month])
+        for game in games:
+            if game["url"] == url:
+                return game.get(field)
+        return None
 
-    def get_top_10(self, col: str, asc: bool = False, rated_only: bool = True):
+    @classmethod
+    def register_pgn_header_columns(cls, headers: list[str]) -> list[str]:
+        """
+        Registers derived columns for the passed PGN headers.
+
+        Column names are the snake case versions of the header names, e.g.
+        "WhiteElo" -> "white_elo", with a "_header" suffix if that would
+        shadow a raw game field. Like other derived columns they're
+        computed from the parsed headers (see get_pgn_headers) on first
+        access by get_column and cached until game_history_df changes.
+        Common headers such as Termination and the Elo fields are
+        registered by default, e.g. StartTime as "start_clock".
+
+        Args:
+            headers [list]: PGN header names, e.g. ["Termination", "EndDate"]
+
+        Returns:
+            The column names of the headers
+        """
+
+        defaults = {header: name for name, header in pgn_header_columns.items()}
+        names = []
+        for header in headers:
+            name = defaults.get(header) or header_to_column_name(header)
+            if name in game_field_types:
+                name = f"{name}_header"
+            if name not in cls.derived_columns:
+                cls.derived_columns[name] = pgn_header_column(header)
+            names.append(name)
+        return names
+
+    def get_game_moves(self) -> GameMoves:
+        """
+        Returns the moves and clock times of every game in game_history_df.
+
+        The PGNs are parsed on first use only and the result is cached in
+        the game_moves attribute. Game i of the result is row i of
+        game_history_df.
+
+        Args:
+            N/A
+
+        Returns:
+            A GameMoves instance
+        """
+
+        if self.game_moves is None:
+            self.game_moves = GameMoves.from_pgns(self.get_raw_game_field("pgn"))
+        return self.game_moves
+
+    def get_tcn_moves(self) -> TcnMoves:
+        """
+        Returns the decoded TCN moves of every game in game_history_df.
+
+        The TCN strings of the whole history are decoded in one batch on
+        first use and cached in the tcn_moves attribute. Game i of the
+        result is row i of game_history_df.
+
+        Args:
+            N/A
 
-        top_10_df = self.game_history_df.copy()
-        top_10_df.query("result == 'win'", inplace=True)
+        Returns:
+            A TcnMoves instance
+        """
+
+        if self.tcn_moves is None:
+            self.tcn_moves = TcnMoves.from_tcns(self.get_raw_game_field("tcn"))
+        return self.tcn_moves
+
+    def get_opening_sequences(self, n_plies: int = 6) -> pd.Series:
+        """
+        Returns the first n plies of every game as a string of UCI moves.
+
+        Args:
+            n_plies [int]: the number of plies (half-moves) to include
+
+        Returns:
+            A series aligned with game_history_df, e.g. "e2e4 e7e5 g1f3"
+        """
+
+        first_n = move_codes_to_uci(self.get_tcn_moves().first_n_moves(n_plies))
+        sequences = first_n[:, 0]
+        for ply in range(1, n_plies):
+            sequences = numpy.char.add(
+                sequences, numpy.where(first_n[:, ply] != "", " ", "")
+            )
+            sequences = numpy.char.add(sequences, first_n[:, ply])
+        return pd.Series(sequences, index=self.game_history_df.index, name="opening")
+
+    def get_opening_tree(self) -> OpeningTree:
+        """
+        Returns a tree of the opening moves of every game in game_history_df.
+
+        The tree covers the first opening_tree_depth plies of each game and
+        is built in one pass on first use (see build_opening_tree), then
+        cached in the opening_tree attribute until game_history_df changes.
+
+        Args:
+            N/A
+
+        Returns:
+            An OpeningTree instance
+        """
+
+        if self.opening_tree is None:
+            self.opening_tree = self.build_opening_tree()
+        return self.opening_tree
+
+    @memoize_result(lambda self: self.data_version(), latest_only=True)
+    def build_opening_tree(self) -> OpeningTree:
+        """
+        Builds the opening tree of game_history_df.
+
+        The tree is memoized by data version, so instances loading the same
+        history (e.g. on each app rerun) share one tree instead of decoding
+        the moves again.
+
+        Args:
+            N/A
+
+        Returns:
+            An OpeningTree instance
+        """
+
+        df = self.game_history_df
+        return OpeningTree(
+            self.get_tcn_moves().first_n_moves(opening_tree_depth),
+            df["colour"].array,
+            df["time_class"].array,
+            df["result"].to_numpy(dtype=object),
+            df["accuracy"].to_numpy(dtype=numpy.float64, na_value=numpy.nan),
+        )
+
+    @staticmethod
+    def add_to_position_index(
+        position_index: PositionIndex, df: pd.DataFrame, games: list[dict]
+    ) -> PositionIndex:
+        """
+        Adds the games of a wrangled df to a position index.
+
+        Args:
+            position_index [PositionIndex]: the index to extend
+            df [pd.DataFrame]: wrangled games
+            games [list]: the raw game dicts of the rows of df
+
+        Returns:
+            The extended position index
+        """
+
+        position_index.add_games(
+            [game.get("tcn") for game in games],
+            [game.get("initial_setup") for game in games],
+            df["uuid"].to_numpy(),
+            df["colour"].to_numpy(dtype=object),
+            df["result"].to_numpy(dtype=object),
+        )
+        return position_index
+
+    def get_position_index(self) -> PositionIndex:
+        """
+        Returns an index of every position reached in game_history_df.
+
+        The index is built on first use (see build_position_index) and
+        cached in the position_index attribute. Games wrangled by
+        wrangle_new_games are merged into an existing index rather than
+        rebuilding it.
+
+        Args:
+            N/A
+
+        Returns:
+            A PositionIndex instance
+        """
+
+        if self.position_index is None:
+            self.position_index = self.build_position_index()
+        return self.position_index
+
+    @memoize_result(lambda self: self.data_version(), latest_only=True)
+    def build_position_index(self) -> PositionIndex:
+        """
+        Builds the position index of game_history_df.
+
+        The index is memoized by data version, so instances loading the same
+        history (e.g. on each app rerun) share one index instead of reading
+        every game's moves again.
+
+        Args:
+            N/A
+
+        Returns:
+            A PositionIndex instance
+        """
+
+        tcns = self.get_raw_game_field("tcn")
+        initial_setups = self.get_raw_game_field("initial_setup")
+        return self.add_to_position_index(
+            PositionIndex(),
+            self.game_history_df,
+            [
+                {"tcn": tcn, "initial_setup": initial_setup}
+                for tcn, initial_setup in zip(tcns, initial_setups)
+            ],
+        )
+
+    def current_position_index(self) -> PositionIndex | None:
+        """
+        Returns the position index of game_history_df if it's already built.
+
+        Looks at the position_index attribute, then at the index memoized
+        for the current data version, without building one.
+        """
 
-        return top_10_df.sort_values(by=col, ascending=asc).head(10)
\ No newline at end of file
+        if self.position_index is not None:
+            return self.position_index
+        return ChessUser.build_position_index.cached(self)
+
+    def get_position_stats(self, fen: str) -> pd.DataFrame:
+        """
+        Returns how the user scores from a position across all their games.
+
+        Args:
+            fen [str]: a FEN string
+
+        Returns:
+            Df indexed by colour with games_played and win/draw/loss % columns
+
+        Raises:
+            ValueError: if the FEN is invalid
+        """
+
+        return self.get_position_index().position_stats(fen)
+
+    def get_common_positions(self, min_ply: int = 8, n: int = 10) -> pd.DataFrame:
+        """
+        Returns the positions the user reached in the most games.
+
+        Each position is described by the UCI moves of the first game in
+        which it was reached.
+
+        Args:
+            min_ply [int]: ignore positions reached before this ply
+            n [int]: the number of positions to return
+
+        Returns:
+            Df of positions with moves, games_played and win/draw/loss %
+        """
+
+        df = self.get_position_index().common_positions(min_ply, n)
+        if df.empty:
+            return df
+        rows = pd.Series(
+            numpy.arange(len(self.game_history_df)),
+            index=self.game_history_df["uuid"].to_numpy(),
+        )
+        tcn_moves = self.get_tcn_moves()
+        df["moves"] = [
+            " ".join(tcn_moves.game_moves(rows[uuid])[:ply])
+            for uuid, ply in zip(df["uuid"], df["ply"])
+        ]
+        return df.set_index("moves").drop(columns=["hash", "uuid", "ply"])
+
+    def get_time_management_stats(self) -> pd.DataFrame:
+        """
+        Returns a df of the user's time management per time class.
+
+        Uses the clock times from get_game_moves to work out the time the
+        user spent on each of their moves (including the increment) and
+        averages it over the opening, middlegame and endgame as defined by
+        move_phases. Also gives the percentage of games in which the user's
+        clock fell below time_trouble_fraction of the base time. Daily
+        games are excluded as their clocks are per move.
+
+        Args:
+            N/A
+
+        Returns:
+            Df indexed by time_class with mean seconds per move for each
+            phase and a time_trouble_pc column
+        """
+
+        moves = self.get_game_moves()
+        df = self.game_history_df
+        base = self.get_column("base_time").to_numpy()
+        increment = self.get_column("increment").to_numpy()
+
+        game = moves.game_index()
+        ply = moves.ply_index()
+        clocks = moves.clocks.astype("float64")
+        clocks[clocks < 0] = numpy.nan
+
+        # each player's previous clock time is two plies back, or the base
+        # time for their first move
+        previous = numpy.full(len(clocks), numpy.nan)
+        previous[2:] = clocks[:-2]
+        previous = numpy.where(ply < 2, base[game] * 10, previous)
+        spent = (previous - clocks) / 10 + increment[game]
+
+        is_white = (df["colour"] == "white").to_numpy()
+        own = ((ply % 2) == 0) == is_white[game]
+        move_number = ply // 2 + 1
+        phase = numpy.select(
+            [
+                move_number <= move_phases["opening"],
+                move_number <= move_phases["middlegame"],
+            ],
+            ["opening", "middlegame"],
+            "endgame",
+        )
+
+        plies_df = pd.DataFrame(
+            {
+                "game": game,
+                "time_class": df["time_class"].to_numpy()[game],
+                "phase": phase,
+                "spent": spent,
+                "clock": clocks,
+                "trouble_at": base[game] * 10 * time_trouble_fraction,
+            }
+        )[own & ~numpy.isnan(spent)]
+
+        per_phase = (
+            plies_df.groupby(["time_class", "phase"], observed=True)["spent"]
+            .mean()
+            .unstack("phase")
+            .reindex(columns=["opening", "middlegame", "endgame"])
+        )
+        per_game = plies_df.groupby("game").agg(
+            time_class=("time_class", "first"),
+            min_clock=("clock", "min"),
+            trouble_at=("trouble_at", "first"),
+        )
+        per_game["time_trouble_pc"] = (
+            per_game["min_clock"] < per_game["trouble_at"]
+        ) * 100.0
+        time_trouble = per_game.groupby("time_class", observed=True)[
+            "time_trouble_pc"
+        ].mean()
+
+        return per_phase.join(time_trouble).round(1)
+
+    def add_accuracy_stats(self, new_games_df: pd.DataFrame | None = None) -> None:
+        """
+        Adds the user's mean, highest and lowest accuracy as attributes.
+
+        The running sum and count of accuracies are kept so that when the
+        df of newly appended games is passed, the stats are updated from
+        those rows alone rather than recomputed over the whole history.
+
+        Args:
+            new_games_df [None/pd.DataFrame]: newly appended games, if any
+
+        Returns:
+            None
+        """
+
+        if new_games_df is None or getattr(self, "accuracy_count", None) is None:
+            accuracies = self.game_history_df["accuracy"].astype("float64")
+            self.accuracy_sum = accuracies.sum()
+            self.accuracy_count = accuracies.count()
+            self.highest_accuracy = accuracies.max()
+            self.lowest_accuracy = accuracies.min()
+        else:
+            accuracies = new_games_df["accuracy"].astype("float64")
+            self.accuracy_sum += accuracies.sum()
+            self.accuracy_count += accuracies.count()
+            self.highest_accuracy = pd.Series(
+                [self.highest_accuracy, accuracies.max()]
+            ).max()
+            self.lowest_accuracy = pd.Series(
+                [self.lowest_accuracy, accuracies.min()]
+            ).min()
+
+        if self.accuracy_count:
+            avg_accuracy = self.accuracy_sum / self.accuracy_count
+        else:
+            avg_accuracy = numpy.nan
+        self.avg_accuracy = round(avg_accuracy, 2)
+
+    def get_games_between(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Returns the games that ended within the passed time window.
+
+        game_history_df is indexed by a sorted end_time DatetimeIndex, so
+        the window is located by binary search and returned as a slice
+        rather than by scanning and masking every row.
+
+        Args:
+            start [None/str/datetime]: inclusive start (no limit if None)
+            end [None/str/datetime]: inclusive end (no limit if None)
+
+        Returns:
+            A df of the games in the window
+        """
+
+        lo, hi = self.get_window_bounds(start, end)
+        return self.game_history_df.iloc[lo:hi]
+
+    def get_window_bounds(self, start=None, end=None) -> tuple[int, int]:
+        """
+        Returns the row positions of the games that ended within a window.
+
+        Args:
+            start [None/str/datetime]: inclusive start (no limit if None)
+            end [None/str/datetime]: inclusive end (no limit if None)
+
+        Returns:
+            A tuple (lo, hi) such that rows lo:hi of game_history_df are
+            the games in the window
+        """
+
+        index = self.game_history_df.index
+        lo = 0 if start is None else index.searchsorted(to_utc_timestamp(start))
+        if end is None:
+            hi = len(index)
+        else:
+            hi = index.searchsorted(to_utc_timestamp(end), side="right")
+        return lo, hi
+
+    def get_recent_games(self, days: int = 30) -> pd.DataFrame:
+        """
+        Returns the games that ended in the last n days.
+
+        Args:
+            days [int]: the number of days to look back from now
+
+        Returns:
+            A df of the games in the window
+        """
+
+        start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+        return self.get_games_between(start=start)
+
+    def add_to_opponent_index(
+        self, opponent_index: OpponentIndex, start: int = 0
+    ) -> OpponentIndex:
+        """
+        Adds the games from row start of game_history_df to an opponent index.
+
+        Args:
+            opponent_index [OpponentIndex]: the index to extend
+            start [int]: the first row to add
+
+        Returns:
+            The extended opponent index
+        """
+
+        opponent_index.add_games(
+            self.get_column("opponent").to_numpy(dtype=object)[start:],
+            self.get_column("result").to_numpy(dtype=object)[start:],
+            self.get_column("accuracy").to_numpy(dtype="float64")[start:],
+            self.get_column("op_accuracy").to_numpy(dtype="float64")[start:],
+            self.get_column("rating_differential").to_numpy()[start:],
+            numpy.arange(start, len(self.game_history_df)),
+        )
+        return opponent_index
+
+    def get_opponent_index(self) -> OpponentIndex:
+        """
+        Returns the user's opponent index, building it once per history.
+
+        Args:
+            N/A
+
+        Returns:
+            An OpponentIndex of every game in game_history_df
+        """
+
+        if self.opponent_index is None:
+            self.opponent_index = self.build_opponent_index()
+        return self.opponent_index
+
+    @memoize_result(lambda self: self.data_version(), latest_only=True)
+    def build_opponent_index(self) -> OpponentIndex:
+        """
+        Builds the opponent index of game_history_df.
+
+        The index is memoized by data version, so instances loading the same
+        history (e.g. on each app rerun) share one index.
+        """
+
+        return self.add_to_opponent_index(OpponentIndex())
+
+    def get_opponent_stats(self, opponent: str) -> pd.Series | None:
+        """
+        Returns the user's head-to-head aggregates against one opponent.
+
+        Args:
+            opponent [str]: the opponent's username
+
+        Returns:
+            A series of games played, W/D/L %, both sides' mean accuracy
+            and rating differential stats, or None if they haven't played
+        """
+
+        return self.get_opponent_index().lookup(opponent)
+
+    def get_opponent_games(self, opponent: str) -> pd.DataFrame:
+        """
+        Returns the user's games against one opponent, oldest first.
+        """
+
+        rows = self.get_opponent_index().opponent_rows(opponent)
+        return self.game_history_df.iloc[rows]
+
+    @memoize_result(lambda self: self.data_version())
+    def get_most_played_opponents(self, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the head-to-head aggregates of the k most played opponents.
+        """
+
+        return self.get_opponent_index().most_played(k)
+
+    def add_to_rolling_stats(
+        self, rolling_stats: dict[str, RollingStats], start: int = 0
+    ) -> dict[str, RollingStats]:
+        """
+        Adds the games from row start of game_history_df to rolling stats.
+
+        Args:
+            rolling_stats [dict]: RollingStats by time class to extend
+            start [int]: the first row to add
+
+        Returns:
+            The extended dict of RollingStats by time class
+        """
+
+        time_classes = self.get_column("time_class").to_numpy(dtype=object)[start:]
+        results = self.get_column("result").to_numpy(dtype=object)[start:]
+        accuracies = self.get_column("accuracy").to_numpy(dtype="float64")[start:]
+        ratings = self.get_column("rating").to_numpy()[start:]
+        times = self.game_history_df.index[start:]
+        for time_class in pd.unique(time_classes):
+            mask = time_classes == time_class
+            rolling_stats.setdefault(time_class, RollingStats()).add_games(
+                times[mask], results[mask], accuracies[mask], ratings[mask]
+            )
+        return rolling_stats
+
+    def get_rolling_stats(self, time_class: str) -> RollingStats:
+        """
+        Returns the rolling stats of a time class, building them once.
+
+        Args:
+            time_class [str]: e.g. "blitz"
+
+        Returns:
+            The time class's RollingStats (empty if it has no games)
+        """
+
+        if not self.rolling_stats:
+            self.rolling_stats = self.add_to_rolling_stats({})
+        return self.rolling_stats.get(time_class, RollingStats())
+
+    @memoize_result(lambda self: self.data_version())
+    def get_rolling_form(
+        self, time_class: str, games: int | None = None, days: float | None = None
+    ) -> pd.DataFrame:
+        """
+        Returns the user's form over a rolling window after each game.
+
+        Windows are the last n games or the games of the last n days of
+        the time class (see RollingStats.compute). Results are memoized
+        per user and history version.
+
+        Args:
+            time_class [str]: e.g. "blitz"
+            games [None/int]: windows of the last n games
+            days [None/float]: windows of the games in the last n days
+
+        Returns:
+            A df indexed by end_time with games, win_pc, score_pc,
+            accuracy and rating_change columns
+        """
+
+        return self.get_rolling_stats(time_class).compute(games, days)
+
+    def get_sort_permutation(self, col: str) -> tuple[numpy.ndarray, int]:
+        """
+        Returns the row positions of game_history_df sorted by a column.
+
+        The stable ascending order is computed once per column and cached
+        until game_history_df changes. Missing values are sorted last.
+
+        Args:
+            col [str]: a column name, or "end_time" for the index
+
+        Returns:
+            A tuple of an int64 array of row positions and the number of
+            rows with a value (the rows before the missing values)
+        """
+
+        if col not in self.sort_permutations:
+            if col == "end_time":
+                n = len(self.game_history_df)
+                self.sort_permutations[col] = (numpy.arange(n), n)
+            else:
+                values = pd.Series(self.game_history_df[col].to_numpy())
+                order = values.sort_values(kind="stable", na_position="last").index
+                self.sort_permutations[col] = (
+                    order.to_numpy(dtype=numpy.int64),
+                    int(values.notna().sum()),
+                )
+        return self.sort_permutations[col]
+
+    @memoize_result(lambda self: self.data_version())
+    def get_history_order(
+        self,
+        sort_by: str = "end_time",
+        ascending: bool = False,
+        filters: dict | None = None,
+    ) -> numpy.ndarray:
+        """
+        Returns the row positions of the games in a sorted, filtered view.
+
+        Reads the column's cached sort permutation, so sorting costs no
+        more than reversing it. Filters are boolean masks (see
+        filter_mask) applied to the permutation. Results are memoized per
+        user and history version, so paging through a view doesn't
+        recompute it.
+
+        Args:
+            sort_by [str]: the column to sort by, or "end_time"
+            ascending [bool]: whether the sort is ascending
+            filters [None/dict]: columns to filter conditions
+
+        Returns:
+            An int64 array of row positions in display order
+        """
+
+        order, n_valid = self.get_sort_permutation(sort_by)
+        if not ascending:
+            order = numpy.concatenate((order[:n_valid][::-1], order[n_valid:]))
+        if filters:
+            mask = numpy.ones(len(self.game_history_df), dtype=bool)
+            for col, condition in filters.items():
+                mask &= filter_mask(self.get_column(col).array, condition)
+            order = order[mask[order]]
+        return order
+
+    def get_history_page(
+        self,
+        page: int = 0,
+        page_size: int = history_page_size,
+        sort_by: str = "end_time",
+        ascending: bool = False,
+        filters: dict | None = None,
+    ) -> tuple[pd.DataFrame, int]:
+        """
+        Returns one page of a sorted, filtered view of game_history_df.
+
+        Only the page's rows are taken from game_history_df, so the size
+        of the result doesn't depend on the number of games.
+
+        Args:
+            page [int]: the zero-based page number
+            page_size [int]: the number of rows per page
+            sort_by, ascending, filters: the view (see get_history_order)
+
+        Returns:
+            A tuple of the page's df and the number of rows in the view
+        """
+
+        order = self.get_history_order(sort_by, ascending, filters)
+        rows = order[page * page_size : (page + 1) * page_size]
+        return self.game_history_df.iloc[rows], len(order)
+
+    @memoize_result(lambda self: self.data_version())
+    def get_rating_ohlc(
+        self, time_class: str, freq: str = "week", days: int | None = None
+    ) -> pd.DataFrame:
+        """
+        Returns the user's open/high/low/close rating per day, week or month.
+
+        The games of the time class are located by binary search on the
+        end_time index and a mask, then rolled up by rating_ohlc without
+        sorting or grouping. Results are memoized per user and history
+        version.
+
+        Args:
+            time_class [str]: e.g. "blitz"
+            freq [str]: "day", "week" or "month"
+            days [None/int]: only games since midnight (UTC) n days ago
+                (all games if None)
+
+        Returns:
+            A df indexed by period start with open, high, low, close,
+            games_played and net_change columns
+        """
+
+        start = None
+        if days is not None:
+            start = pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=days)
+        lo, hi = self.get_window_bounds(start)
+        mask = self.get_column("time_class").to_numpy()[lo:hi] == time_class
+        return rating_ohlc(
+            self.game_history_df.index[lo:hi][mask],
+            self.get_column("rating").to_numpy()[lo:hi][mask],
+            freq,
+        )
+
+    @memoize_result(lambda self: self.data_version())
+    def query(
+        self,
+        measures: list[str],
+        dims: list[str],
+        filters: dict | None = None,
+        sort: str | None = None,
+        ascending: bool = False,
+        limit: int | None = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """
+        Aggregates measures of the games in a time window by dimensions.
+
+        Queries over the whole history that only group by and filter on
+        the aggregate cube's dimensions are rolled up from the cube (see
+        query_cube). Otherwise only the columns the query needs are read
+        (via get_column) and sliced to the window and filters, and every
+        measure is computed in a single groupby, so game_history_df is
+        never copied. "op_rating" dimensions are bucketed to the nearest
+        op_rating_bucket_width.
+
+        Args:
+            measures [list]: names of measures in measure_registry, e.g.
+                ["games_played", "win_pc", "accuracy"]
+            dims [list]: the columns to group by (at least one)
+            filters [None/dict]: columns to filter conditions (see
+                filter_mask), e.g. {"rated": True, "time_class": ["blitz"]}
+            sort [None/str]: the measure (or dimension) to sort by
+            ascending [bool]: whether the sort is ascending
+            limit [None/int]: the maximum number of rows returned
+            start, end: the time window (see get_window_bounds)
+
+        Returns:
+            A df of the measures indexed by the dims
+        """
+
+        q_df = None
+        if start is None and end is None:
+            q_df = self.query_cube(measures, dims, filters)
+        if q_df is None:
+            q_df = self.scan_query(measures, dims, filters, start, end)
+
+        if sort is not None:
+            q_df = q_df.sort_values(by=sort, ascending=ascending)
+        if limit is not None:
+            q_df = q_df.head(limit)
+        return q_df
+
+    def scan_query(
+        self,
+        measures: list[str],
+        dims: list[str],
+        filters: dict | None = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """
+        Computes an unsorted query (see query) in one pass over the games.
+        """
+
+        lo, hi = self.get_window_bounds(start, end)
+        mask = numpy.ones(hi - lo, dtype=bool)
+        for col, condition in (filters or {}).items():
+            mask &= filter_mask(self.get_column(col).array[lo:hi], condition)
+        keep = None if mask.all() else mask
+
+        def window(col):
+            values = self.get_column(col).array[lo:hi]
+            return values if keep is None else values[keep]
+
+        data = {dim: window(dim) for dim in dims}
+        if "op_rating" in dims:
+            data["op_rating"] = bucket_ratings(data["op_rating"])
+        specs = {name: measure_registry[name] for name in measures}
+        for name, measure in specs.items():
+            values = window(measure.column)
+            if measure.transform is not None:
+                values = measure.transform(values)
+            data[name] = values
+
+        q_df = (
+            pd.DataFrame(data)
+            .groupby(dims, observed=True)
+            .agg(**{name: (name, measure.agg) for name, measure in specs.items()})
+        )
+        return q_df.round(
+            {name: m.decimals for name, m in specs.items() if m.decimals is not None}
+        )
+
+    def get_aggregate_cube(self) -> AggregateCube:
+        """
+        Returns the aggregate cube of the game history, building it once.
+
+        The cube is built by build_aggregate_cube and cached until
+        game_history_df changes.
+
+        Args:
+            N/A
+
+        Returns:
+            An AggregateCube over aggregate_cube_dims
+        """
+
+        if self.aggregate_cube is None:
+            self.aggregate_cube = self.build_aggregate_cube()
+        return self.aggregate_cube
+
+    @memoize_result(lambda self: self.data_version(), latest_only=True)
+    def build_aggregate_cube(self) -> AggregateCube:
+        """
+        Builds the aggregate cube of game_history_df.
+
+        Opponent ratings are bucketed to op_rating_bucket_width. The cube is
+        memoized by data version, so instances loading the same history
+        (e.g. on each app rerun) build it once between them.
+
+        Args:
+            N/A
+
+        Returns:
+            An AggregateCube over aggregate_cube_dims
+        """
+
+        columns = {dim: self.get_column(dim).array for dim in aggregate_cube_dims}
+        if "op_rating" in columns:
+            columns["op_rating"] = bucket_ratings(columns["op_rating"])
+        return AggregateCube(
+            columns, self.get_column("result"), self.get_column("accuracy")
+        )
+
+    def cube_column(self, name: str, exact: bool = False):
+        """
+        Returns a column aligned with the aggregate cube's cells.
+
+        Cube dimensions are returned as stored. Derived columns whose inputs
+        are all unbucketed cube dimensions are computed from the cells.
+
+        Args:
+            name [str]: a column name
+            exact [bool]: if True, bucketed dimensions aren't returned
+
+        Returns:
+            The column's values, or None if it can't be read from the cube
+        """
+
+        cells = self.get_aggregate_cube().cells
+        bucketed = {"op_rating"}
+        if name in cells and name in aggregate_cube_dims:
+            return None if exact and name in bucketed else cells[name]
+        derived = self.derived_columns.get(name)
+        if (
+            name not in self.game_history_df
+            and derived is not None
+            and set(derived.inputs) <= set(aggregate_cube_dims) - bucketed
+        ):
+            return derived.compute(*(cells[col] for col in derived.inputs))
+        return None
+
+    def query_cube(
+        self, measures: list[str], dims: list[str], filters: dict | None = None
+    ) -> pd.DataFrame | None:
+        """
+        Answers an unsorted query (see query) from the aggregate cube.
+
+        Returns:
+            A df of the measures indexed by the dims, or None if a measure,
+            dimension or filter can't be answered from the cube
+        """
+
+        if not set(measures) <= set(AggregateCube.measure_formulas):
+            return None
+        keys = {dim: self.cube_column(dim) for dim in dims}
+        conditions = {
+            col: (self.cube_column(col, exact=True), condition)
+            for col, condition in (filters or {}).items()
+        }
+        if any(values is None for values in keys.values()) or any(
+            values is None for values, _ in conditions.values()
+        ):
+            return None
+
+        cube = self.get_aggregate_cube()
+        mask = numpy.ones(len(cube.cells), dtype=bool)
+        for values, condition in conditions.values():
+            mask &= filter_mask(values, condition)
+        return cube.rollup(keys, measures, mask)
+
+    @memoize_result(lambda self: self.data_version())
+    def query_game_history(
+        self,
+        fact: str,
+        dims: list[str],
+        rated_only: bool = False,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """
+        Aggregates one fact ("url", "result" or "accuracy") by dimensions.
+
+        A shorthand for query with the measures in fact_measures. Groups
+        without a known accuracy are left out of "accuracy" queries.
+        """
+
+        measures, sort = fact_measures[fact]
+        filters = {"rated": True} if rated_only else {}
+        if fact == "accuracy" and dims == ["op_rating"]:
+            sort = None
+        q_df = self.query(measures, dims, filters, sort=sort, start=start, end=end)
+        if fact == "accuracy":
+            q_df = q_df.dropna(subset=["accuracy"])
+        return q_df
+
+    def add_to_top_k_index(self, top_k_index: TopKIndex, col: str, start: int = 0):
+        """
+        Adds the wins from row start of game_history_df to a top-k index.
+
+        Args:
+            top_k_index [TopKIndex]: the index to extend
+            col [str]: the column the index ranks by
+            start [int]: the first row to add
+        """
+
+        results = numpy.asarray(self.get_column("result").array[start:])
+        wins = numpy.flatnonzero(results == "win")
+        values = self.get_column(col).to_numpy(dtype="float64", na_value=numpy.nan)
+        top_k_index.add(
+            values[start:][wins],
+            wins + start,
+            self.get_column("rated").to_numpy()[start:][wins],
+            self.get_column("time_class").to_numpy(dtype=object)[start:][wins],
+        )
+
+    def get_top_k_index(self, col: str) -> TopKIndex:
+        """
+        Returns the top-k index of wins ranked by a column, building it once.
+
+        Args:
+            col [str]: a numeric column, e.g. "accuracy"
+
+        Returns:
+            A TopKIndex of the rows of the user's wins
+        """
+
+        if col not in self.top_k_indexes:
+            self.top_k_indexes[col] = TopKIndex()
+            self.add_to_top_k_index(self.top_k_indexes[col], col)
+        return self.top_k_indexes[col]
+
+    def get_top_k(
+        self,
+        col: str,
+        k: int = 10,
+        asc: bool = False,
+        rated_only: bool = False,
+        time_classes: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the user's k best wins ranked by a column.
+
+        Reads the column's top-k index, so the cost depends on k rather
+        than on the number of games. Wins with no value in the column
+        (e.g. no accuracy) aren't ranked.
+
+        Args:
+            col [str]: the column to rank by, e.g. "rating_differential"
+            k [int]: the number of games
+            asc [bool]: if True, the wins with the lowest values
+            rated_only [bool]: whether only rated games are ranked
+            time_classes [None/list]: time classes to rank (all if None)
+
+        Returns:
+            A df of at most k rows of game_history_df, best first
+        """
+
+        rows = self.get_top_k_index(col).top(
+            k, asc, True if rated_only else None, time_classes
+        )
+        return self.game_history_df.iloc[rows]
+
+    @memoize_result(lambda self: self.data_version())
+    def get_top_10(self, col: str, asc: bool = False, rated_only: bool = True):
+        return self.get_top_k(col, 10, asc, rated_only)
@@ -0,0 +1,181 @@
+import numpy as np
+
+from helpers.pgn_helpers import parse_pgn_moves
+from helpers.tcn_helpers import decode_tcns, move_codes_to_uci
+
+
+class GameArrays:
+    """
+    Per-ply data of a list of games stored end to end in flat arrays
+
+    Rather than one Python object per move, the plies of every game are
+    stored in flat arrays and located using per-game offsets: the plies
+    of game i are at positions offsets[i] to offsets[i + 1] - 1.
+
+    Attributes:
+        offsets [np.ndarray]: int64 array of length n_games + 1
+    """
+
+    def __init__(self, offsets: np.ndarray):
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def ply_counts(self) -> np.ndarray:
+        """
+        Returns the number of plies (half-moves) of each game.
+        """
+
+        return np.diff(self.offsets)
+
+    def game_index(self) -> np.ndarray:
+        """
+        Returns the game number of every ply in the flat arrays.
+        """
+
+        return np.repeat(np.arange(len(self)), self.ply_counts())
+
+    def ply_index(self) -> np.ndarray:
+        """
+        Returns the 0-based ply number within its game of every ply.
+        """
+
+        return np.arange(self.offsets[-1]) - self.offsets[self.game_index()]
+
+
+class GameMoves(GameArrays):
+    """
+    The SAN moves and clock times of a list of games
+
+    Attributes:
+        sans [np.ndarray]: bytes array of SAN moves
+        clocks [np.ndarray]: int32 clock times in tenths of a second (-1 if unknown)
+        offsets [np.ndarray]: int64 array of length n_games + 1
+    """
+
+    def __init__(self, sans: np.ndarray, clocks: np.ndarray, offsets: np.ndarray):
+        super().__init__(offsets)
+        self.sans = sans
+        self.clocks = clocks
+
+    @classmethod
+    def from_pgns(cls, pgns: list[str]):
+        """
+        Parses the moves and clock times of a list of PGNs.
+
+        Args:
+            pgns [list]: a list of PGN strings (None for missing PGNs)
+
+        Returns:
+            A GameMoves instance with one game per PGN
+        """
+
+        sans, clocks, lengths = [], [], []
+        for pgn in pgns:
+            game_sans, game_clocks = parse_pgn_moves(pgn or "")
+            sans.extend(game_sans)
+            clocks.extend(game_clocks)
+            lengths.append(len(game_sans))
+
+        offsets = np.zeros(len(pgns) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(
+            np.array(sans, dtype="S") if sans else np.array([], dtype="S1"),
+            np.array(clocks, dtype=np.int32),
+            offsets,
+        )
+
+    def game_moves(self, i: int) -> list[str]:
+        """
+        Returns the SAN moves of game i.
+        """
+
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return [san.decode() for san in self.sans[start:end]]
+
+    def game_clocks(self, i: int) -> np.ndarray:
+        """
+        Returns the clock times of game i in tenths of a second.
+        """
+
+        return self.clocks[self.offsets[i] : self.offsets[i + 1]]
+
+
+class TcnMoves(GameArrays):
+    """
+    The from/to squares and promotions of a list of games
+
+    Decoded from Chess.com's TCN move encoding, which is far cheaper than
+    parsing PGN movetext. Squares are numbered 0-63 from a1 to h8.
+
+    Attributes:
+        from_squares [np.ndarray]: int8 from square of each ply
+        to_squares [np.ndarray]: int8 to square of each ply
+        promotions [np.ndarray]: int8 promotion piece of each ply
+            (0 = none, 1-4 = q, n, r, b)
+        offsets [np.ndarray]: int64 array of length n_games + 1
+    """
+
+    def __init__(
+        self,
+        from_squares: np.ndarray,
+        to_squares: np.ndarray,
+        promotions: np.ndarray,
+        offsets: np.ndarray,
+    ):
+        super().__init__(offsets)
+        self.from_squares = from_squares
+        self.to_squares = to_squares
+        self.promotions = promotions
+
+    @classmethod
+    def from_tcns(cls, tcns: list[str]):
+        """
+        Decodes the TCN strings of a list of games in one batch.
+
+        Args:
+            tcns [list]: a list of TCN strings (None for missing strings)
+
+        Returns:
+            A TcnMoves instance with one game per TCN string
+        """
+
+        return cls(*decode_tcns(tcns))
+
+    def move_codes(self) -> np.ndarray:
+        """
+        Returns an int32 code for every ply: from * 64 + to + promotion * 4096.
+        """
+
+        return (
+            self.from_squares.astype(np.int32) * 64
+            + self.to_squares
+            + self.promotions.astype(np.int32) * 4096
+        )
+
+    def first_n_moves(self, n: int) -> np.ndarray:
+        """
+        Returns the move codes of the first n plies of every game.
+
+        Args:
+            n [int]: the number of plies
+
+        Returns:
+            An (n_games, n) int32 array, padded with -1 for shorter games
+        """
+
+        codes = self.move_codes()
+        plies = self.offsets[:-1, None] + np.arange(n)
+        in_game = plies < self.offsets[1:, None]
+        first_n = np.full((len(self), n), -1, dtype=np.int32)
+        first_n[in_game] = codes[plies[in_game]]
+        return first_n
+
+    def game_moves(self, i: int) -> list[str]:
+        """
+        Returns the UCI moves of game i, e.g. ["e2e4", "e7e5"].
+        """
+
+        codes = self.move_codes()[self.offsets[i] : self.offsets[i + 1]]
+        return move_codes_to_uci(codes).tolist()
@@ -0,0 +1,162 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from helpers.vars import opening_family_words
+
+
+move_token = re.compile(r"^\d")
+
+
+class OpeningDictionary:
+    """
+    Interned opening names with a family hierarchy
+
+    Every opening slug (e.g. "Sicilian-Defense-Old-Sicilian-Variation-3.b3")
+    and each of its prefixes is interned to an integer id. A slug's family
+    is its name up to the first of opening_family_words ("Sicilian-Defense")
+    and its variation is its name up to the first move ("Sicilian-Defense-
+    Old-Sicilian-Variation"). Ancestor arrays map any id to the id of its
+    family and variation, so rolling games up to a level is one array
+    lookup on their codes.
+
+    Attributes:
+        names [list]: the name of each id
+        ids [dict]: ids by name
+        parents [np.ndarray]: int32 id of each id's parent (-1 for families)
+        ancestors [dict]: int32 arrays of the "family", "variation" and
+            "eco" ancestor of each id
+        slug_ids [np.ndarray]: int32 id of each slug passed in
+    """
+
+    levels = ["family", "variation", "eco"]
+
+    def __init__(self, slugs):
+        """
+        Interns a list of slugs and their prefixes.
+
+        Args:
+            slugs [list]: opening slugs, e.g. the categories of the eco column
+        """
+
+        self.names = []
+        self.ids = {}
+        parents = []
+        family_of, variation_of = [], []
+
+        def intern(name, parent, family, variation):
+            if name not in self.ids:
+                self.ids[name] = len(self.names)
+                self.names.append(name)
+                parents.append(parent)
+                family_of.append(self.ids[name] if family is None else family)
+                variation_of.append(self.ids[name] if variation is None else variation)
+            return self.ids[name]
+
+        slug_ids = []
+        for slug in slugs:
+            family, variation = self.split_slug(slug)
+            family_id = intern(family, -1, None, None)
+            variation_id = intern(variation, family_id, family_id, None)
+            slug_ids.append(intern(slug, variation_id, family_id, variation_id))
+
+        self.parents = np.array(parents, dtype=np.int32)
+        self.slug_ids = np.array(slug_ids, dtype=np.int32)
+        self.ancestors = {
+            "family": np.array(family_of, dtype=np.int32),
+            "variation": np.array(variation_of, dtype=np.int32),
+            "eco": np.arange(len(self.names), dtype=np.int32),
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def split_slug(slug: str) -> tuple[str, str]:
+        """
+        Returns the family and variation names of an opening slug.
+
+        E.g. "Sicilian-Defense-Old-Sicilian-Variation-3.b3" ->
+        ("Sicilian-Defense", "Sicilian-Defense-Old-Sicilian-Variation")
+
+        Args:
+            slug [str]: an opening slug
+
+        Returns:
+            A tuple of (family, variation)
+        """
+
+        tokens = slug.split("-")
+        named = len(tokens)
+        for i, token in enumerate(tokens):
+            if move_token.match(token):
+                named = i
+                break
+        # drop joining words left before the moves, e.g. "with" in "...-with-1-e4"
+        while named > 1 and tokens[named - 1].islower():
+            named -= 1
+        family = named
+        for i, token in enumerate(tokens[:named]):
+            if token in opening_family_words:
+                family = i + 1
+                break
+        family_name = "-".join(tokens[:family]) or slug
+        variation_name = "-".join(tokens[:named]) or family_name
+        return family_name, variation_name
+
+    def rollup(self, codes: np.ndarray, level: str) -> pd.Categorical:
+        """
+        Maps slug codes to their ancestors at a hierarchy level.
+
+        Args:
+            codes [np.ndarray]: indices into the slugs passed in (-1 = missing)
+            level [str]: one of levels
+
+        Returns:
+            A categorical of ancestor names with the interned names as
+            categories
+        """
+
+        ids = self.ancestors[level][self.slug_ids[codes]]
+        ids = np.where(codes < 0, -1, ids)
+        return pd.Categorical.from_codes(ids, categories=self.names)
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def from_slugs(slugs: tuple[str, ...]):
+        """
+        Returns the dictionary of a tuple of slugs, cached by the tuple.
+        """
+
+        return OpeningDictionary(slugs)
+
+    @staticmethod
+    def family_column(eco: pd.Series) -> pd.Categorical:
+        return OpeningDictionary.level_column(eco, "family")
+
+    @staticmethod
+    def variation_column(eco: pd.Series) -> pd.Categorical:
+        return OpeningDictionary.level_column(eco, "variation")
+
+    @staticmethod
+    def level_column(eco: pd.Series, level: str) -> pd.Categorical:
+        """
+        Rolls an eco column up to a hierarchy level.
+
+        The dictionary is built from the column's categories, so the cost
+        depends on the number of distinct openings and the games are only
+        touched by one lookup on their category codes.
+
+        Args:
+            eco [pd.Series]: a categorical series of opening slugs
+            level [str]: one of levels
+
+        Returns:
+            A categorical of the opening names at that level
+        """
+
+        eco = eco.astype("category")
+        dictionary = OpeningDictionary.from_slugs(tuple(eco.cat.categories))
+        return dictionary.rollup(eco.cat.codes.to_numpy(), level)
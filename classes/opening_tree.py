@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+from helpers.tcn_helpers import move_codes_to_uci
+
+
+class OpeningTree:
+    """
+    A trie of the opening moves of a user's games
+
+    The tree is built in one pass over the first n plies of every game and
+    stored in flat arrays indexed by node id, with node 0 as the root.
+    Nodes are numbered level by level and, within a level, by parent and
+    then move, so the children of a node are a contiguous range of ids
+    and expanding a node doesn't rescan any games.
+
+    Tallies are kept per node for every combination of the user's colour
+    and time class, so any filter on those is a sum over a small axis.
+
+    Attributes:
+        parents [np.ndarray]: int32 parent node id of each node (-1 for root)
+        moves [np.ndarray]: int32 move code of each node (-1 for root)
+        depths [np.ndarray]: int16 ply depth of each node
+        child_starts [np.ndarray]: int32 first child id of each node
+        child_ends [np.ndarray]: int32 last child id + 1 of each node
+        colours [list]: colour labels of the tallies' colour axis
+        time_classes [list]: time class labels of the tallies' time class axis
+        games [np.ndarray]: int32 game counts, shape (nodes, colours, time classes)
+        wins [np.ndarray]: int32 win counts, same shape as games
+        draws [np.ndarray]: int32 draw counts, same shape as games
+        losses [np.ndarray]: int32 loss counts, same shape as games
+        accuracy_sums [np.ndarray]: float64 sums of known accuracies
+        accuracy_counts [np.ndarray]: int32 counts of known accuracies
+    """
+
+    def __init__(
+        self,
+        first_n_moves: np.ndarray,
+        colours: pd.Categorical,
+        time_classes: pd.Categorical,
+        results: np.ndarray,
+        accuracies: np.ndarray,
+    ):
+        """
+        Builds the tree from per-game arrays.
+
+        Args:
+            first_n_moves [np.ndarray]: (n_games, n) move codes padded with -1,
+                as returned by TcnMoves.first_n_moves
+            colours [pd.Categorical]: the user's colour in each game
+            time_classes [pd.Categorical]: the time class of each game
+            results [np.ndarray]: "win", "draw" or "loss" for each game
+            accuracies [np.ndarray]: the user's accuracy in each game (NaN if unknown)
+        """
+
+        n_games, max_depth = first_n_moves.shape
+        self.colours = list(colours.categories)
+        self.time_classes = list(time_classes.categories)
+        n_splits = len(self.colours) * len(self.time_classes)
+        splits = colours.codes.astype(np.int64) * len(self.time_classes)
+        splits += time_classes.codes
+
+        parents, moves, depths = [np.array([-1])], [np.array([-1])], [np.array([0])]
+        path_nodes, path_games = [np.zeros(n_games, dtype=np.int64)], [
+            np.arange(n_games)
+        ]
+        n_nodes = 1
+        node_of_game = np.zeros(n_games, dtype=np.int64)
+        for depth in range(max_depth):
+            active = (first_n_moves[:, depth] >= 0) & (node_of_game >= 0)
+            if not active.any():
+                break
+            keys = node_of_game[active] * 32768 + first_n_moves[active, depth]
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+            parents.append(unique_keys // 32768)
+            moves.append(unique_keys % 32768)
+            depths.append(np.full(len(unique_keys), depth + 1))
+
+            node_of_game[~active] = -1
+            node_of_game[active] = n_nodes + inverse
+            path_nodes.append(node_of_game[active])
+            path_games.append(np.flatnonzero(active))
+            n_nodes += len(unique_keys)
+
+        self.parents = np.concatenate(parents).astype(np.int32)
+        self.moves = np.concatenate(moves).astype(np.int32)
+        self.depths = np.concatenate(depths).astype(np.int16)
+        node_ids = np.arange(n_nodes)
+        self.child_starts = np.searchsorted(self.parents, node_ids, "left").astype(
+            np.int32
+        )
+        self.child_ends = np.searchsorted(self.parents, node_ids, "right").astype(
+            np.int32
+        )
+
+        nodes = np.concatenate(path_nodes)
+        games = np.concatenate(path_games)
+        bins = nodes * n_splits + splits[games]
+        shape = (n_nodes, len(self.colours), len(self.time_classes))
+        size = n_nodes * n_splits
+
+        def tally(weights=None):
+            return np.bincount(bins, weights=weights, minlength=size).reshape(shape)
+
+        results = np.asarray(results)[games]
+        accuracies = np.asarray(accuracies, dtype=np.float64)[games]
+        known = ~np.isnan(accuracies)
+        self.games = tally().astype(np.int32)
+        self.wins = tally(results == "win").astype(np.int32)
+        self.draws = tally(results == "draw").astype(np.int32)
+        self.losses = tally(results == "loss").astype(np.int32)
+        self.accuracy_sums = tally(np.where(known, accuracies, 0))
+        self.accuracy_counts = tally(known).astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def find_node(self, moves: list[str], node: int = 0) -> int | None:
+        """
+        Returns the id of the node reached by a sequence of UCI moves.
+
+        Args:
+            moves [list]: UCI moves from the starting node, e.g. ["e2e4"]
+            node [int]: the node to start from (the root if 0)
+
+        Returns:
+            The node id, or None if no game followed that sequence
+        """
+
+        for move in moves:
+            start, end = self.child_starts[node], self.child_ends[node]
+            child_moves = move_codes_to_uci(self.moves[start:end])
+            matches = np.flatnonzero(child_moves == move)
+            if len(matches) == 0:
+                return None
+            node = start + matches[0]
+        return int(node)
+
+    def children(
+        self,
+        node: int = 0,
+        colour: str | None = None,
+        time_class: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Returns a df of the stats of each child of a node.
+
+        Only the node's children are read, so the cost depends on the
+        number of children rather than the number of games.
+
+        Args:
+            node [int]: the node id (the root if 0)
+            colour [None/str]: only count games where the user had this colour
+            time_class [None/str]: only count games of this time class
+
+        Returns:
+            Df indexed by UCI move with games, win/draw/loss % and accuracy
+            columns, sorted by games played
+        """
+
+        start, end = self.child_starts[node], self.child_ends[node]
+        colour_axis = slice(None) if colour is None else self.colours.index(colour)
+        time_class_axis = (
+            slice(None) if time_class is None else self.time_classes.index(time_class)
+        )
+
+        def total(tallies):
+            selected = tallies[start:end, colour_axis, time_class_axis]
+            return selected.reshape(end - start, -1).sum(axis=1)
+
+        games = total(self.games)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df = pd.DataFrame(
+                {
+                    "games_played": games,
+                    "win_pc": total(self.wins) / games * 100,
+                    "draw_pc": total(self.draws) / games * 100,
+                    "loss_pc": total(self.losses) / games * 100,
+                    "accuracy": total(self.accuracy_sums) / total(self.accuracy_counts),
+                },
+                index=pd.Index(move_codes_to_uci(self.moves[start:end]), name="move"),
+            )
+        df = df[df["games_played"] > 0].round({"win_pc": 1, "draw_pc": 1, "loss_pc": 1})
+        return df.round({"accuracy": 2}).sort_values(by="games_played", ascending=False)
@@ -0,0 +1,216 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+class OpponentIndex:
+    """
+    Head-to-head aggregates and game rows for each of a user's opponents
+
+    Opponents are dictionary encoded: each name gets an integer id in
+    order of first appearance and every tally is an array indexed by id,
+    so looking up one opponent is a dictionary lookup plus array reads.
+    The rows of each opponent's games are kept as a sorted array. Adding
+    games updates the tallies with unbuffered ufunc.at calls and only
+    touches the row arrays of the opponents in the new games.
+
+    Attributes:
+        names [list]: opponent names by id
+        ids [dict]: opponent names to ids
+        rows [list]: int64 arrays of the row positions of each opponent's games
+        games [np.ndarray]: int64 games per opponent
+        wins [np.ndarray]: int64 wins per opponent
+        draws [np.ndarray]: int64 draws per opponent
+        losses [np.ndarray]: int64 losses per opponent
+        accuracy_sums [np.ndarray]: float64 sums of the user's known accuracies
+        accuracy_counts [np.ndarray]: int64 counts of the user's known accuracies
+        op_accuracy_sums [np.ndarray]: float64 sums of opponents' known accuracies
+        op_accuracy_counts [np.ndarray]: int64 counts of opponents' known
+            accuracies
+        rating_diff_sums [np.ndarray]: int64 sums of rating differentials
+        rating_diff_mins [np.ndarray]: int64 minimum rating differentials
+        rating_diff_maxs [np.ndarray]: int64 maximum rating differentials
+        ranking [None/np.ndarray]: ids by games played, cached by most_played
+    """
+
+    sums = [
+        "games",
+        "wins",
+        "draws",
+        "losses",
+        "accuracy_sums",
+        "accuracy_counts",
+        "op_accuracy_sums",
+        "op_accuracy_counts",
+        "rating_diff_sums",
+    ]
+
+    def __init__(self):
+        """
+        Initialises an empty index.
+        """
+
+        self.names, self.ids, self.rows = [], {}, []
+        for name in self.sums:
+            dtype = np.float64 if name.endswith("accuracy_sums") else np.int64
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.rating_diff_mins = np.zeros(0, dtype=np.int64)
+        self.rating_diff_maxs = np.zeros(0, dtype=np.int64)
+        self.ranking = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def copy(self) -> "OpponentIndex":
+        """
+        Returns a copy of the index that can be extended independently.
+
+        add_games replaces the tally and row arrays rather than writing to
+        them, so the arrays are shared and only the containers are copied.
+        """
+
+        other = copy.copy(self)
+        other.names, other.ids, other.rows = (
+            list(self.names),
+            dict(self.ids),
+            list(self.rows),
+        )
+        return other
+
+    def add_games(
+        self, opponents, results, accuracies, op_accuracies, rating_diffs, rows
+    ) -> None:
+        """
+        Adds games to the index.
+
+        Args:
+            opponents [ArrayLike]: the opponent's name in each game
+            results [ArrayLike]: "win", "draw" or "loss" for each game
+            accuracies [ArrayLike]: the user's accuracy (NaN if unknown)
+            op_accuracies [ArrayLike]: the opponent's accuracy (NaN if unknown)
+            rating_diffs [ArrayLike]: the rating differential of each game
+            rows [ArrayLike]: the row position of each game
+        """
+
+        uniques = pd.unique(np.asarray(opponents, dtype=object))
+        for name in uniques:
+            if name not in self.ids:
+                self.ids[name] = len(self.names)
+                self.names.append(name)
+                self.rows.append(np.zeros(0, dtype=np.int64))
+        unique_ids = np.array([self.ids[name] for name in uniques], dtype=np.int64)
+        codes = unique_ids[pd.Categorical(opponents, categories=uniques).codes]
+
+        n = len(self.names)
+        for name in [*self.sums, "rating_diff_mins", "rating_diff_maxs"]:
+            values = getattr(self, name)
+            fill = {"rating_diff_mins": np.iinfo(np.int64).max}.get(name, 0)
+            fill = {"rating_diff_maxs": np.iinfo(np.int64).min}.get(name, fill)
+            padding = np.full(n - len(values), fill, dtype=values.dtype)
+            setattr(self, name, np.concatenate((values, padding)))
+
+        results = np.asarray(results)
+        accuracies = np.asarray(accuracies, dtype="float64")
+        op_accuracies = np.asarray(op_accuracies, dtype="float64")
+        rating_diffs = np.asarray(rating_diffs, dtype=np.int64)
+        np.add.at(self.games, codes, 1)
+        np.add.at(self.wins, codes, results == "win")
+        np.add.at(self.draws, codes, results == "draw")
+        np.add.at(self.losses, codes, results == "loss")
+        np.add.at(self.accuracy_sums, codes, np.nan_to_num(accuracies))
+        np.add.at(self.accuracy_counts, codes, ~np.isnan(accuracies))
+        np.add.at(self.op_accuracy_sums, codes, np.nan_to_num(op_accuracies))
+        np.add.at(self.op_accuracy_counts, codes, ~np.isnan(op_accuracies))
+        np.add.at(self.rating_diff_sums, codes, rating_diffs)
+        np.minimum.at(self.rating_diff_mins, codes, rating_diffs)
+        np.maximum.at(self.rating_diff_maxs, codes, rating_diffs)
+
+        if len(codes):
+            order = np.argsort(codes, kind="stable")
+            sorted_codes = codes[order]
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+            rows = np.asarray(rows, dtype=np.int64)[order]
+            for code, opponent_rows in zip(
+                sorted_codes[starts], np.split(rows, starts[1:])
+            ):
+                self.rows[code] = np.union1d(self.rows[code], opponent_rows)
+        self.ranking = None
+
+    def stats(self, ids) -> pd.DataFrame:
+        """
+        Returns the head-to-head aggregates of opponents.
+
+        Args:
+            ids [ArrayLike]: opponent ids
+
+        Returns:
+            A df indexed by opponent name with games_played, win_pc,
+            draw_pc, loss_pc, accuracy, op_accuracy and rating_diff_mean,
+            rating_diff_min and rating_diff_max columns
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        games = self.games[ids]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame(
+                {
+                    "games_played": games,
+                    "win_pc": (self.wins[ids] / games * 100).round(1),
+                    "draw_pc": (self.draws[ids] / games * 100).round(1),
+                    "loss_pc": (self.losses[ids] / games * 100).round(1),
+                    "accuracy": (
+                        self.accuracy_sums[ids] / self.accuracy_counts[ids]
+                    ).round(2),
+                    "op_accuracy": (
+                        self.op_accuracy_sums[ids] / self.op_accuracy_counts[ids]
+                    ).round(2),
+                    "rating_diff_mean": (self.rating_diff_sums[ids] / games).round(1),
+                    "rating_diff_min": self.rating_diff_mins[ids],
+                    "rating_diff_max": self.rating_diff_maxs[ids],
+                },
+                index=pd.Index([self.names[i] for i in ids], name="opponent"),
+            )
+
+    def lookup(self, opponent: str) -> pd.Series | None:
+        """
+        Returns the head-to-head aggregates against one opponent.
+
+        Args:
+            opponent [str]: the opponent's name
+
+        Returns:
+            A series of the aggregates (see stats), or None if the user
+            hasn't played the opponent
+        """
+
+        if opponent not in self.ids:
+            return None
+        return self.stats([self.ids[opponent]]).iloc[0]
+
+    def opponent_rows(self, opponent: str) -> np.ndarray:
+        """
+        Returns the sorted row positions of the games against an opponent.
+        """
+
+        if opponent not in self.ids:
+            return np.zeros(0, dtype=np.int64)
+        return self.rows[self.ids[opponent]]
+
+    def most_played(self, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the aggregates of the k most played opponents.
+
+        The ranking is sorted once after games are added, so each read
+        only builds the k rows.
+
+        Args:
+            k [int]: the number of opponents
+
+        Returns:
+            A df of aggregates (see stats) sorted by games played
+        """
+
+        if self.ranking is None:
+            self.ranking = np.argsort(-self.games, kind="stable")
+        return self.stats(self.ranking[:k])
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+from classes.game_moves import TcnMoves
+from helpers.position_helpers import replay_positions, fen_to_hash
+
+
+class PositionIndex:
+    """
+    An index of every position reached in a user's games
+
+    Every game is replayed and each position is hashed with Zobrist keys.
+    The index stores one posting per position reached: its hash, the game
+    and the ply, in flat arrays sorted by (hash, game), so finding every
+    occurrence of a position is a binary search. Games are numbered in
+    the order they were added and new games are merged into the sorted
+    arrays without rebuilding the index.
+
+    Attributes:
+        hashes [np.ndarray]: sorted uint64 position hashes, one per posting
+        games [np.ndarray]: int32 game number of each posting
+        plies [np.ndarray]: int16 ply of each posting (0 = starting position)
+        uuids [np.ndarray]: uuid of each game number
+        colours [np.ndarray]: int8 index into colour_labels of each game
+        results [np.ndarray]: int8 index into result_labels of each game
+    """
+
+    colour_labels = ["white", "black"]
+    result_labels = ["win", "draw", "loss"]
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.games = np.empty(0, dtype=np.int32)
+        self.plies = np.empty(0, dtype=np.int16)
+        self.uuids = np.empty(0, dtype=object)
+        self.colours = np.empty(0, dtype=np.int8)
+        self.results = np.empty(0, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def add_games(
+        self,
+        tcns: list[str],
+        initial_fens: list[str],
+        uuids: list[str],
+        colours: list[str],
+        results: list[str],
+    ) -> None:
+        """
+        Replays a batch of games and merges their positions into the index.
+
+        The new postings are sorted on their own and then merged into the
+        existing arrays, so adding a month of games costs a pass over the
+        index rather than a re-sort of every posting.
+
+        Args:
+            tcns [list]: the TCN move string of each game
+            initial_fens [list]: the starting FEN of each game ("" if standard)
+            uuids [list]: the uuid of each game
+            colours [list]: the user's colour in each game
+            results [list]: the user's result in each game ("win"/"draw"/"loss")
+        """
+
+        tcn_moves = TcnMoves.from_tcns(tcns)
+        hashes = replay_positions(tcn_moves, initial_fens)
+        position_counts = tcn_moves.ply_counts() + 1
+        games = np.repeat(np.arange(len(tcn_moves)), position_counts)
+        starts = np.repeat(
+            np.cumsum(position_counts) - position_counts, position_counts
+        )
+        plies = np.arange(len(hashes)) - starts
+        games += len(self.uuids)
+
+        order = np.lexsort((games, hashes))
+        hashes = hashes[order]
+        positions = np.searchsorted(self.hashes, hashes, "right")
+        self.hashes = np.insert(self.hashes, positions, hashes)
+        self.games = np.insert(self.games, positions, games[order].astype(np.int32))
+        self.plies = np.insert(self.plies, positions, plies[order].astype(np.int16))
+
+        self.uuids = np.concatenate([self.uuids, np.asarray(uuids, dtype=object)])
+        self.colours = np.concatenate(
+            [self.colours, pd.Categorical(colours, self.colour_labels).codes]
+        ).astype(np.int8)
+        self.results = np.concatenate(
+            [self.results, pd.Categorical(results, self.result_labels).codes]
+        ).astype(np.int8)
+
+    def lookup(self, position_hash) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns every occurrence of a position.
+
+        Args:
+            position_hash [np.uint64]: a Zobrist hash, e.g. from fen_to_hash
+
+        Returns:
+            A tuple of arrays (game numbers, plies), sorted by game
+        """
+
+        position_hash = np.uint64(position_hash)
+        start = np.searchsorted(self.hashes, position_hash, "left")
+        end = np.searchsorted(self.hashes, position_hash, "right")
+        return self.games[start:end], self.plies[start:end]
+
+    def result_stats(self, games: np.ndarray) -> pd.DataFrame:
+        """
+        Returns the user's results in a set of games per colour.
+
+        Args:
+            games [np.ndarray]: distinct game numbers
+
+        Returns:
+            Df indexed by colour with games_played and win/draw/loss % columns
+        """
+
+        counts = np.zeros((len(self.colour_labels), len(self.result_labels)))
+        np.add.at(counts, (self.colours[games], self.results[games]), 1)
+        games_played = counts.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pcs = (counts / games_played[:, None] * 100).round(1)
+        df = pd.DataFrame(
+            pcs,
+            columns=[f"{result}_pc" for result in self.result_labels],
+            index=pd.Index(self.colour_labels, name="colour"),
+        )
+        df.insert(0, "games_played", games_played.astype(int))
+        return df[df["games_played"] > 0]
+
+    def position_stats(self, fen: str) -> pd.DataFrame:
+        """
+        Returns how the user scores from a position, per colour.
+
+        A game counts once however many times the position occurs in it.
+
+        Args:
+            fen [str]: a FEN string; the en passant square and move counters
+                are ignored
+
+        Returns:
+            Df indexed by colour with games_played and win/draw/loss % columns
+        """
+
+        games, _ = self.lookup(fen_to_hash(fen))
+        return self.result_stats(np.unique(games))
+
+    def common_positions(self, min_ply: int = 0, n: int = 10) -> pd.DataFrame:
+        """
+        Returns the positions reached in the most games.
+
+        Args:
+            min_ply [int]: ignore positions reached before this ply
+            n [int]: the number of positions to return
+
+        Returns:
+            Df of the n positions with hash, games_played, win/draw/loss %
+            across both colours and the uuid and ply of the first game in
+            which each position occurs
+        """
+
+        keep = self.plies >= min_ply
+        hashes, games, plies = self.hashes[keep], self.games[keep], self.plies[keep]
+        if len(hashes) == 0:
+            return pd.DataFrame()
+
+        # postings are sorted by (hash, game), so each distinct pair starts a run
+        first = np.ones(len(hashes), dtype=bool)
+        first[1:] = (hashes[1:] != hashes[:-1]) | (games[1:] != games[:-1])
+        hashes, games, plies = hashes[first], games[first], plies[first]
+        starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        counts = np.diff(np.r_[starts, len(hashes)])
+
+        rows = []
+        for position in np.argsort(-counts, kind="stable")[:n]:
+            start = starts[position]
+            position_games = games[start : start + counts[position]]
+            rows.append(
+                {
+                    "hash": f"{hashes[start]:016x}",
+                    "games_played": int(counts[position]),
+                    **{
+                        f"{result}_pc": round(
+                            (self.results[position_games] == i).mean() * 100, 1
+                        )
+                        for i, result in enumerate(self.result_labels)
+                    },
+                    "uuid": self.uuids[games[start]],
+                    "ply": int(plies[start]),
+                }
+            )
+        return pd.DataFrame(rows)
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+
+class RollingStats:
+    """
+    Cumulative sums over a time-sorted run of games, for rolling windows
+
+    Every statistic is kept as a cumulative sum with a leading zero, so
+    the total over any window of games lo..i is cum[i + 1] - cum[lo] and
+    rolling statistics for every game are a few vectorised subtractions.
+    Windows of the last n days are located with one binary search over
+    the end times. Adding games extends the sums from their last values,
+    so the cost of an update is proportional to the number of new games.
+
+    Attributes:
+        times [np.ndarray]: int64 end times (ns since the epoch), sorted
+        ratings [np.ndarray]: int64 user's rating after each game
+        cum_wins [np.ndarray]: int64 cumulative wins
+        cum_points [np.ndarray]: float64 cumulative points (1 per win,
+            0.5 per draw)
+        cum_accuracy_sums [np.ndarray]: float64 cumulative known accuracies
+        cum_accuracy_counts [np.ndarray]: int64 cumulative count of known
+            accuracies
+    """
+
+    def __init__(self):
+        """
+        Initialises empty sums.
+        """
+
+        self.times = np.zeros(0, dtype=np.int64)
+        self.ratings = np.zeros(0, dtype=np.int64)
+        self.cum_wins = np.zeros(1, dtype=np.int64)
+        self.cum_points = np.zeros(1, dtype=np.float64)
+        self.cum_accuracy_sums = np.zeros(1, dtype=np.float64)
+        self.cum_accuracy_counts = np.zeros(1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @staticmethod
+    def extend(cum: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Returns a cumulative sum extended by the cumulative sum of values.
+        """
+
+        return np.concatenate((cum, cum[-1] + np.cumsum(values, dtype=cum.dtype)))
+
+    def add_games(self, times, results, accuracies, ratings) -> None:
+        """
+        Appends games that ended no earlier than the games already added.
+
+        Args:
+            times [pd.DatetimeIndex]: the games' end times, sorted
+            results [ArrayLike]: "win", "draw" or "loss" for each game
+            accuracies [ArrayLike]: the user's accuracy (NaN if unknown)
+            ratings [ArrayLike]: the user's rating after each game
+        """
+
+        results = np.asarray(results)
+        accuracies = np.asarray(accuracies, dtype="float64")
+        known = ~np.isnan(accuracies)
+        self.times = np.concatenate((self.times, times.asi8))
+        self.ratings = np.concatenate((self.ratings, np.asarray(ratings, np.int64)))
+        self.cum_wins = self.extend(self.cum_wins, results == "win")
+        self.cum_points = self.extend(
+            self.cum_points, (results == "win") + (results == "draw") * 0.5
+        )
+        self.cum_accuracy_sums = self.extend(
+            self.cum_accuracy_sums, np.where(known, accuracies, 0.0)
+        )
+        self.cum_accuracy_counts = self.extend(self.cum_accuracy_counts, known)
+
+    def window_starts(self, games: int | None = None, days: float | None = None):
+        """
+        Returns the first position of the window ending at each game.
+
+        Args:
+            games [None/int]: windows of the last n games
+            days [None/float]: windows of the games in the last n days,
+                i.e. ending no more than n days before the game
+
+        Returns:
+            An int64 array of window starts, one per game
+        """
+
+        ends = np.arange(len(self.times))
+        if games is not None:
+            return np.maximum(ends - games + 1, 0)
+        if days is not None:
+            span = int(pd.Timedelta(days=days).value)
+            return np.searchsorted(self.times, self.times - span, side="right")
+        raise ValueError("Pass the number of games or days in a window")
+
+    def compute(
+        self, games: int | None = None, days: float | None = None
+    ) -> pd.DataFrame:
+        """
+        Returns rolling statistics of the window ending at each game.
+
+        Rating change is the rating after the game minus the rating
+        before the window's first game (the first game's rating if the
+        window starts at the first game).
+
+        Args:
+            games [None/int]: windows of the last n games
+            days [None/float]: windows of the games in the last n days
+
+        Returns:
+            A df indexed by end_time with games, win_pc, score_pc,
+            accuracy and rating_change columns
+        """
+
+        starts = self.window_starts(games, days)
+        ends = np.arange(1, len(self.times) + 1)
+        n = ends - starts
+        accuracy_counts = (
+            self.cum_accuracy_counts[ends] - self.cum_accuracy_counts[starts]
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            accuracy = (
+                self.cum_accuracy_sums[ends] - self.cum_accuracy_sums[starts]
+            ) / accuracy_counts
+        before = self.ratings[np.maximum(starts - 1, 0)]
+        return pd.DataFrame(
+            {
+                "games": n,
+                "win_pc": (
+                    (self.cum_wins[ends] - self.cum_wins[starts]) / n * 100
+                ).round(1),
+                "score_pc": (
+                    (self.cum_points[ends] - self.cum_points[starts]) / n * 100
+                ).round(1),
+                "accuracy": accuracy.round(2),
+                "rating_change": self.ratings - before,
+            },
+            index=pd.DatetimeIndex(self.times, tz="UTC", name="end_time"),
+        )
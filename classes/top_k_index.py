@@ -0,0 +1,95 @@
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+
+
+class TopKIndex:
+    """
+    Rows of a game history kept sorted by one column, for top-k reads
+
+    Rows are partitioned by whether the game was rated and by its time
+    class, and each partition keeps its rows' values in ascending order.
+    The top k rows for any combination of partitions are read by merging
+    the first k entries of each partition with a heap, so a read costs
+    O(k log partitions) however many games are indexed. Rows with a NaN
+    value aren't indexed.
+
+    Attributes:
+        partitions [dict]: (rated, time_class) keys to tuples of a float64
+            array of sorted values and an int64 array of their rows
+    """
+
+    def __init__(self):
+        """
+        Initialises an empty index.
+        """
+
+        self.partitions = {}
+
+    def add(self, values, rows, rated, time_classes) -> None:
+        """
+        Adds rows to the index.
+
+        Each partition's new rows are sorted and merged into the existing
+        sorted arrays with a binary search, so ingesting new games doesn't
+        re-sort the index.
+
+        Args:
+            values [ArrayLike]: the column's value for each row
+            rows [ArrayLike]: the row positions to index
+            rated [ArrayLike]: whether each row's game was rated
+            time_classes [ArrayLike]: the time class of each row's game
+        """
+
+        values = np.asarray(values, dtype="float64")
+        rows = np.asarray(rows, dtype=np.int64)
+        rated = np.asarray(rated, dtype=bool)
+        time_classes = np.asarray(time_classes, dtype=object)
+        known = ~np.isnan(values)
+
+        for key in set(zip(rated[known].tolist(), time_classes[known].tolist())):
+            selected = known & (rated == key[0]) & (time_classes == key[1])
+            order = np.argsort(values[selected], kind="stable")
+            new_values, new_rows = values[selected][order], rows[selected][order]
+            if key in self.partitions:
+                old_values, old_rows = self.partitions[key]
+                positions = np.searchsorted(old_values, new_values, side="right")
+                new_values = np.insert(old_values, positions, new_values)
+                new_rows = np.insert(old_rows, positions, new_rows)
+            self.partitions[key] = (new_values, new_rows)
+
+    def top(
+        self,
+        k: int,
+        ascending: bool = False,
+        rated: bool | None = None,
+        time_classes: list[str] | None = None,
+    ) -> np.ndarray:
+        """
+        Returns the rows with the k highest (or lowest) values.
+
+        Args:
+            k [int]: the number of rows
+            ascending [bool]: if True, the rows with the lowest values
+            rated [None/bool]: only rated (True) or unrated (False) games
+            time_classes [None/list]: only games of these time classes
+
+        Returns:
+            An int64 array of at most k rows, best first
+        """
+
+        runs = []
+        for (is_rated, time_class), (values, rows) in self.partitions.items():
+            if rated is not None and is_rated != rated:
+                continue
+            if time_classes is not None and time_class not in time_classes:
+                continue
+            if ascending:
+                runs.append(zip(values[:k].tolist(), rows[:k].tolist()))
+            else:
+                runs.append(zip(values[::-1][:k].tolist(), rows[::-1][:k].tolist()))
+
+        merged = heapq.merge(*runs, key=itemgetter(0), reverse=not ascending)
+        return np.array([row for _, row in islice(merged, k)], dtype=np.int64)
@@ -0,0 +1,156 @@
+from functools import lru_cache
+from typing import TypedDict
+
+import msgspec
+from msgspec import UNSET, UnsetType
+from msgspec.structs import asdict
+
+from helpers.loggers import data_logger
+from helpers.vars import required_game_archive_keys
+
+
+class Player(TypedDict):
+    username: str
+    rating: int
+    result: str
+
+
+class Accuracies(TypedDict, total=False):
+    white: float
+    black: float
+
+
+# the type of each game archive field that can be decoded
+game_field_types = {
+    "url": str,
+    "uuid": str,
+    "end_time": int,
+    "start_time": int,
+    "time_class": str,
+    "time_control": str,
+    "rated": bool,
+    "rules": str,
+    "white": Player,
+    "black": Player,
+    "eco": str,
+    "accuracies": Accuracies,
+    "pgn": str,
+    "tcn": str,
+    "fen": str,
+    "initial_setup": str,
+}
+
+
+@lru_cache
+def game_struct(fields: frozenset[str]) -> type[msgspec.Struct]:
+    """
+    Returns the schema of a game in a monthly archive, decoding only some fields.
+
+    The Struct declares the requested fields with their types. Keys in
+    required_game_archive_keys that weren't requested are declared as
+    msgspec.Raw, so their presence is validated without decoding their
+    values, and any other key is skipped by the parser. Structs are cached
+    per set of fields.
+
+    Args:
+        - fields [frozenset]: the game fields to decode, keys of game_field_types
+
+    Returns:
+        - A msgspec.Struct type
+    """
+
+    struct_fields = []
+    for field in sorted(fields | required_game_archive_keys):
+        field_type = game_field_types[field] if field in fields else msgspec.Raw
+        if field in required_game_archive_keys:
+            struct_fields.append((field, field_type))
+        else:
+            struct_fields.append((field, field_type | UnsetType, UNSET))
+    return msgspec.defstruct("Game", struct_fields, kw_only=True, gc=False)
+
+
+@lru_cache
+def archive_decoder(fields: frozenset[str]) -> msgspec.json.Decoder:
+    """
+    Returns a JSON decoder for monthly archives that decodes only some fields.
+
+    Args:
+        - fields [frozenset]: the game fields to decode, keys of game_field_types
+
+    Returns:
+        - A msgspec.json.Decoder of an archive Struct with a games attribute
+            (a list of game_struct(fields))
+    """
+
+    archive = msgspec.defstruct("Archive", [("games", list[game_struct(fields)])])
+    return msgspec.json.Decoder(archive)
+
+
+@lru_cache
+def game_decoder(fields: frozenset[str]) -> msgspec.json.Decoder:
+    """
+    Returns a JSON decoder for a single game that decodes only some fields.
+    """
+
+    return msgspec.json.Decoder(game_struct(fields))
+
+
+# decodes the games of an archive as raw JSON, to decode them one at a time
+raw_archive_decoder = msgspec.json.Decoder(
+    msgspec.defstruct("RawArchive", [("games", list[msgspec.Raw])])
+)
+
+
+def decode_archive(content: bytes, fields: set[str] | None = None) -> list[dict]:
+    """
+    Returns the games of a monthly archive response body.
+
+    Decodes the body against the game schema rather than as generic JSON,
+    so only the requested fields are allocated. Games are returned as
+    plain dicts, as with response.json(), holding the requested fields
+    that were present.
+
+    The whole archive is decoded in one pass. If any game doesn't match
+    the schema (e.g. it lacks a required key), the games are decoded one
+    at a time instead and only the games that don't match are skipped
+    and logged, so one bad game doesn't lose the rest of the month.
+
+    Args:
+        - content [bytes]: the JSON body of a monthly archive response
+        - fields [None/set]: the game fields to decode (all of
+            game_field_types if None)
+
+    Returns:
+        - A list of game dicts
+
+    Raises:
+        - msgspec.DecodeError: if the body isn't a valid JSON archive
+    """
+
+    fields = frozenset(game_field_types if fields is None else fields)
+    unrequested = required_game_archive_keys - fields
+    optional = fields - required_game_archive_keys
+
+    try:
+        decoded = archive_decoder(fields).decode(content).games
+    except msgspec.ValidationError:
+        decoded = []
+        decoder = game_decoder(fields)
+        for i, raw_game in enumerate(raw_archive_decoder.decode(content).games):
+            try:
+                decoded.append(decoder.decode(raw_game))
+            except msgspec.ValidationError as e:
+                data_logger.error(
+                    f"Error in decode_archive: {str(e)}, skipped game {i}"
+                )
+
+    games = []
+    for game in decoded:
+        game = asdict(game)
+        for key in unrequested:
+            del game[key]
+        for key in optional:
+            if game[key] is UNSET:
+                del game[key]
+        games.append(game)
+    return games
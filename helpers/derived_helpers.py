@@ -0,0 +1,142 @@
+from functools import partial
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from helpers.pgn_helpers import parse_time_controls
+
+
+class DerivedColumn(NamedTuple):
+    """
+    A per-game column computed from other columns
+
+    Attributes:
+        inputs [tuple]: the names of the columns passed to compute, in order.
+            These can be columns of game_history_df, its end_time index,
+            other derived columns, raw game fields (e.g. "tcn") or
+            pgn_headers_input for the parsed PGN headers of every game
+        compute [Callable]: a vectorised function of the input columns
+            returning one value per game
+    """
+
+    inputs: tuple[str, ...]
+    compute: Callable
+
+
+pgn_headers_input = "pgn_headers"
+
+weekday_names = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+def per_category(values: pd.Series, func: Callable) -> np.ndarray:
+    """
+    Applies a vectorised function to the categories of a categorical series.
+
+    The function runs once per distinct value rather than once per game
+    and the results are gathered by category code. Missing values give NaN.
+
+    Args:
+        - values [pd.Series]: a categorical series
+        - func [Callable]: maps a series of categories to an array of results
+
+    Returns:
+        - A float array with one result per value
+    """
+
+    categorical = values.astype("category").array
+    results = np.append(
+        np.asarray(func(pd.Series(categorical.categories)), dtype=np.float64), np.nan
+    )
+    return results[categorical.codes]
+
+
+def base_times(time_controls: pd.Series) -> np.ndarray:
+    return per_category(time_controls, lambda x: parse_time_controls(x)[0])
+
+
+def increments(time_controls: pd.Series) -> np.ndarray:
+    return per_category(time_controls, lambda x: parse_time_controls(x)[1])
+
+
+def ply_counts(tcns: list[str]) -> np.ndarray:
+    return np.fromiter((len(tcn or "") // 2 for tcn in tcns), np.int16, len(tcns))
+
+
+def pgn_header_values(header: str, headers: pd.DataFrame) -> pd.Series | np.ndarray:
+    """
+    Returns the value of one PGN header for each game.
+
+    Reads the header from the parsed PGN headers of every game (see
+    ChessUser.get_pgn_headers), so the PGNs are only parsed once however
+    many header columns are used. Games without the header give None, or
+    NaN for the numeric Elo headers.
+
+    Args:
+        - header [str]: a PGN header name, e.g. "Termination"
+        - headers [pd.DataFrame]: one column of values per header name
+
+    Returns:
+        - A series of header values (a float array for Elo headers)
+    """
+
+    if header in headers:
+        values = headers[header]
+    else:
+        values = pd.Series(None, index=headers.index, dtype=object)
+    if header.endswith("Elo"):
+        return pd.to_numeric(values.astype(object), errors="coerce").to_numpy()
+    return values
+
+
+def pgn_header_column(header: str) -> DerivedColumn:
+    """
+    Returns a DerivedColumn reading a PGN header from the parsed headers.
+    """
+
+    return DerivedColumn((pgn_headers_input,), partial(pgn_header_values, header))
+
+
+def game_dates(end_times: pd.Series) -> pd.Series:
+    return end_times.dt.normalize()
+
+
+def weekdays(end_times: pd.Series) -> pd.Categorical:
+    return pd.Categorical(
+        end_times.dt.day_name(), categories=weekday_names, ordered=True
+    )
+
+
+def hours(end_times: pd.Series) -> np.ndarray:
+    return end_times.dt.hour.to_numpy(dtype=np.int8)
+
+
+derived_column_registry = {
+    "base_time": DerivedColumn(("time_control",), base_times),
+    "increment": DerivedColumn(("time_control",), increments),
+    "ply_count": DerivedColumn(("tcn",), ply_counts),
+    "game_date": DerivedColumn(("end_time",), game_dates),
+    "weekday": DerivedColumn(("end_time",), weekdays),
+    "hour": DerivedColumn(("end_time",), hours),
+}
+
+
+pgn_header_columns = {
+    "termination": "Termination",
+    "start_clock": "StartTime",
+    "end_date": "EndDate",
+    "white_elo": "WhiteElo",
+    "black_elo": "BlackElo",
+}
+
+derived_column_registry.update(
+    {name: pgn_header_column(header) for name, header in pgn_header_columns.items()}
+)
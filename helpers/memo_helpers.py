@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+
+from helpers.vars import result_cache_size
+
+
+result_cache = OrderedDict()
+result_cache_lock = threading.Lock()
+
+
+def freeze(value):
+    """
+    Returns a hashable equivalent of a query argument.
+
+    Dicts become sorted tuples of items, lists and tuples become tuples and
+    sets become frozensets, recursively. Other values are returned as is.
+
+    Args:
+        - value: an argument, e.g. a dict of filters
+
+    Returns:
+        - A hashable value (unless value contains an unhashable type)
+    """
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def memoize_result(version: Callable, latest_only: bool = False) -> Callable:
+    """
+    Decorates a ChessUser method to cache its results in result_cache.
+
+    Results are keyed by username, method name, arguments and the data
+    version returned by version(self), so they're shared by every instance
+    for the same user (i.e. across sessions) and a change to the data
+    misses the cache instead of returning a stale result. Usernames are
+    lowercased, like the store paths, as wrangle_games matches them
+    case-insensitively: case variants of a username wrangle the same
+    history and may share results. The cache holds at most
+    result_cache_size results, evicting the least recently used. Cached
+    results are shared, so callers mustn't modify them in place.
+
+    With latest_only, storing a result drops the results of the same method
+    for other versions of the user's data. It's meant for large structures
+    built from the whole history (e.g. indexes), which are only worth
+    keeping for the current version.
+
+    The decorated method has cached(self, *args) and cache(self, result,
+    *args) attributes to look up a result without computing it and to
+    store a result computed elsewhere, e.g. an index extended with new
+    games under the new version.
+
+    Args:
+        - version [Callable]: a function of the instance returning a hashable
+            version of the data the method reads
+        - latest_only [bool]: whether to keep only the latest version's
+            results of the method for each user
+
+    Returns:
+        - A decorator
+    """
+
+    def decorator(method: Callable) -> Callable:
+        def make_key(self, args, kwargs):
+            key = (
+                self.username.lower(),
+                method.__name__,
+                version(self),
+                freeze(args),
+                freeze(kwargs),
+            )
+            hash(key)
+            return key
+
+        def store(key, result):
+            with result_cache_lock:
+                if latest_only:
+                    for stale in [k for k in result_cache if k[:2] == key[:2]]:
+                        if stale[2] != key[2]:
+                            del result_cache[stale]
+                result_cache[key] = result
+                while len(result_cache) > result_cache_size:
+                    result_cache.popitem(last=False)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                key = make_key(self, args, kwargs)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            with result_cache_lock:
+                if key in result_cache:
+                    result_cache.move_to_end(key)
+                    return result_cache[key]
+            result = method(self, *args, **kwargs)
+            store(key, result)
+            return result
+
+        def cached(self, *args, **kwargs):
+            """
+            Returns the cached result of a call, or None if it isn't cached.
+            """
+
+            with result_cache_lock:
+                return result_cache.get(make_key(self, args, kwargs))
+
+        def cache(self, result, *args, **kwargs):
+            """
+            Caches result as the result of a call for the current version.
+            """
+
+            store(make_key(self, args, kwargs), result)
+
+        wrapper.cached = cached
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def clear_result_cache() -> None:
+    """
+    Empties result_cache.
+    """
+
+    with result_cache_lock:
+        result_cache.clear()
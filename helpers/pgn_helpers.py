@@ -0,0 +1,131 @@
+import re
+
+import pandas as pd
+
+
+camel_case_boundary = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def parse_pgn_headers(pgn: str) -> dict:
+    """
+    Returns a dictionary of the tag pairs in the header block of a PGN.
+
+    Only the header block is scanned: the function stops at the first
+    blank line, which separates the tag pairs from the movetext, so the
+    cost is independent of the length of the game.
+
+    Args:
+        - pgn [str]: a PGN string as returned by the Chess.com API
+
+    Returns:
+        - A dictionary of header names (e.g. "Termination") to string values
+    """
+
+    end = pgn.find("\n\n")
+    header_block = pgn if end == -1 else pgn[:end]
+
+    headers = {}
+    for line in header_block.split("\n"):
+        if line.startswith("[") and line.endswith('"]'):
+            key, _, value = line[1:-2].partition(' "')
+            headers[key] = value.replace('\\"', '"')
+    return headers
+
+
+def extract_pgn_headers(pgns: list[str]) -> dict[str, list]:
+    """
+    Returns the headers of a list of PGNs as a dictionary of columns.
+
+    Parses the header block of every PGN in a single pass and pivots the
+    results into one list per header name. Games that lack a given header
+    have None in that position, so every list has the same length as pgns.
+
+    Args:
+        - pgns [list]: a list of PGN strings
+
+    Returns:
+        - A dictionary of header names to lists of header values
+    """
+
+    columns = {}
+    for i, pgn in enumerate(pgns):
+        for key, value in parse_pgn_headers(pgn or "").items():
+            if key not in columns:
+                columns[key] = [None] * len(pgns)
+            columns[key][i] = value
+    return columns
+
+
+def header_to_column_name(header: str) -> str:
+    """
+    Converts a PGN header name to a snake case column name.
+
+    E.g. "WhiteElo" -> "white_elo", "ECOUrl" -> "eco_url", "UTCDate" -> "utc_date"
+
+    Args:
+        - header [str]: a PGN header name
+
+    Returns:
+        - A snake case string
+    """
+
+    return camel_case_boundary.sub("_", header).lower()
+
+
+san_and_clock = re.compile(
+    r"((?:[KQRBN][a-h]?[1-8]?x?[a-h][1-8]|[a-h](?:x[a-h])?[1-8](?:=[QRBN])?"
+    r"|O-O(?:-O)?)[+#]?)"
+    r"(?:\s*\{[^}]*?\[%clk (\d+):(\d+):(\d+(?:\.\d+)?)\][^}]*\})?"
+)
+
+
+def parse_pgn_moves(pgn: str) -> tuple[list[str], list[int]]:
+    """
+    Returns the SAN moves and clock times from the movetext of a PGN.
+
+    Clock times are read from Chess.com's {[%clk h:mm:ss.s]} annotations
+    and converted to tenths of a second. Moves without a clock annotation
+    have a clock time of -1.
+
+    Args:
+        - pgn [str]: a PGN string as returned by the Chess.com API
+
+    Returns:
+        - A tuple of a list of SAN strings and a list of clock times
+    """
+
+    start = pgn.find("\n\n")
+    movetext = pgn if start == -1 else pgn[start + 2 :]
+
+    sans, clocks = [], []
+    for san, hours, minutes, seconds in san_and_clock.findall(movetext):
+        sans.append(san)
+        if hours:
+            clocks.append(
+                round((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 10)
+            )
+        else:
+            clocks.append(-1)
+    return sans, clocks
+
+
+def parse_time_controls(time_controls) -> tuple:
+    """
+    Returns the base time and increment in seconds of each time control.
+
+    Live time controls look like "180+2" or "600". Daily time controls
+    ("1/86400") are per move rather than per game, so they have NaN base
+    and increment.
+
+    Args:
+        - time_controls [pd.Series]: a series of time control strings
+
+    Returns:
+        - A tuple of float arrays (base times, increments)
+    """
+
+    parts = time_controls.astype(str).str.extract(r"^(\d+)(?:\+(\d+))?$")
+    base = parts[0].astype(float).to_numpy()
+    increment = parts[1].astype(float).fillna(0).to_numpy()
+    increment[pd.isna(base)] = float("nan")
+    return base, increment
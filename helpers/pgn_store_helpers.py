@@ -0,0 +1,211 @@
+import io
+import os
+import zlib
+from functools import lru_cache
+from uuid import uuid4
+
+import numpy as np
+
+from helpers.loggers import data_logger
+from helpers.vars import pgn_store_path, pgn_block_size
+
+
+def pgn_store_dir(username: str, store_path: str = pgn_store_path) -> str:
+    """
+    Returns the directory holding a user's PGN side-store files.
+    """
+
+    return os.path.join(store_path, username.lower())
+
+
+def list_pgn_months(username: str, store_path: str = pgn_store_path) -> list[str]:
+    """
+    Returns a sorted list of the "YYYY-MM" months in a user's PGN store.
+    """
+
+    user_dir = pgn_store_dir(username, store_path)
+    if not os.path.isdir(user_dir):
+        return []
+    return sorted(
+        file.removesuffix(".pgnz")
+        for file in os.listdir(user_dir)
+        if file.endswith(".pgnz")
+    )
+
+
+def write_pgn_month(
+    username: str,
+    month: str,
+    pgns: dict[str, str],
+    store_path: str = pgn_store_path,
+    block_size: int = pgn_block_size,
+) -> None:
+    """
+    Writes one month of a user's PGNs to the side-store.
+
+    PGNs are concatenated into blocks of about block_size bytes and each
+    block is compressed on its own. The file ends with an index, sorted
+    by uuid, of each game's block, offset and length and of each block's
+    position in the file, followed by the index's own position. Reading
+    one game then only decompresses one block. PGNs already stored for
+    the month are kept unless replaced. The file is written to a uniquely
+    named temporary path and renamed over the destination, so concurrent
+    writers don't clobber each other's temporary files.
+
+    Args:
+        - username [str]: string of username
+        - month [str]: the "YYYY-MM" archive month
+        - pgns [dict]: PGN strings keyed by game uuid
+        - store_path [str]: root directory of the PGN store
+        - block_size [int]: uncompressed bytes per block
+
+    Returns:
+        - None
+    """
+
+    pgns = {**(read_month_pgns(username, month, store_path) or {}), **pgns}
+    uuids = np.array(sorted(pgns), dtype=str)
+
+    blocks, block_ids, offsets, lengths = [], [], [], []
+    block = bytearray()
+    for uuid in uuids:
+        data = (pgns[uuid] or "").encode()
+        if block and len(block) + len(data) > block_size:
+            blocks.append(zlib.compress(block))
+            block = bytearray()
+        block_ids.append(len(blocks))
+        offsets.append(len(block))
+        lengths.append(len(data))
+        block += data
+    if block:
+        blocks.append(zlib.compress(block))
+
+    block_offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+    np.cumsum([len(block) for block in blocks], out=block_offsets[1:])
+    index = io.BytesIO()
+    np.savez(
+        index,
+        uuids=uuids,
+        block_ids=np.array(block_ids, dtype=np.int32),
+        offsets=np.array(offsets, dtype=np.int32),
+        lengths=np.array(lengths, dtype=np.int32),
+        block_offsets=block_offsets,
+    )
+
+    user_dir = pgn_store_dir(username, store_path)
+    os.makedirs(user_dir, exist_ok=True)
+    path = os.path.join(user_dir, f"{month}.pgnz")
+    tmp_path = f"{path}.{uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            for block in blocks:
+                file.write(block)
+            file.write(index.getvalue())
+            file.write(int(block_offsets[-1]).to_bytes(8, "little"))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@lru_cache(maxsize=64)
+def read_pgn_index(path: str, mtime_ns: int, size: int) -> dict[str, np.ndarray]:
+    """
+    Returns the index of a PGN store file, cached by path, mtime and size.
+    """
+
+    with open(path, "rb") as file:
+        file.seek(-8, os.SEEK_END)
+        index_start = int.from_bytes(file.read(8), "little")
+        file.seek(index_start)
+        index_bytes = file.read(size - 8 - index_start)
+    with np.load(io.BytesIO(index_bytes)) as index:
+        return {key: index[key] for key in index.files}
+
+
+def month_pgn_index(username: str, month: str, store_path: str):
+    """
+    Returns the path and index of a stored month, or None if not stored.
+    """
+
+    path = os.path.join(pgn_store_dir(username, store_path), f"{month}.pgnz")
+    try:
+        stat = os.stat(path)
+        return path, read_pgn_index(path, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def read_pgn(
+    username: str, month: str, uuid: str, store_path: str = pgn_store_path
+) -> str | None:
+    """
+    Returns one game's PGN from the side-store.
+
+    The uuid is found by binary search in the month's index and only the
+    block holding the game is read and decompressed.
+
+    Args:
+        - username [str]: string of username
+        - month [str]: the "YYYY-MM" archive month of the game
+        - uuid [str]: the game's uuid
+        - store_path [str]: root directory of the PGN store
+
+    Returns:
+        - The PGN string, or None if it isn't stored
+    """
+
+    stored = month_pgn_index(username, month, store_path)
+    if stored is None:
+        return None
+    path, index = stored
+
+    i = np.searchsorted(index["uuids"], uuid)
+    if i == len(index["uuids"]) or index["uuids"][i] != uuid:
+        return None
+    block_id = index["block_ids"][i]
+    start, end = index["block_offsets"][block_id : block_id + 2]
+    try:
+        with open(path, "rb") as file:
+            file.seek(start)
+            block = zlib.decompress(file.read(end - start))
+    except (OSError, zlib.error) as e:
+        data_logger.error(f"Error in read_pgn: {str(e)}, username = {username}")
+        return None
+    offset = index["offsets"][i]
+    return block[offset : offset + index["lengths"][i]].decode()
+
+
+def read_month_pgns(
+    username: str, month: str, store_path: str = pgn_store_path
+) -> dict[str, str] | None:
+    """
+    Returns every stored PGN of a month keyed by uuid.
+
+    Args:
+        - username [str]: string of username
+        - month [str]: the "YYYY-MM" archive month
+        - store_path [str]: root directory of the PGN store
+
+    Returns:
+        - A dict of uuids to PGN strings, or None if the month isn't stored
+    """
+
+    stored = month_pgn_index(username, month, store_path)
+    if stored is None:
+        return None
+    path, index = stored
+
+    with open(path, "rb") as file:
+        data = file.read(index["block_offsets"][-1])
+    block_offsets = index["block_offsets"]
+    blocks = [
+        zlib.decompress(data[start:end])
+        for start, end in zip(block_offsets[:-1], block_offsets[1:])
+    ]
+    return {
+        str(uuid): blocks[block_id][offset : offset + length].decode()
+        for uuid, block_id, offset, length in zip(
+            index["uuids"], index["block_ids"], index["offsets"], index["lengths"]
+        )
+    }
@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from helpers.loggers import plot_logger
+from helpers.vars import chart_point_budget
 
 
 def plot_pie(df: pd.DataFrame, name: str, rows: list):
@@ -44,3 +46,96 @@ def plot_pie(df: pd.DataFrame, name: str, rows: list):
 
     except Exception as e:
         plot_logger.error(f"Unexpected error in plot_pie: {str(e)}, name = {name}")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Returns the positions of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept and the others are split into
+    n_out - 2 buckets of near-equal size. From each bucket the point
+    forming the largest triangle with the mean of the previous bucket and
+    the mean of the next bucket is kept, so peaks and troughs survive.
+    Anchoring on the previous bucket's mean rather than its selected point
+    makes every bucket independent, so all buckets are computed at once
+    with NumPy instead of a Python loop.
+
+    Args:
+        x [np.ndarray]: sorted x values
+        y [np.ndarray]: y values (NaNs are never kept)
+        n_out [int]: the number of points to keep (at least 3)
+
+    Returns:
+        A sorted int64 array of n_out positions (all positions if there
+        aren't more than n_out points)
+    """
+
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, sizes = edges[:-1], np.diff(edges)
+    bucket_x = np.add.reduceat(x[1:-1], starts - 1) / sizes
+    bucket_y = np.add.reduceat(np.nan_to_num(y[1:-1]), starts - 1) / sizes
+
+    # anchors: the previous and next bucket means (first and last points
+    # at the ends)
+    prev_x = np.concatenate(([x[0]], bucket_x[:-1]))
+    prev_y = np.concatenate(([y[0]], bucket_y[:-1]))
+    next_x = np.append(bucket_x[1:], x[-1])
+    next_y = np.append(bucket_y[1:], y[-1])
+
+    bucket = np.repeat(np.arange(len(sizes)), sizes)
+    inner_x, inner_y = x[1:-1], y[1:-1]
+    areas = np.abs(
+        (prev_x[bucket] - next_x[bucket]) * (inner_y - prev_y[bucket])
+        - (prev_x[bucket] - inner_x) * (next_y[bucket] - prev_y[bucket])
+    )
+    areas[np.isnan(areas)] = -1
+    best = np.maximum.reduceat(areas, starts - 1)
+    candidates = np.flatnonzero(areas == best[bucket])
+    _, first = np.unique(bucket[candidates], return_index=True)
+    return np.concatenate(([0], candidates[first] + 1, [n - 1]))
+
+
+def downsample(data, max_points: int = chart_point_budget):
+    """
+    Returns a line chart series or df reduced to at most max_points rows.
+
+    Rows are chosen by lttb_indices against the index (timestamps or
+    numbers; positions otherwise). For a df, each column gets an equal
+    share of the budget and the union of the chosen rows is kept, so
+    every line keeps its shape.
+
+    Args:
+        data [pd.Series/pd.DataFrame]: the data passed to st.line_chart
+        max_points [int]: the point budget
+
+    Returns:
+        The data, or a subset of its rows in the same order
+    """
+
+    if len(data) <= max_points:
+        return data
+
+    index = data.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8
+    elif pd.api.types.is_numeric_dtype(index):
+        x = index.to_numpy()
+    else:
+        x = np.arange(len(index))
+
+    columns = [data] if isinstance(data, pd.Series) else [data[c] for c in data]
+    n_out = max(max_points // len(columns), 3)
+    rows = np.unique(
+        np.concatenate(
+            [
+                lttb_indices(x, column.to_numpy(dtype="float64"), n_out)
+                for column in columns
+            ]
+        )
+    )
+    return data.iloc[rows]
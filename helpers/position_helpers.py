@@ -0,0 +1,227 @@
+import numpy as np
+
+
+standard_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# piece codes used on boards: 0 = empty, 1-6 = white PNBRQK, 7-12 = black pnbrqk
+fen_pieces = "PNBRQKpnbrqk"
+
+# piece types of TCN promotion indices (promotion_pieces "qnrbkp" + 1)
+promotion_types = np.array([0, 5, 2, 4, 3, 6, 1], dtype=np.int8)
+
+# castling rights bits: 1 = K, 2 = Q, 4 = k, 8 = q
+castling_bits = {"K": 1, "Q": 2, "k": 4, "q": 8}
+
+# rights lost when a move starts or ends on each square
+castling_clears = np.zeros(64, dtype=np.uint8)
+castling_clears[[0, 4, 7, 56, 60, 63]] = [2, 3, 1, 8, 12, 4]
+
+zobrist_rng = np.random.default_rng(20240601)
+zobrist_pieces = zobrist_rng.integers(0, 2**64 - 1, (13, 64), dtype=np.uint64)
+zobrist_pieces[0] = 0
+zobrist_castling = zobrist_rng.integers(0, 2**64 - 1, 16, dtype=np.uint64)
+zobrist_black = zobrist_rng.integers(0, 2**64 - 1, dtype=np.uint64)
+
+
+def parse_fen(fen: str) -> tuple[np.ndarray, bool, int]:
+    """
+    Returns the board, side to move and castling rights of a FEN.
+
+    Only the first three fields are read: positions are compared without
+    the en passant square or the move counters. Chess960 castling files
+    (e.g. "HAha") are accepted but carry no rights.
+
+    Args:
+        - fen [str]: a FEN string ("" for the standard starting position)
+
+    Returns:
+        - A tuple of (int8 board of 64 piece codes with a1 = 0, True if
+            black is to move, castling rights bitmask)
+
+    Raises:
+        - ValueError: if the board, side to move or castling field is invalid
+    """
+
+    fields = (fen or standard_fen).split()
+    rows = fields[0].split("/")
+    if len(rows) != 8:
+        raise ValueError(f"Invalid FEN {fen!r}: expected 8 ranks")
+    board = np.zeros(64, dtype=np.int8)
+    for rank, row in enumerate(reversed(rows)):
+        file = 0
+        for char in row:
+            if char in "12345678":
+                file += int(char)
+            elif char in fen_pieces and file < 8:
+                board[rank * 8 + file] = fen_pieces.index(char) + 1
+                file += 1
+            else:
+                raise ValueError(f"Invalid FEN {fen!r}: bad rank {row!r}")
+        if file != 8:
+            raise ValueError(f"Invalid FEN {fen!r}: bad rank {row!r}")
+    if len(fields) > 1 and fields[1] not in ("w", "b"):
+        raise ValueError(f"Invalid FEN {fen!r}: side to move must be w or b")
+    castling = fields[2] if len(fields) > 2 else "-"
+    if castling != "-" and not set(castling) <= set("KQkqABCDEFGHabcdefgh"):
+        raise ValueError(f"Invalid FEN {fen!r}: bad castling rights")
+    black_to_move = len(fields) > 1 and fields[1] == "b"
+    rights = sum(castling_bits.get(char, 0) for char in castling)
+    return board, black_to_move, rights
+
+
+def hash_positions(
+    boards: np.ndarray, black_to_move: np.ndarray, rights: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the Zobrist hash of each of a batch of positions.
+
+    Args:
+        - boards [np.ndarray]: (n, 64) piece codes
+        - black_to_move [np.ndarray]: n bools
+        - rights [np.ndarray]: n castling rights bitmasks
+
+    Returns:
+        - An array of n uint64 hashes
+    """
+
+    hashes = np.bitwise_xor.reduce(zobrist_pieces[boards, np.arange(64)], axis=1)
+    hashes ^= zobrist_castling[rights]
+    hashes ^= np.where(black_to_move, zobrist_black, np.uint64(0))
+    return hashes
+
+
+def fen_to_hash(fen: str) -> np.uint64:
+    """
+    Returns the Zobrist hash of a FEN.
+
+    Args:
+        - fen [str]: a FEN string
+
+    Returns:
+        - A uint64 hash comparable with those of replay_positions
+
+    Raises:
+        - ValueError: if the FEN is invalid (see parse_fen)
+    """
+
+    board, black_to_move, rights = parse_fen(fen)
+    return hash_positions(board[None], np.array([black_to_move]), np.array([rights]))[0]
+
+
+def replay_positions(tcn_moves, initial_fens: list[str]) -> np.ndarray:
+    """
+    Replays every game and returns the hash of every position reached.
+
+    All games are replayed together one ply at a time, so each step is a
+    handful of array operations over the games that are still going.
+    Hashes are updated incrementally from the squares a move touches.
+    The move applier handles captures, castling (a king taking its own
+    rook, as Chess.com encodes it, or moving two files), en passant and
+    promotions (pawns reaching the last rank without a promotion become
+    queens); it trusts the moves to be legal.
+
+    Args:
+        - tcn_moves [TcnMoves]: the decoded moves of the games
+        - initial_fens [list]: the starting FEN of each game ("" or None
+            for the standard starting position)
+
+    Returns:
+        - An array of uint64 hashes of length sum(ply counts + 1): game
+            i's positions (after 0, 1, 2... plies) start at
+            tcn_moves.offsets[i] + i
+    """
+
+    n_games = len(tcn_moves)
+    ply_counts = tcn_moves.ply_counts()
+    position_offsets = tcn_moves.offsets[:-1] + np.arange(n_games)
+
+    boards = np.zeros((n_games, 64), dtype=np.int8)
+    black_to_move = np.zeros(n_games, dtype=bool)
+    rights = np.zeros(n_games, dtype=np.uint8)
+    fens = np.array([fen or "" for fen in initial_fens], dtype=object)
+    for fen in set(fens):
+        games = fens == fen
+        boards[games], black_to_move[games], rights[games] = parse_fen(fen)
+    hashes = hash_positions(boards, black_to_move, rights)
+
+    positions = np.empty(tcn_moves.offsets[-1] + n_games, dtype=np.uint64)
+    positions[position_offsets] = hashes
+
+    # longest games first, so the games still going at each ply are a prefix
+    order = np.argsort(-ply_counts, kind="stable")
+    n_active = np.searchsorted(
+        -ply_counts[order], -np.arange(ply_counts.max(initial=0))
+    )
+    for ply, active in enumerate(n_active):
+        games = order[:active]
+        moves = tcn_moves.offsets[games] + ply
+        from_squares = tcn_moves.from_squares[moves].astype(np.int64)
+        to_squares = tcn_moves.to_squares[moves].astype(np.int64)
+        pieces = boards[games, from_squares]
+        is_white = pieces <= 6
+        file_change = to_squares % 8 - from_squares % 8
+
+        # castling: Chess.com encodes it as the king taking its own rook,
+        # the rook is lifted first and the king sent to its castled square
+        own_rooks = np.where(is_white, 4, 10)
+        castles = ((pieces == 6) | (pieces == 12)) & (
+            (boards[games, to_squares] == own_rooks) | (np.abs(file_change) == 2)
+        )
+        if castles.any():
+            castle_games = games[castles]
+            rank_starts = from_squares[castles] // 8 * 8
+            kingside = file_change[castles] > 0
+            rook_from = np.where(
+                np.abs(file_change[castles]) == 2,
+                rank_starts + np.where(kingside, 7, 0),
+                to_squares[castles],
+            )
+            rook_to = rank_starts + np.where(kingside, 5, 3)
+            rooks = boards[castle_games, rook_from]
+            boards[castle_games, rook_from] = 0
+            to_squares[castles] = rank_starts + np.where(kingside, 6, 2)
+
+        captured = boards[games, to_squares]
+        change = (
+            zobrist_pieces[pieces, from_squares] ^ zobrist_pieces[captured, to_squares]
+        )
+
+        # some TCNs encode queen promotions as a plain pawn move
+        is_pawn = (pieces == 1) | (pieces == 7)
+        promotions = tcn_moves.promotions[moves]
+        last_rank = (to_squares < 8) | (to_squares >= 56)
+        promotions = np.where((promotions == 0) & is_pawn & last_rank, 1, promotions)
+        new_pieces = np.where(
+            promotions > 0,
+            promotion_types[promotions] + np.where(is_white, 0, 6),
+            pieces,
+        ).astype(np.int8)
+        boards[games, from_squares] = 0
+        boards[games, to_squares] = new_pieces
+        change ^= zobrist_pieces[new_pieces, to_squares]
+
+        # en passant: a pawn moving diagonally onto an empty square
+        en_passant = is_pawn & (file_change != 0) & (captured == 0)
+        if en_passant.any():
+            ep_games = games[en_passant]
+            ep_squares = from_squares[en_passant] // 8 * 8 + to_squares[en_passant] % 8
+            change[en_passant] ^= zobrist_pieces[
+                boards[ep_games, ep_squares], ep_squares
+            ]
+            boards[ep_games, ep_squares] = 0
+
+        if castles.any():
+            boards[castle_games, rook_to] = rooks
+            change[castles] ^= zobrist_pieces[rooks, rook_from]
+            change[castles] ^= zobrist_pieces[rooks, rook_to]
+
+        new_rights = rights[games] & ~(
+            castling_clears[from_squares] | castling_clears[to_squares]
+        )
+        change ^= zobrist_castling[rights[games]] ^ zobrist_castling[new_rights]
+        rights[games] = new_rights
+
+        hashes[games] ^= change ^ zobrist_black
+        positions[position_offsets[games] + ply + 1] = hashes[games]
+
+    return positions
@@ -0,0 +1,105 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from helpers.vars import op_rating_bucket_width
+
+
+class Measure(NamedTuple):
+    """
+    An aggregate of a per-game column, computed per group by ChessUser.query
+
+    Attributes:
+        column [str]: the per-game column aggregated (any name get_column
+            resolves)
+        agg [str]: the pandas groupby aggregation, e.g. "mean" or "size"
+        transform [None/Callable]: a vectorised function mapping the column
+            to the values aggregated
+        decimals [None/int]: the number of decimals the result is rounded to
+    """
+
+    column: str
+    agg: str
+    transform: Callable | None = None
+    decimals: int | None = None
+
+
+def result_pc(result: str) -> Callable:
+    """
+    Returns a function mapping results to 100 if equal to result, else 0.
+
+    Its mean over a group is the percentage of the group's games with
+    that result.
+    """
+
+    def pc(results) -> np.ndarray:
+        return (np.asarray(results) == result) * 100.0
+
+    return pc
+
+
+def as_float64(values) -> np.ndarray:
+    """
+    Returns the values as float64, so means aren't accumulated in float32.
+    """
+
+    return np.asarray(values, dtype="float64")
+
+
+measure_registry = {
+    "games_played": Measure("url", "size"),
+    "win_pc": Measure("result", "mean", result_pc("win"), 1),
+    "draw_pc": Measure("result", "mean", result_pc("draw"), 1),
+    "loss_pc": Measure("result", "mean", result_pc("loss"), 1),
+    "accuracy": Measure("accuracy", "mean", as_float64, 2),
+    "accuracy_count": Measure("accuracy", "count"),
+    "rating_diff_mean": Measure("rating_differential", "mean", None, 1),
+    "rating_diff_min": Measure("rating_differential", "min"),
+    "rating_diff_max": Measure("rating_differential", "max"),
+    "op_rating_mean": Measure("op_rating", "mean", None, 0),
+}
+
+# the measures and sort column of each query_game_history fact
+fact_measures = {
+    "url": (["games_played"], "games_played"),
+    "result": (["win_pc", "draw_pc", "loss_pc"], None),
+    "accuracy": (["accuracy"], "accuracy"),
+}
+
+
+def filter_mask(values, condition) -> np.ndarray:
+    """
+    Returns a boolean mask of the values matching a query filter condition.
+
+    Args:
+        - values [ArrayLike]: a per-game column
+        - condition: a list, tuple or set of accepted values, a vectorised
+            function returning a boolean per value (e.g. pd.notna), or a
+            single value to compare equal to
+
+    Returns:
+        - A boolean numpy array the length of values
+    """
+
+    if callable(condition):
+        return np.asarray(condition(values), dtype=bool)
+    if isinstance(condition, (list, tuple, set)):
+        return np.asarray(pd.Series(values).isin(list(condition)))
+    return np.asarray(values == condition, dtype=bool)
+
+
+def bucket_ratings(ratings, width: int = op_rating_bucket_width) -> np.ndarray:
+    """
+    Returns ratings rounded to the nearest multiple of width.
+
+    Args:
+        - ratings [ArrayLike]: integer ratings
+        - width [int]: the bucket width
+
+    Returns:
+        - An array of bucketed ratings with the dtype of ratings
+    """
+
+    ratings = np.asarray(ratings)
+    return (np.round(ratings / width) * width).astype(ratings.dtype)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+ns_per_day = 86_400 * 10**9
+
+
+def period_codes(times: pd.DatetimeIndex, freq: str) -> np.ndarray:
+    """
+    Returns an integer code of the day, week or month of each timestamp.
+
+    Codes increase with time, so the codes of sorted timestamps are sorted
+    and each period is a contiguous run. Weeks start on Monday.
+
+    Args:
+        - times [pd.DatetimeIndex]: UTC timestamps
+        - freq [str]: "day", "week" or "month"
+
+    Returns:
+        - An int64 array of period codes
+    """
+
+    days = times.asi8 // ns_per_day
+    if freq == "day":
+        return days
+    if freq == "week":
+        # 1970-01-01 was a Thursday, so weeks start 3 days before it
+        return (days + 3) // 7
+    if freq == "month":
+        return times.year.to_numpy(dtype=np.int64) * 12 + times.month.to_numpy() - 1
+    raise ValueError(f"Unknown period {freq!r}")
+
+
+def period_starts(times: pd.DatetimeIndex, freq: str) -> pd.DatetimeIndex:
+    """
+    Returns the start of the day, week or month of each timestamp.
+    """
+
+    days = times.normalize()
+    if freq == "week":
+        return days - pd.to_timedelta(days.weekday, unit="D")
+    if freq == "month":
+        return days - pd.to_timedelta(days.day - 1, unit="D")
+    return days
+
+
+def rating_ohlc(
+    times: pd.DatetimeIndex, ratings: np.ndarray, freq: str
+) -> pd.DataFrame:
+    """
+    Returns the open, high, low and close rating of each period.
+
+    The timestamps must be sorted. Period boundaries are found with one
+    pass over the period codes and every aggregate is a ufunc reduceat
+    over the runs, so there's no Python loop over games or periods. Net
+    change is the close minus the previous period's close (minus the
+    open for the first period), so the changes add up to the overall
+    change.
+
+    Args:
+        - times [pd.DatetimeIndex]: the sorted end times of the games
+        - ratings [np.ndarray]: the user's rating after each game
+        - freq [str]: "day", "week" or "month"
+
+    Returns:
+        - A df indexed by period start with open, high, low, close,
+            games_played and net_change columns
+    """
+
+    ratings = np.asarray(ratings)
+    if len(ratings) == 0:
+        columns = ["open", "high", "low", "close", "games_played", "net_change"]
+        return pd.DataFrame(
+            columns=columns, index=pd.DatetimeIndex([], name="period", tz="UTC")
+        )
+
+    codes = period_codes(times, freq)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+    ends = np.append(starts[1:], len(ratings))
+    close = ratings[ends - 1]
+    previous_close = np.concatenate(([ratings[0]], close[:-1]))
+
+    index = period_starts(times[starts], freq)
+    index.name = "period"
+    return pd.DataFrame(
+        {
+            "open": ratings[starts],
+            "high": np.maximum.reduceat(ratings, starts),
+            "low": np.minimum.reduceat(ratings, starts),
+            "close": close,
+            "games_played": ends - starts,
+            "net_change": close.astype(np.int64) - previous_close,
+        },
+        index=index,
+    )
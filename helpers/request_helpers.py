@@ -7,7 +7,9 @@ from requests.exceptions import RequestException
 from httpx import AsyncClient, RequestError
 import streamlit as st
 import asyncio
+from msgspec import DecodeError
 
+from helpers.decode_helpers import decode_archive
 from helpers.loggers import request_logger
 from helpers.vars import old_puzzle
 
@@ -285,7 +287,7 @@ def get_archives(username: str) -> list | None:
         request_logger.error(f"Request error: {e}")
 
 
-async def get_archive(url, client):
+async def get_archive(url, client, fields: set[str] | None = None):
     """
     Returns list of Chess.com games for given month.
 
@@ -293,12 +295,16 @@ async def get_archive(url, client):
     to call the Chess.com API and retrieve that month's games
     for the given user.
 
-    If the request receives a 200 response, the JSON is converted
-    to a list and returned. If not, returns None.
+    If the request receives a 200 response, the JSON is decoded against
+    the game schema (see decode_archive), keeping only the requested
+    fields, and returned as a list. Games that don't match the schema are
+    skipped. If the response isn't a 200 or its body isn't an archive,
+    returns None.
 
     Args:
         - url [str]: a string of a monthly archive url
         - client: a httpx.AsyncClient object passed in from the enclosing function
+        - fields [None/set]: the game fields to decode (all schema fields if None)
 
     Returns:
         - A list of the Chess.com games archives for the url
@@ -312,23 +318,64 @@ async def get_archive(url, client):
         response = await client.get(url, headers=headers)
 
         if response.status_code == 200:
-            return response.json()["games"]
+            return decode_archive(response.content, fields)
         else:
             return None
 
     except RequestError as e:
         request_logger.error(f"Request error: {str(e)}, url = {url}")
+    except DecodeError as e:
+        request_logger.error(f"Decode error: {str(e)}, url = {url}")
 
 
-async def get_game_history(username: str) -> list[dict]:
+def archive_month(url: str) -> str:
+    """
+    Returns the "YYYY-MM" month of a monthly archive url.
+
+    E.g. "https://api.chess.com/pub/player/aporian/games/2024/11" -> "2024-11"
+    """
+
+    year, month = url.rstrip("/").split("/")[-2:]
+    return f"{year}-{month}"
+
+
+async def get_game_history_by_month(
+    username: str,
+    archive_urls: list[str] | None = None,
+    fields: set[str] | None = None,
+) -> dict[str, list[dict]]:
+    """
+    Returns dict of Chess.com games for given user keyed by archive month.
+
+    Requests the passed monthly archive urls (or all of the user's
+    archives if None) concurrently and keys each successfully retrieved
+    archive by its "YYYY-MM" month. Months keep the order of the urls.
+
+    Args:
+        - username [str]: string of username
+        - archive_urls [None/list]: monthly archive urls to request
+        - fields [None/set]: the game fields to decode (all schema fields if None)
+
+    Returns:
+        - A dict of "YYYY-MM" strings to lists of games
+    """
+
     async with AsyncClient() as client:
-        archives = get_archives(username)
-        tasks = [get_archive(url, client) for url in archives]
+        if archive_urls is None:
+            archive_urls = get_archives(username)
+        tasks = [get_archive(url, client, fields) for url in archive_urls]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    monthly_archives = [result for result in results if isinstance(result, list)]
-    failures = [result for result in results if not isinstance(result, list)]
-    game_history = [y for x in monthly_archives for y in x]
+    return {
+        archive_month(url): result
+        for url, result in zip(archive_urls, results)
+        if isinstance(result, list)
+    }
+
+
+async def get_game_history(username: str) -> list[dict]:
+    monthly_archives = await get_game_history_by_month(username)
+    game_history = [y for x in monthly_archives.values() for y in x]
 
     return game_history
 
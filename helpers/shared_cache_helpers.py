@@ -0,0 +1,257 @@
+import hashlib
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from helpers.loggers import data_logger
+from helpers.vars import shared_cache_path, shared_cache_grace_seconds
+
+
+current_pointer = "CURRENT"
+publish_lock_file = "LOCK"
+
+
+def shared_cache_dir(username: str, cache_path: str = shared_cache_path) -> str:
+    """
+    Returns the directory holding a user's shared cache versions.
+    """
+
+    return os.path.join(cache_path, username.lower())
+
+
+def history_version(df: pd.DataFrame) -> str:
+    """
+    Returns a version string identifying a game history.
+
+    The version is made of the number of games, the latest end_time and
+    a hash of the game uuids (or of the end_times if there's no uuid
+    column), so workers publishing the same history agree on the version
+    and different histories don't collide. The first two parts order
+    versions (see version_order).
+
+    Args:
+        - df [pd.DataFrame]: a game history indexed by end_time
+
+    Returns:
+        - A version string, e.g. "828-1734567890-4f1c2a9b0d3e5f67"
+    """
+
+    latest = int(df.index.max().timestamp()) if len(df) else 0
+    ids = df["uuid"].to_numpy(dtype=object) if "uuid" in df else df.index.asi8
+    digest = hashlib.blake2b(
+        pd.util.hash_array(ids).tobytes(), digest_size=8
+    ).hexdigest()
+    return f"{len(df)}-{latest}-{digest}"
+
+
+def version_order(version: str) -> tuple[int, int]:
+    """
+    Returns the (number of games, latest end_time) of a version.
+
+    Game histories only grow, so a version is newer than another if this
+    tuple is greater.
+    """
+
+    n_games, latest = version.split("-")[:2]
+    return int(n_games), int(latest)
+
+
+@contextmanager
+def publish_lock(user_dir: str):
+    """
+    Holds an exclusive lock on a user's shared cache directory.
+
+    Serialises publishers on the host, so comparing and switching the
+    CURRENT pointer is atomic. Does nothing where fcntl isn't available.
+    """
+
+    with open(os.path.join(user_dir, publish_lock_file), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_atomically(path: str, write) -> None:
+    """
+    Calls write with a unique temporary path and renames it over path.
+    """
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def publish_shared_history(
+    username: str, df: pd.DataFrame, cache_path: str = shared_cache_path
+) -> str:
+    """
+    Publishes a game history to the host-wide shared cache.
+
+    The history is only published if it's strictly newer than the
+    current one (see version_order), so a worker publishing a stale read
+    can't move CURRENT backwards. The frame is written once as an
+    uncompressed Arrow IPC file named by its version, then the user's
+    CURRENT pointer is switched to it, under a lock so concurrent
+    publishers don't interleave. Both steps write to a temporary file and
+    rename it into place, so readers see either the old or the new
+    version and never a partial file.
+
+    Args:
+        - username [str]: string of username
+        - df [pd.DataFrame]: the game history to publish
+        - cache_path [str]: root directory of the shared cache
+
+    Returns:
+        - The current version string after publishing
+    """
+
+    user_dir = shared_cache_dir(username, cache_path)
+    os.makedirs(user_dir, exist_ok=True)
+    version = history_version(df)
+    path = os.path.join(user_dir, f"{version}.arrow")
+
+    with publish_lock(user_dir):
+        current = current_shared_version(username, cache_path)
+        if current is not None and version_order(version) <= version_order(current):
+            return current
+
+        if not os.path.exists(path):
+            table = pa.Table.from_pandas(df, preserve_index=True)
+
+            def write_table(tmp_path):
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+
+            write_atomically(path, write_table)
+
+        def write_pointer(tmp_path):
+            with open(tmp_path, "w") as file:
+                file.write(version)
+
+        write_atomically(os.path.join(user_dir, current_pointer), write_pointer)
+
+    cleanup_shared_history(username, cache_path)
+    return version
+
+
+def current_shared_version(
+    username: str, cache_path: str = shared_cache_path
+) -> str | None:
+    """
+    Returns the version the user's CURRENT pointer refers to, if any.
+    """
+
+    try:
+        with open(
+            os.path.join(shared_cache_dir(username, cache_path), current_pointer)
+        ) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_shared_history(
+    username: str,
+    columns: list[str] | None = None,
+    cache_path: str = shared_cache_path,
+) -> pd.DataFrame | None:
+    """
+    Returns the user's current game history from the shared cache.
+
+    The Arrow file is memory-mapped read-only, so its pages are shared
+    through the OS page cache by every process reading the same version.
+    Numeric columns without nulls are converted to pandas without
+    copying and string columns stay backed by the mapped Arrow buffers.
+
+    Args:
+        - username [str]: string of username
+        - columns [None/list]: columns to read (all columns if None)
+        - cache_path [str]: root directory of the shared cache
+
+    Returns:
+        - A dataframe of the games
+            OR
+        - None if nothing is published for the user
+    """
+
+    version = current_shared_version(username, cache_path)
+    if version is None:
+        return None
+
+    path = os.path.join(shared_cache_dir(username, cache_path), f"{version}.arrow")
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except OSError as e:
+        data_logger.error(
+            f"Error in read_shared_history: {str(e)}, username = {username}"
+        )
+        return None
+
+    if columns is not None:
+        index_columns = [
+            name
+            for name in table.schema.pandas_metadata["index_columns"]
+            if isinstance(name, str)
+        ]
+        table = table.select([*columns, *index_columns])
+    return table.to_pandas(
+        split_blocks=True,
+        types_mapper={pa.string(): pd.ArrowDtype(pa.string())}.get,
+    )
+
+
+def cleanup_shared_history(
+    username: str,
+    cache_path: str = shared_cache_path,
+    grace_seconds: float = shared_cache_grace_seconds,
+) -> list[str]:
+    """
+    Removes the user's versions that CURRENT no longer refers to.
+
+    Versions are only removed once they are older than grace_seconds, so
+    a worker that read the old pointer can still open its file. Workers
+    that already mapped a removed file keep their mapping until they
+    drop it.
+
+    Args:
+        - username [str]: string of username
+        - cache_path [str]: root directory of the shared cache
+        - grace_seconds [float]: minimum age of a removed version
+
+    Returns:
+        - The removed file names
+    """
+
+    user_dir = shared_cache_dir(username, cache_path)
+    current = f"{current_shared_version(username, cache_path)}.arrow"
+    removed = []
+    now = time.time()
+    for file in os.listdir(user_dir) if os.path.isdir(user_dir) else []:
+        path = os.path.join(user_dir, file)
+        if file in (current, current_pointer, publish_lock_file):
+            continue
+        try:
+            if now - os.path.getmtime(path) >= grace_seconds:
+                os.remove(path)
+                removed.append(file)
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,203 @@
+import os
+import uuid
+
+import pandas as pd
+
+from helpers.loggers import data_logger
+from helpers.vars import game_history_store_path, raw_field_store_path
+from helpers.wrangle_helpers import concat_game_histories
+
+
+def user_store_dir(username: str, store_path: str = game_history_store_path) -> str:
+    """
+    Returns the directory holding a user's game history partitions.
+    """
+
+    return os.path.join(store_path, username.lower())
+
+
+def list_stored_months(
+    username: str, store_path: str = game_history_store_path
+) -> list[str]:
+    """
+    Returns a sorted list of the "YYYY-MM" months stored for a user.
+
+    Args:
+        - username [str]: string of username
+        - store_path [str]: root directory of the game history store
+
+    Returns:
+        - A list of month strings (empty if nothing is stored)
+    """
+
+    user_dir = user_store_dir(username, store_path)
+    if not os.path.isdir(user_dir):
+        return []
+    return sorted(
+        file.removesuffix(".parquet")
+        for file in os.listdir(user_dir)
+        if file.endswith(".parquet")
+    )
+
+
+def write_month_partition(
+    username: str,
+    month: str,
+    df: pd.DataFrame,
+    store_path: str = game_history_store_path,
+) -> None:
+    """
+    Writes one month of a user's wrangled game history to the store.
+
+    Each month is its own Parquet file, so storing a new month never
+    rewrites existing ones. The file is written to a uniquely named
+    temporary path and then renamed over the destination, so readers never
+    see a partial file and concurrent writers don't clobber each other.
+
+    Args:
+        - username [str]: string of username
+        - month [str]: the "YYYY-MM" archive month
+        - df [pd.DataFrame]: the wrangled games for that month
+        - store_path [str]: root directory of the game history store
+
+    Returns:
+        - None
+    """
+
+    user_dir = user_store_dir(username, store_path)
+    os.makedirs(user_dir, exist_ok=True)
+    path = os.path.join(user_dir, f"{month}.parquet")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_game_history_store(
+    username: str,
+    columns: list[str] | None = None,
+    months: list[str] | None = None,
+    store_path: str = game_history_store_path,
+) -> pd.DataFrame | None:
+    """
+    Returns a user's stored game history as a single dataframe.
+
+    Reads the requested month partitions in month order, only
+    decoding the requested columns, and re-applies the compact schema so
+    categorical columns share one set of categories across months.
+
+    Args:
+        - username [str]: string of username
+        - columns [None/list]: columns to read (all columns if None)
+        - months [None/list]: months to read (all stored months if None)
+        - store_path [str]: root directory of the game history store
+
+    Returns:
+        - A dataframe of the stored games
+            OR
+        - None if nothing is stored for the user
+    """
+
+    stored_months = list_stored_months(username, store_path)
+    if months is not None:
+        stored_months = [month for month in stored_months if month in months]
+    if not stored_months:
+        return None
+
+    user_dir = user_store_dir(username, store_path)
+    try:
+        frames = [
+            pd.read_parquet(os.path.join(user_dir, f"{month}.parquet"), columns=columns)
+            for month in stored_months
+        ]
+    except OSError as e:
+        data_logger.error(
+            f"Error in read_game_history_store: {str(e)}, username = {username}"
+        )
+        return None
+
+    return concat_game_histories(frames)
+
+
+def list_raw_field_months(
+    username: str, store_path: str = raw_field_store_path
+) -> list[str]:
+    """
+    Returns a sorted list of the "YYYY-MM" months in a user's raw field store.
+    """
+
+    return list_stored_months(username, store_path)
+
+
+def write_raw_fields(
+    username: str,
+    month: str,
+    df: pd.DataFrame,
+    store_path: str = raw_field_store_path,
+) -> None:
+    """
+    Writes one month of raw game fields to the raw field side-store.
+
+    Raw fields that aren't wrangled (e.g. "tcn") are kept in a Parquet
+    file per month keyed by uuid, so they don't have to be held in memory
+    or re-fetched from the API. Rows already stored for the month are kept
+    unless a row with the same uuid replaces them.
+
+    Args:
+        - username [str]: string of username
+        - month [str]: the "YYYY-MM" archive month
+        - df [pd.DataFrame]: a "uuid" column and one column per raw field
+        - store_path [str]: root directory of the raw field store
+
+    Returns:
+        - None
+    """
+
+    path = os.path.join(user_store_dir(username, store_path), f"{month}.parquet")
+    if os.path.exists(path):
+        df = pd.concat([pd.read_parquet(path), df]).drop_duplicates("uuid", keep="last")
+    write_month_partition(username, month, df.reset_index(drop=True), store_path)
+
+
+def read_raw_fields(
+    username: str,
+    months: list[str],
+    columns: list[str] | None = None,
+    store_path: str = raw_field_store_path,
+) -> pd.DataFrame | None:
+    """
+    Returns the stored raw game fields of the given months indexed by uuid.
+
+    Args:
+        - username [str]: string of username
+        - months [list]: the "YYYY-MM" months to read (unstored months are
+            skipped)
+        - columns [None/list]: raw fields to read (all if None)
+        - store_path [str]: root directory of the raw field store
+
+    Returns:
+        - A dataframe of raw fields indexed by uuid
+            OR
+        - None if none of the months are stored
+    """
+
+    stored_months = set(list_raw_field_months(username, store_path))
+    user_dir = user_store_dir(username, store_path)
+    try:
+        frames = [
+            pd.read_parquet(
+                os.path.join(user_dir, f"{month}.parquet"),
+                columns=None if columns is None else ["uuid", *columns],
+            )
+            for month in months
+            if month in stored_months
+        ]
+    except OSError as e:
+        data_logger.error(f"Error in read_raw_fields: {str(e)}, username = {username}")
+        return None
+    if not frames:
+        return None
+    return pd.concat(frames).set_index("uuid")
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+# Chess.com's TCN alphabet: indices 0-63 are squares (a1, b1 ... h8) and
+# indices 64-81 are promotions, three per piece (capture left, straight on,
+# capture right) in the order of promotion_pieces
+tcn_alphabet = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!?"
+    "{~}(^)[_]@#$,./&-*++="
+)
+
+promotion_pieces = "qnrbkp"
+
+tcn_lookup = np.full(256, -1, dtype=np.int16)
+for i, char in enumerate(tcn_alphabet):
+    if tcn_lookup[ord(char)] == -1:
+        tcn_lookup[ord(char)] = i
+
+square_names = np.array([f"{file}{rank}" for rank in "12345678" for file in "abcdefgh"])
+
+
+def decode_tcns(tcns: list[str]) -> tuple[np.ndarray, ...]:
+    """
+    Decodes a list of TCN strings into flat move arrays.
+
+    All the strings are joined into one byte buffer and decoded with a
+    256-entry lookup table, so there is no per-character Python work.
+    Each pair of characters is one ply: a from square and either a to
+    square or a promotion code, which is resolved relative to the from
+    square.
+
+    Args:
+        - tcns [list]: a list of TCN strings (None for missing strings)
+
+    Returns:
+        - A tuple of arrays (from_squares, to_squares, promotions, offsets):
+            squares are int8 0-63 (a1 = 0, h8 = 63), promotions are int8
+            indices into promotion_pieces + 1 (0 = no promotion) and
+            offsets is an int64 array of length len(tcns) + 1
+    """
+
+    tcns = [tcn or "" for tcn in tcns]
+    lengths = np.fromiter(map(len, tcns), np.int64, len(tcns))
+    if (lengths % 2).any():
+        tcns = [tcn[: len(tcn) // 2 * 2] for tcn in tcns]
+    lengths //= 2
+    offsets = np.zeros(len(tcns) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    buffer = np.frombuffer("".join(tcns).encode("ascii"), dtype=np.uint8)
+    codes = tcn_lookup[buffer].reshape(-1, 2)
+    from_squares, to_codes = codes[:, 0], codes[:, 1]
+
+    is_promotion = to_codes > 63
+    promotion_codes = np.where(is_promotion, to_codes - 64, 0)
+    direction = np.where(from_squares < 16, -8, 8) + promotion_codes % 3 - 1
+    to_squares = np.where(is_promotion, from_squares + direction, to_codes)
+    promotions = np.where(is_promotion, promotion_codes // 3 + 1, 0)
+
+    return (
+        from_squares.astype(np.int8),
+        to_squares.astype(np.int8),
+        promotions.astype(np.int8),
+        offsets,
+    )
+
+
+def move_codes_to_uci(codes: np.ndarray) -> np.ndarray:
+    """
+    Converts move codes (from * 64 + to + promotion * 4096) to UCI strings.
+
+    E.g. 12 * 64 + 28 -> "e2e4"; padding codes (-1) become "".
+
+    Args:
+        - codes [np.ndarray]: an array of move codes
+
+    Returns:
+        - An array of UCI strings with the same shape
+    """
+
+    codes = np.asarray(codes)
+    valid = codes >= 0
+    safe = np.where(valid, codes, 0)
+    promotion = np.array(["", *promotion_pieces])[safe // 4096]
+    uci = np.char.add(
+        np.char.add(square_names[safe // 64 % 64], square_names[safe % 64]),
+        promotion,
+    )
+    return np.where(valid, uci, "")
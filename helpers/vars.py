@@ -34,6 +34,106 @@ old_puzzle = {
     "image": "https://www.chess.com/dynboard?fen=2n1k3/7N/8/1pPpB2p/3Pp1pP/P1q3P1/8/5RK1%20w%20-%20-%200%201&size=2",
 }
 
+# Var used within ChessUser.wrangle_game_history_df
+
+game_history_dtypes = {
+    "colour": "category",
+    "time_class": "category",
+    "time_control": "category",
+    "rated": "bool",
+    "rating": "int16",
+    "opponent": "category",
+    "op_rating": "int16",
+    "rating_differential": "int16",
+    "result": "category",
+    "result_type": "category",
+    "eco": "category",
+    "accuracy": "float32",
+    "op_accuracy": "float32",
+}
+
+# Vars used within helpers.wrangle_helpers.wrangle_chunks
+
+# wrangling in a process pool is opt-in: it's only faster with spare CPUs
+parallel_wrangle = False
+parallel_wrangle_threshold = 50_000
+
+# Vars used within ChessUser.get_time_management_stats
+
+# last full move number of each phase, later moves are "endgame"
+move_phases = {"opening": 10, "middlegame": 30}
+
+# share of the base time below which a player is in time trouble
+time_trouble_fraction = 0.1
+
+# Var used within ChessUser.get_opening_tree
+
+# number of plies (half-moves) of each game included in the opening tree
+opening_tree_depth = 12
+
+# Vars used within ChessUser.query and ChessUser.get_aggregate_cube
+
+# width of the opponent rating buckets ("op_rating" dimension)
+op_rating_bucket_width = 100
+
+aggregate_cube_dims = ["eco", "colour", "time_class", "op_rating", "rated"]
+
+# Var used within ChessUser.get_history_page
+
+history_page_size = 50
+
+# Var used within helpers.plot_helpers.downsample
+
+# maximum number of points sent to a line chart
+chart_point_budget = 1000
+
+# Var used within helpers.memo_helpers
+
+# number of query results kept in the shared result cache
+result_cache_size = 256
+
+# Var used within classes.opening_dictionary
+
+# the word ending the family part of an opening name, e.g. "Sicilian-Defense"
+opening_family_words = {"Defense", "Opening", "Game", "Gambit", "Attack", "System"}
+
+# Vars used within helpers.storage_helpers
+
+game_history_store_path = "./storage/game_history"
+raw_field_store_path = "./storage/raw_fields"
+
+# raw game fields kept in the raw field side-store, read by the move
+# decoders and position index (see ChessUser.store_raw_fields)
+stored_raw_fields = {"tcn", "initial_setup"}
+
+# Vars used within helpers.pgn_store_helpers
+
+pgn_store_path = "./storage/pgn_store"
+
+# uncompressed bytes of PGN text per compressed block
+pgn_block_size = 64 * 1024
+
+# Vars used within helpers.shared_cache_helpers
+
+shared_cache_path = "./storage/shared_cache"
+
+# seconds an unreferenced version is kept for workers still opening it
+shared_cache_grace_seconds = 300
+
+# game archive fields read by helpers.wrangle_helpers.wrangle_games
+wrangled_game_fields = {
+    "url",
+    "uuid",
+    "end_time",
+    "time_class",
+    "time_control",
+    "rated",
+    "white",
+    "black",
+    "eco",
+    "accuracies",
+}
+
 required_game_archive_keys = {
     "initial_setup",
     "rated",
@@ -0,0 +1,332 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from helpers.loggers import data_logger
+from helpers.pgn_helpers import parse_pgn_headers
+from helpers.vars import (
+    game_history_dtypes,
+    parallel_wrangle,
+    parallel_wrangle_threshold,
+)
+
+# Process pool shared by parallel wrangling calls, created on first use
+executor = None
+executor_workers = None
+
+
+def wrangle_games(games: list[dict], username: str) -> pd.DataFrame:
+    """
+    Returns a dataframe of the passed games from the user's perspective.
+
+    Iterates over a list of Chess.com game dicts and accumulates one row
+    per game with the user's colour, rating, result, opening etc. The
+    result is cast to the compact game_history_dtypes schema and indexed
+    by a sorted, UTC "end_time" DatetimeIndex.
+
+    Args:
+        - games [list]: a list of dicts, each representing a game
+        - username [str]: the username whose perspective is used, matched
+            case-insensitively as Chess.com usernames are
+
+    Returns:
+        - A dataframe with one row per game
+
+    Raises:
+        - KeyError: KeyErrors are caught and logged before being re-raised.
+    """
+
+    accumulator = {
+        "colour": [],
+        "time_class": [],
+        "time_control": [],
+        "rated": [],
+        "rating": [],
+        "opponent": [],
+        "op_rating": [],
+        "rating_differential": [],
+        "result": [],
+        "result_type": [],
+        "eco": [],
+        "accuracy": [],
+        "op_accuracy": [],
+        "url": [],
+        "uuid": [],
+    }
+    end_times = []
+
+    # https://www.chess.com/news/view/published-data-api#game-results
+    draws = [
+        "stalemate",
+        "agreed",
+        "repetition",
+        "50move",
+        "timevsinsufficient",
+        "insufficient",
+    ]
+    losses = [
+        "checkmated",
+        "timeout",
+        "resigned",
+        "abandoned",
+        "kingofthehill",
+        "threecheck",
+        "bughousepartnerlose",
+    ]
+    username = username.lower()
+    try:
+        for game in games:
+
+            accumulator["time_class"].append(game["time_class"])
+            accumulator["time_control"].append(game["time_control"])
+            accumulator["rated"].append(game["rated"])
+            accumulator["url"].append(game["url"])
+            accumulator["uuid"].append(game["uuid"])
+            end_times.append(game["end_time"])
+
+            if game.get("eco"):
+                accumulator["eco"].append(game["eco"].split("/")[-1])
+            elif eco_url := parse_pgn_headers(game.get("pgn") or "").get("ECOUrl"):
+                accumulator["eco"].append(eco_url.split("/")[-1])
+            else:
+                accumulator["eco"].append("Undefined")
+
+            white, black = game["white"], game["black"]
+            accuracies = game.get("accuracies", None)
+
+            if white["username"].lower() == username:
+                accumulator["colour"].append("white")
+                accumulator["rating"].append(white["rating"])
+                accumulator["opponent"].append(black["username"])
+                accumulator["op_rating"].append(black["rating"])
+                accumulator["accuracy"].append(
+                    accuracies["white"] if accuracies else None
+                )
+                accumulator["op_accuracy"].append(
+                    accuracies["black"] if accuracies else None
+                )
+                if white["result"] == "win":
+                    accumulator["result"].append("win")
+                    accumulator["result_type"].append(black["result"])
+                elif white["result"] in draws:
+                    accumulator["result"].append("draw")
+                    accumulator["result_type"].append(white["result"])
+                else:
+                    accumulator["result"].append("loss")
+                    accumulator["result_type"].append(white["result"])
+
+            else:
+                accumulator["colour"].append("black")
+                accumulator["rating"].append(black["rating"])
+                accumulator["opponent"].append(white["username"])
+                accumulator["op_rating"].append(white["rating"])
+                accumulator["accuracy"].append(
+                    accuracies["black"] if accuracies else None
+                )
+                accumulator["op_accuracy"].append(
+                    accuracies["white"] if accuracies else None
+                )
+                if black["result"] == "win":
+                    accumulator["result"].append("win")
+                    accumulator["result_type"].append(white["result"])
+                elif black["result"] in draws:
+                    accumulator["result"].append("draw")
+                    accumulator["result_type"].append(black["result"])
+                else:
+                    accumulator["result"].append("loss")
+                    accumulator["result_type"].append(black["result"])
+
+            rating_dif = accumulator["rating"][-1] - accumulator["op_rating"][-1]
+            accumulator["rating_differential"].append(rating_dif)
+
+        index = pd.to_datetime(end_times, unit="s", utc=True).rename("end_time")
+        df = pd.DataFrame(accumulator, index=index).astype(game_history_dtypes)
+        return df.sort_index(kind="stable")
+
+    except KeyError as e:
+        data_logger.error(
+            f"Key error in wrangle_games: {str(e)}, game keys = {game.keys()}"
+        )
+        raise e
+
+
+def wrangle_games_to_arrow(games: list[dict], username: str) -> bytes:
+    """
+    Wrangles games and returns the df serialised as an Arrow IPC stream.
+
+    Used as the worker function of wrangle_games_parallel: the result is
+    sent back to the parent process as one contiguous buffer rather than
+    as pickled Python objects.
+    """
+
+    table = pa.Table.from_pandas(wrangle_games(games, username))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def wrangle_games_parallel(
+    chunks: list[list[dict]], username: str, max_workers: int | None = None
+) -> list[pd.DataFrame]:
+    """
+    Wrangles chunks of games (e.g. archive months) in a process pool.
+
+    Each chunk is wrangled by wrangle_games_to_arrow in a worker process
+    and the Arrow buffers are read back into dataframes in chunk order.
+    The pool is created on first use and reused by later calls unless
+    a different max_workers is requested. It's shut down at interpreter
+    exit (see shutdown_executor).
+
+    Args:
+        - chunks [list]: a list of lists of games
+        - username [str]: the username whose perspective is used
+        - max_workers [None/int]: the number of worker processes
+            (defaults to the number of CPUs)
+
+    Returns:
+        - A list of wrangled dataframes, one per chunk
+    """
+
+    global executor, executor_workers
+    max_workers = max_workers or os.cpu_count()
+    if executor is None or executor_workers != max_workers:
+        if executor is not None:
+            executor.shutdown()
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        executor_workers = max_workers
+
+    buffers = executor.map(wrangle_games_to_arrow, chunks, [username] * len(chunks))
+    return [pa.ipc.open_stream(buffer).read_all().to_pandas() for buffer in buffers]
+
+
+def shutdown_executor() -> None:
+    """
+    Shuts down the process pool of wrangle_games_parallel, if it's running.
+    """
+
+    global executor, executor_workers
+    if executor is not None:
+        executor.shutdown()
+        executor, executor_workers = None, None
+
+
+atexit.register(shutdown_executor)
+
+
+def split_games(games: list[dict], n_chunks: int) -> list[list[dict]]:
+    """
+    Splits a flat list of games into n_chunks contiguous chunks.
+    """
+
+    size = -(-len(games) // max(n_chunks, 1)) or 1
+    return [games[i : i + size] for i in range(0, len(games), size)]
+
+
+def wrangle_chunks(chunks: list[list[dict]], username: str) -> list[pd.DataFrame]:
+    """
+    Wrangles chunks of games, in parallel if enabled and worthwhile.
+
+    Parallel wrangling is opt-in (parallel_wrangle): shipping games to
+    worker processes costs more than wrangling them in this process
+    unless several CPUs are free. If it's enabled, there's more than one
+    CPU and chunk and the total number of games reaches
+    parallel_wrangle_threshold, wrangle_games_parallel is used. Otherwise
+    the chunks are wrangled one after the other in this process.
+
+    Args:
+        - chunks [list]: a list of lists of games
+        - username [str]: the username whose perspective is used
+
+    Returns:
+        - A list of wrangled dataframes, one per chunk
+    """
+
+    n_games = sum(len(chunk) for chunk in chunks)
+    if (
+        parallel_wrangle
+        and (os.cpu_count() or 1) > 1
+        and len(chunks) > 1
+        and n_games >= parallel_wrangle_threshold
+    ):
+        return wrangle_games_parallel(chunks, username)
+    return [wrangle_games(chunk, username) for chunk in chunks]
+
+
+def concat_game_histories(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates wrangled game history dataframes in order.
+
+    Categorical columns of the parts can have different categories, so
+    the categories are unioned first (see union_categories) and the codes
+    are concatenated as they are. Only columns that still don't match the
+    compact schema are cast. The end_time index is only re-sorted if the
+    parts overlap in time.
+
+    Args:
+        - frames [list]: a list of wrangled game history dataframes
+
+    Returns:
+        - A single dataframe sorted by end_time
+    """
+
+    frames = union_categories(frames)
+    df = pd.concat(frames)
+    df = df.astype(
+        {k: v for k, v in game_history_dtypes.items() if k in df and df[k].dtype != v}
+    )
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="stable")
+    return df
+
+
+def union_categories(frames: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    """
+    Gives the categorical columns of game history dataframes shared categories.
+
+    Categories are the sorted union of each frame's categories, as they
+    are after wrangle_games, so grouping by a categorical column keeps
+    giving groups in alphabetical order. Only frames whose categories
+    differ from the union are recoded, and they're shallow copied rather
+    than modified.
+
+    Args:
+        - frames [list]: a list of wrangled game history dataframes
+
+    Returns:
+        - A list of the frames with identical categories in each
+          categorical column
+    """
+
+    frames = list(frames)
+    for col, dtype in game_history_dtypes.items():
+        if dtype != "category" or not all(
+            col in frame and frame[col].dtype == "category" for frame in frames
+        ):
+            continue
+        categories = frames[0][col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame[col].cat.categories)
+        categories = categories.sort_values()
+        for i, frame in enumerate(frames):
+            if frame[col].cat.categories.equals(categories):
+                continue
+            frames[i] = frame.copy(deep=False)
+            frames[i][col] = frame[col].cat.set_categories(categories)
+    return frames
+
+
+def to_utc_timestamp(value) -> pd.Timestamp:
+    """
+    Converts a date string, datetime or timestamp to a UTC pd.Timestamp.
+
+    Naive values are assumed to be in UTC.
+    """
+
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classes.aggregate_cube import AggregateCube
+
+
+### Fixtures ###
+
+
+@pytest.fixture()
+def cube():
+    columns = {
+        "colour": pd.Categorical(["white", "black", "white", "white", "black"]),
+        "rated": np.array([True, True, False, True, True]),
+    }
+    results = np.array(["win", "loss", "draw", "win", "win"])
+    accuracies = np.array([80.0, np.nan, 60.0, 90.0, 70.0])
+    return AggregateCube(columns, results, accuracies)
+
+
+### Tests ###
+
+
+class TestAggregateCube:
+    @pytest.mark.it("Holds one cell per observed combination of dims")
+    def test_cells(self, cube):
+        assert cube.dims == ["colour", "rated"]
+        assert len(cube.cells) == 3
+        assert cube.cells["games"].sum() == 5
+        white_rated = cube.cells[
+            (cube.cells["colour"] == "white") & cube.cells["rated"]
+        ].iloc[0]
+        assert white_rated["wins"] == 2
+        assert white_rated["accuracy_sum"] == 170.0
+        assert white_rated["accuracy_count"] == 2
+
+    @pytest.mark.it("Rolls up measures by a subset of dims")
+    def test_rollup(self, cube):
+        output = cube.rollup(
+            {"colour": cube.cells["colour"]},
+            ["games_played", "win_pc", "draw_pc", "accuracy"],
+        )
+        assert output.index.name == "colour"
+        assert output.loc["white"].to_list() == [3, 66.7, 33.3, 76.67]
+        assert output.loc["black"].to_list() == [2, 50.0, 0.0, 70.0]
+
+    @pytest.mark.it("Rolls up only the masked cells")
+    def test_mask(self, cube):
+        output = cube.rollup(
+            {"colour": cube.cells["colour"]},
+            ["games_played"],
+            cube.cells["rated"].to_numpy(),
+        )
+        assert output["games_played"].to_dict() == {"black": 2, "white": 2}
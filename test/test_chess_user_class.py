@@ -1,31 +1,98 @@
+import shutil
 import sys
+from functools import partial
 from unittest.mock import patch
 from json import load
 from itertools import combinations
 
 import pytest
 import pandas as pd
+import numpy
 
 sys.modules.pop("classes.chess_user", None)
 
+
 def mock_streamlit_cache_data(func):
     """
     Mock of the st.cache_data decorator for testing purposes.
     """
+
     def wrapper(*args, **kwargs):
         return func(*args, **kwargs)
+
     return wrapper
 
+
 st_cache_patcher = patch("streamlit.cache_data", mock_streamlit_cache_data)
 
 st_cache_patcher.start()
 
 from classes.chess_user import ChessUser
+from classes.opponent_index import OpponentIndex
+from helpers.vars import wrangled_game_fields
+from helpers import pgn_store_helpers, storage_helpers
+from helpers.memo_helpers import clear_result_cache, result_cache
+from helpers.shared_cache_helpers import history_version
+from helpers.pgn_helpers import extract_pgn_headers
 
 
 # Fixtures
 
 
+@pytest.fixture(autouse=True)
+def no_shared_cache():
+    with patch("classes.chess_user.read_shared_history", return_value=None), patch(
+        "classes.chess_user.publish_shared_history"
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    clear_result_cache()
+    yield
+    clear_result_cache()
+
+
+@pytest.fixture(autouse=True)
+def tmp_pgn_store(tmp_path):
+    store_path = str(tmp_path / "pgn_store")
+    patches = [
+        patch(
+            f"classes.chess_user.{name}",
+            partial(getattr(pgn_store_helpers, name), store_path=store_path),
+        )
+        for name in [
+            "list_pgn_months",
+            "write_pgn_month",
+            "read_pgn",
+            "read_month_pgns",
+        ]
+    ]
+    for patcher in patches:
+        patcher.start()
+    yield store_path
+    for patcher in patches:
+        patcher.stop()
+
+
+@pytest.fixture(autouse=True)
+def tmp_raw_field_store(tmp_path):
+    store_path = str(tmp_path / "raw_fields")
+    patches = [
+        patch(
+            f"classes.chess_user.{name}",
+            partial(getattr(storage_helpers, name), store_path=store_path),
+        )
+        for name in ["list_raw_field_months", "write_raw_fields", "read_raw_fields"]
+    ]
+    for patcher in patches:
+        patcher.start()
+    yield store_path
+    for patcher in patches:
+        patcher.stop()
+
+
 @pytest.fixture()
 def profile():
     with open("test/test_data/test_aporian_profile.json", "r") as file:
@@ -189,6 +256,7 @@ class TestAddStats:
             output_rows = df.index.to_list()
             assert expected_rows == output_rows
 
+
 class TestWrangleGameHistory:
     @pytest.mark.it("Returns data frame")
     def test_returns_df(self, test_aporian_w_game_history):
@@ -205,7 +273,7 @@ class TestWrangleGameHistory:
     def test_df_columns(self, test_aporian_w_game_history):
         output = test_aporian_w_game_history.wrangle_game_history_df()
         cols = output.columns.tolist()
-        assert output.shape[1] == 14
+        assert output.shape[1] == 15
         assert cols == [
             "colour",
             "time_class",
@@ -221,8 +289,25 @@ class TestWrangleGameHistory:
             "accuracy",
             "op_accuracy",
             "url",
+            "uuid",
         ]
 
+    @pytest.mark.it("Applies compact schema to columns")
+    def test_df_dtypes(self, test_aporian_w_game_history):
+        output = test_aporian_w_game_history.wrangle_game_history_df()
+        assert output["eco"].dtype == "category"
+        assert output["opponent"].dtype == "category"
+        assert output["rating"].dtype == "int16"
+        assert output["accuracy"].dtype == "float32"
+        assert output["rated"].dtype == "bool"
+
+    @pytest.mark.it("Is indexed by sorted UTC end_time")
+    def test_df_time_index(self, test_aporian_w_game_history):
+        output = test_aporian_w_game_history.wrangle_game_history_df()
+        assert output.index.name == "end_time"
+        assert str(output.index.tz) == "UTC"
+        assert output.index.is_monotonic_increasing
+
     @pytest.mark.it("Adds game_history_df attribute to object")
     def test_adds_game_df(self, test_aporian_w_game_history):
         assert "game_history_df" not in dir(test_aporian_w_game_history)
@@ -231,6 +316,532 @@ class TestWrangleGameHistory:
         assert isinstance(test_aporian_w_game_history.game_history_df, pd.DataFrame)
 
 
+class TestGameHistoryStore:
+    @pytest.mark.it("load_stored_game_history returns False if nothing is stored")
+    @patch("classes.chess_user.read_game_history_store", return_value=None)
+    def test_load_nothing_stored(self, mock_read, TestAporian):
+        assert TestAporian.load_stored_game_history() is False
+        assert "game_history_df" not in dir(TestAporian)
+
+    @pytest.mark.it("load_stored_game_history sets game_history_df from the store")
+    @patch("classes.chess_user.list_stored_months", return_value=["2024-12"])
+    @patch("classes.chess_user.read_game_history_store")
+    def test_load_stored(self, mock_read, mock_months, TestAporian):
+        mock_read.return_value = pd.DataFrame({"rating": [1500], "uuid": ["a"]})
+        assert TestAporian.load_stored_game_history(columns=["rating", "uuid"])
+        mock_read.assert_called_once_with("Aporian", columns=["rating", "uuid"])
+        assert TestAporian.game_history_df.equals(mock_read.return_value)
+        assert TestAporian.last_month == "2024-12"
+        assert TestAporian.seen_uuids == {"a"}
+
+    @pytest.mark.it("load_stored_game_history reads the shared cache first")
+    @patch("classes.chess_user.list_stored_months", return_value=["2024-12"])
+    @patch("classes.chess_user.read_game_history_store")
+    @patch("classes.chess_user.read_shared_history")
+    def test_load_shared(self, mock_shared, mock_read, mock_months, TestAporian):
+        mock_shared.return_value = pd.DataFrame({"rating": [1500], "uuid": ["a"]})
+        assert TestAporian.load_stored_game_history()
+        mock_read.assert_not_called()
+        assert TestAporian.game_history_df.equals(mock_shared.return_value)
+
+    @pytest.mark.it("load_stored_game_history ignores the shared cache if not stored")
+    @patch("classes.chess_user.list_stored_months", return_value=[])
+    @patch("classes.chess_user.read_shared_history")
+    def test_load_shared_not_stored(self, mock_shared, mock_months, TestAporian):
+        mock_shared.return_value = pd.DataFrame({"rating": [1500], "uuid": ["a"]})
+        assert TestAporian.load_stored_game_history() is False
+        assert "game_history_df" not in dir(TestAporian)
+
+    @pytest.mark.it("load_stored_game_history publishes a full store read")
+    @patch("classes.chess_user.publish_shared_history")
+    @patch("classes.chess_user.list_stored_months", return_value=["2024-12"])
+    @patch("classes.chess_user.read_game_history_store")
+    def test_publishes_store(self, mock_read, mock_months, mock_publish, TestAporian):
+        mock_read.return_value = pd.DataFrame({"rating": [1500], "uuid": ["a"]})
+        TestAporian.load_stored_game_history()
+        mock_publish.assert_called_once_with("Aporian", mock_read.return_value)
+        mock_publish.reset_mock()
+        TestAporian.load_stored_game_history(columns=["rating", "uuid"])
+        mock_publish.assert_not_called()
+
+    @pytest.mark.it("update_game_history_store only fetches months from latest stored")
+    @patch("classes.chess_user.read_game_history_store")
+    @patch("classes.chess_user.write_month_partition")
+    @patch("classes.chess_user.get_game_history_by_month")
+    @patch("classes.chess_user.get_archives")
+    @patch("classes.chess_user.list_stored_months")
+    def test_update_store(
+        self,
+        mock_months,
+        mock_archives,
+        mock_by_month,
+        mock_write,
+        mock_read,
+        test_aporian_w_game_history,
+        tmp_pgn_store,
+        tmp_raw_field_store,
+    ):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:10]
+        stored_df = user.wrangle_game_history_df()
+        user.last_month = "2024-11"
+        base = "https://api.chess.com/pub/player/aporian/games/"
+        mock_months.return_value = ["2024-10", "2024-11"]
+        mock_archives.return_value = [
+            base + "2024/10",
+            base + "2024/11",
+            base + "2024/12",
+        ]
+        mock_by_month.return_value = {
+            "2024-11": games[:15],
+            "2024-12": games[15:20],
+        }
+        mock_read.return_value = stored_df
+        output = user.update_game_history_store()
+        mock_by_month.assert_called_once_with(
+            "Aporian",
+            [base + "2024/11", base + "2024/12"],
+            wrangled_game_fields | {"pgn", "tcn", "initial_setup"},
+        )
+        written_months = [c.args[1] for c in mock_write.call_args_list]
+        assert written_months == ["2024-11", "2024-12"]
+        assert mock_write.call_args_list[0].args[2].shape[0] == 15
+        assert output["uuid"].to_list() == [game["uuid"] for game in games[:20]]
+        assert user.last_month == "2024-12"
+        assert pgn_store_helpers.read_month_pgns(
+            "Aporian", "2024-12", store_path=tmp_pgn_store
+        ) == {game["uuid"]: game["pgn"] for game in games[15:20]}
+        stored = storage_helpers.read_raw_fields(
+            "Aporian", ["2024-12"], store_path=tmp_raw_field_store
+        )
+        assert stored["tcn"].to_dict() == {
+            game["uuid"]: game["tcn"] for game in games[15:20]
+        }
+
+
+class TestSlimIngest:
+    @pytest.mark.it("Frees the raw games once wrangled")
+    def test_frees_raw_games(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        user.slim = True
+        user.wrangle_game_history_df()
+        assert user.game_history is None
+        assert user.game_history_df.shape[0] == 828
+
+    @pytest.mark.it("Keeps moves in the raw field side-store instead of re-fetching")
+    @patch("classes.chess_user.get_game_history_by_month")
+    def test_raw_field_store(self, mock_by_month, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = {game["url"]: game for game in user.game_history}
+        user.slim = True
+        user.wrangle_game_history_df()
+        for field in ["tcn", "initial_setup"]:
+            output = user.get_raw_game_field(field)
+            assert output == [games[url][field] for url in user.game_history_df["url"]]
+        mock_by_month.assert_not_called()
+
+    @pytest.mark.it("Fetches months missing from the raw field store once")
+    @patch("classes.chess_user.get_game_history_by_month")
+    @patch("classes.chess_user.get_archives")
+    def test_fetches_missing_raw_fields(
+        self,
+        mock_archives,
+        mock_by_month,
+        test_aporian_w_game_history,
+        tmp_raw_field_store,
+    ):
+        user = test_aporian_w_game_history
+        games = user.game_history[-3:]
+        user.game_history = games
+        user.slim = True
+        user.wrangle_game_history_df()
+        shutil.rmtree(tmp_raw_field_store)
+        months = sorted(set(user.game_history_df.index.strftime("%Y-%m")))
+        base = "https://api.chess.com/pub/player/aporian/games/"
+        mock_archives.return_value = [base + "2008/12"] + [
+            base + month.replace("-", "/") for month in months
+        ]
+        mock_by_month.return_value = {
+            months[0]: [
+                {key: game[key] for key in ["uuid", "tcn", "initial_setup"]}
+                for game in games
+            ]
+        }
+        output = user.get_raw_game_field("tcn")
+        assert user.get_raw_game_field("tcn") == output
+        mock_by_month.assert_called_once()
+        urls, fields = mock_by_month.call_args.args[1:]
+        assert urls == [base + month.replace("-", "/") for month in months]
+        assert fields == {"uuid", "tcn", "initial_setup"}
+        assert output == [
+            {game["url"]: game["tcn"] for game in games}[url]
+            for url in user.game_history_df["url"]
+        ]
+        assert user.game_history is None
+
+    @pytest.mark.it("get_game_field re-fetches only the game's month")
+    @patch("classes.chess_user.get_game_history_by_month")
+    @patch("classes.chess_user.get_archives")
+    def test_game_field(
+        self, mock_archives, mock_by_month, test_aporian_w_game_history
+    ):
+        user = test_aporian_w_game_history
+        game = user.game_history[0]
+        user.slim = True
+        user.wrangle_game_history_df()
+        base = "https://api.chess.com/pub/player/aporian/games/"
+        mock_archives.return_value = [base + "2008/12", base + "2024/12"]
+        mock_by_month.return_value = {"2008-12": [{"url": game["url"], "tcn": "x"}]}
+        assert user.get_game_field(game["url"], "tcn") == "x"
+        assert mock_by_month.call_args.args[1] == [base + "2008/12"]
+        assert user.get_game_field("not a url", "tcn") is None
+
+    @pytest.mark.it("Keeps PGNs in the side-store instead of re-fetching them")
+    @patch("classes.chess_user.get_game_history_by_month")
+    def test_pgn_side_store(self, mock_by_month, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        pgns = {game["url"]: game["pgn"] for game in user.game_history}
+        user.slim = True
+        user.wrangle_game_history_df()
+        url = user.game_history_df["url"].iloc[100]
+        assert user.get_game_field(url, "pgn") == pgns[url]
+        output = user.get_raw_game_field("pgn")
+        assert output == [pgns[url] for url in user.game_history_df["url"]]
+        mock_by_month.assert_not_called()
+
+
+class TestWrangleNewGames:
+    @pytest.mark.it("Only wrangles and appends games with unseen uuids")
+    def test_skips_seen_games(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:100]
+        user.wrangle_game_history_df()
+        output = user.wrangle_new_games({"2024-12": games[50:150]})
+        assert output["2024-12"].shape[0] == 50
+        assert user.game_history_df.shape[0] == 150
+        assert user.game_history_df["uuid"].is_unique
+
+    @pytest.mark.it("Updates accuracy stats incrementally")
+    def test_incremental_accuracy_stats(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        user.add_accuracy_stats()
+        user.wrangle_new_games({"2024-12": games[400:]})
+        incremental = (user.avg_accuracy, user.highest_accuracy, user.lowest_accuracy)
+        user.add_accuracy_stats()
+        full = (user.avg_accuracy, user.highest_accuracy, user.lowest_accuracy)
+        assert incremental == full
+
+    @pytest.mark.it("Merges new games into an existing position index")
+    def test_incremental_position_index(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        user.get_position_index()
+        user.game_history = games
+        user.wrangle_new_games({"2024-12": games[400:]})
+        incremental = user.position_index
+        assert incremental is not None
+        full = ChessUser.build_position_index.__wrapped__(user)
+        assert len(incremental) == len(full)
+        assert (incremental.hashes == full.hashes).all()
+
+    @pytest.mark.it("Extends the position index memoized by another instance")
+    @patch("classes.chess_user.get_profile")
+    def test_shared_position_index(self, mock_profile, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        old_index = user.get_position_index()
+        n_old = len(old_index)
+        other = ChessUser("aporian")
+        other.game_history = games
+        other.game_history_df = user.game_history_df
+        other.seen_uuids = set(user.seen_uuids)
+        with patch.object(other, "get_raw_games") as mock_raw_games:
+            other.wrangle_new_games({"2024-12": games[400:]})
+        mock_raw_games.assert_not_called()
+        assert len(old_index) == n_old
+        assert len(other.position_index) > n_old
+        assert other.get_position_index() is other.position_index
+        another = ChessUser("aporian")
+        another.game_history_df = other.game_history_df
+        assert another.get_position_index() is other.position_index
+
+    @pytest.mark.it("Extends existing top-k indexes with the new games")
+    def test_incremental_top_k(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        top_k_index = user.get_top_k_index("accuracy")
+        user.wrangle_new_games({"2024-12": games[400:]})
+        assert user.get_top_k_index("accuracy") is top_k_index
+        incremental = user.get_top_k("accuracy", 50)
+        user.top_k_indexes = {}
+        full = user.get_top_k("accuracy", 50)
+        assert incremental["accuracy"].to_list() == full["accuracy"].to_list()
+
+
+class TestPgnHeaderColumns:
+    @pytest.mark.it("Common headers are derived columns read from the PGNs")
+    def test_default_headers(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        termination = user.get_column("termination")
+        assert termination.index.equals(user.game_history_df.index)
+        assert termination.str.contains(" won | drawn").all()
+        assert "termination" not in user.game_history_df.columns
+
+    @pytest.mark.it("Elo columns are numeric and match the player ratings")
+    def test_elo_numeric(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        white = df["colour"] == "white"
+        assert (user.get_column("white_elo")[white] == df["rating"][white]).all()
+
+    @pytest.mark.it("Registers derived columns for other headers")
+    @patch("classes.chess_user.ChessUser.derived_columns", new_callable=dict)
+    def test_register(self, mock_columns, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        names = user.register_pgn_header_columns(["UTCDate", "ECOUrl"])
+        assert names == ["utc_date", "eco_url"]
+        assert user.get_column("utc_date").notna().all()
+
+    @pytest.mark.it("Header columns don't shadow raw game fields")
+    @patch("classes.chess_user.ChessUser.derived_columns", new_callable=dict)
+    def test_no_shadowing(self, mock_columns, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        names = user.register_pgn_header_columns(["StartTime", "Event"])
+        assert names == ["start_clock", "event"]
+        assert user.register_pgn_header_columns(["TimeControl"]) == [
+            "time_control_header"
+        ]
+
+    @pytest.mark.it("Parses the PGNs once for all header columns")
+    def test_parsed_once(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        with patch(
+            "classes.chess_user.extract_pgn_headers", wraps=extract_pgn_headers
+        ) as mock_extract:
+            user.get_column("termination")
+            user.get_column("white_elo")
+            user.get_column("end_date")
+        assert mock_extract.call_count == 1
+
+    @pytest.mark.it("Header columns are dropped when the history changes")
+    def test_cache_cleared(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        user.get_column("termination")
+        assert "termination" in user.derived_column_cache
+        user.wrangle_game_history_df()
+        assert "termination" not in user.derived_column_cache
+
+
+class TestTimeRangeQueries:
+    @pytest.mark.it("get_games_between returns games in inclusive window")
+    def test_games_between(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.get_games_between("2024-11-01", "2024-11-30 23:59:59")
+        index = user.game_history_df.index
+        expected = (index >= "2024-11-01") & (index <= "2024-11-30 23:59:59")
+        assert output.shape[0] == expected.sum() > 0
+        assert output.index.min() >= pd.Timestamp("2024-11-01", tz="UTC")
+
+    @pytest.mark.it("get_games_between with no bounds returns all games")
+    def test_games_between_unbounded(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        assert user.get_games_between().shape == user.game_history_df.shape
+
+    @pytest.mark.it("get_recent_games returns games from the last n days")
+    def test_recent_games(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        assert user.get_recent_games(days=30).empty
+        assert user.get_recent_games(days=365 * 100).shape[0] == len(
+            user.game_history_df
+        )
+
+    @pytest.mark.it("query_game_history only aggregates games in the time window")
+    def test_query_window(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.query_game_history(
+            "url", ["time_class"], start="2024-12-01", end="2024-12-31"
+        )
+        window = user.get_games_between("2024-12-01", "2024-12-31")
+        assert output["games_played"].sum() == window.shape[0]
+
+
+class TestGameMoves:
+    @pytest.mark.it("get_game_moves parses moves for every game and caches them")
+    @patch("classes.chess_user.GameMoves.from_pgns")
+    def test_cached(self, mock_from_pgns, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        assert user.get_game_moves() is user.get_game_moves()
+        assert mock_from_pgns.call_count == 1
+        assert len(mock_from_pgns.call_args.args[0]) == len(user.game_history_df)
+
+    @pytest.mark.it("get_game_moves aligns games with game_history_df rows")
+    def test_aligned(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        moves = user.get_game_moves()
+        last = user.game_history_df["url"].iloc[-1]
+        game = next(g for g in user.game_history if g["url"] == last)
+        assert moves.ply_counts()[-1] == len(game["tcn"]) // 2
+
+    @pytest.mark.it("get_tcn_moves ply counts match PGN move counts")
+    def test_tcn_moves(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        tcn_counts = user.get_tcn_moves().ply_counts()
+        pgn_counts = user.get_game_moves().ply_counts()
+        assert (tcn_counts == pgn_counts).all()
+        assert user.get_tcn_moves() is user.get_tcn_moves()
+
+    @pytest.mark.it("get_opening_sequences returns first n plies as UCI strings")
+    def test_opening_sequences(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.get_opening_sequences(2)
+        assert output.index.equals(test_aporian_w_game_history_df.game_history_df.index)
+        assert output.iloc[-1] == "c2c4 b7b6"
+
+    @pytest.mark.it("get_time_management_stats returns phases and time trouble")
+    def test_time_management(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.get_time_management_stats()
+        assert output.columns.to_list() == [
+            "opening",
+            "middlegame",
+            "endgame",
+            "time_trouble_pc",
+        ]
+        assert "daily" not in output.index
+        assert set(output.index) == {"blitz", "bullet", "rapid"}
+        assert (output >= 0).all().all()
+
+    @pytest.mark.it("get_opening_tree counts every game at the root and is cached")
+    def test_opening_tree(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        tree = user.get_opening_tree()
+        assert tree is user.get_opening_tree()
+        assert tree.games[0].sum() == len(user.game_history_df)
+        first_moves = user.get_opening_sequences(1).value_counts().drop("")
+        assert tree.children()["games_played"].to_dict() == first_moves.to_dict()
+
+    @pytest.mark.it("get_opening_tree is shared by instances with the same history")
+    @patch("classes.chess_user.get_profile")
+    def test_opening_tree_shared(self, mock_profile, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        tree = user.get_opening_tree()
+        other = ChessUser("aporian", slim=True)
+        other.game_history_df = user.game_history_df
+        with patch.object(other, "get_raw_game_field") as mock_field:
+            assert other.get_opening_tree() is tree
+        mock_field.assert_not_called()
+
+    @pytest.mark.it("get_position_stats counts each game once per position")
+    def test_position_stats(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.get_position_stats(
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+        )
+        standard_urls = [
+            game["url"] for game in user.game_history if not game["initial_setup"]
+        ]
+        standard = user.game_history_df["url"].isin(standard_urls)
+        assert output["games_played"].sum() == standard.sum()
+        assert output.columns.to_list() == [
+            "games_played",
+            "win_pc",
+            "draw_pc",
+            "loss_pc",
+        ]
+
+    @pytest.mark.it("get_common_positions describes positions by their moves")
+    def test_common_positions(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.get_common_positions(4, 5)
+        assert len(output) == 5
+        assert output["games_played"].is_monotonic_decreasing
+        assert all(len(moves.split()) >= 4 for moves in output.index)
+
+
+class TestDerivedColumns:
+    @pytest.mark.it("Computes derived columns on first access and caches them")
+    @patch("classes.chess_user.ChessUser.derived_columns", new_callable=dict)
+    def test_lazy_and_cached(self, mock_registry, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        calls = []
+
+        def double_rating(rating):
+            calls.append(1)
+            return rating * 2
+
+        user.register_derived_column("double_rating", ("rating",), double_rating)
+        assert calls == []
+        first = user.get_column("double_rating")
+        assert user.get_column("double_rating") is first
+        assert calls == [1]
+        assert (first == user.game_history_df["rating"] * 2).all()
+
+    @pytest.mark.it("Drops cached derived columns when the history changes")
+    def test_cache_cleared(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        user.get_column("hour")
+        user.wrangle_game_history_df()
+        assert user.derived_column_cache == {}
+
+    @pytest.mark.it("Derives columns aligned with game_history_df")
+    def test_aligned(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        assert user.get_column("hour").index.equals(df.index)
+        assert (user.get_column("hour") == df.index.hour).all()
+        assert (user.get_column("ply_count") == user.get_tcn_moves().ply_counts()).all()
+
+    @pytest.mark.it("query_game_history accepts registered columns as dimensions")
+    def test_query_dims(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.query_game_history("url", ["weekday", "colour"])
+        assert output.index.names == ["weekday", "colour"]
+        assert output["games_played"].sum() == len(user.game_history_df)
+        output = user.query_game_history("result", ["base_time"], rated_only=True)
+        assert 600 in output.index
+
+    @pytest.mark.it("Reads raw game fields of the archive schema")
+    def test_raw_field(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.get_column("fen")
+        last = user.game_history_df["url"].iloc[-1]
+        game = next(g for g in user.game_history if g["url"] == last)
+        assert output.iloc[-1] == game["fen"]
+
+    @pytest.mark.it("Raises a KeyError for unknown names without reading raw games")
+    def test_unknown_name(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        with patch.object(user, "get_raw_game_field") as mock_field:
+            with pytest.raises(KeyError):
+                user.get_column("termiantion")
+        mock_field.assert_not_called()
+
+
+class TestOpeningRollups:
+    @pytest.mark.it("query_game_history groups openings by family")
+    def test_family_dim(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        families = user.query_game_history("url", ["opening_family"])
+        ecos = user.query_game_history("url", ["eco"])
+        assert families["games_played"].sum() == ecos["games_played"].sum()
+        assert len(families) < len(ecos)
+        assert "Sicilian-Defense" in families.index
+
+    @pytest.mark.it("Keeps eco stored as integer category codes")
+    def test_eco_codes(self, test_aporian_w_game_history_df):
+        eco = test_aporian_w_game_history_df.game_history_df["eco"]
+        assert isinstance(eco.dtype, pd.CategoricalDtype)
+        assert eco.cat.codes.dtype.kind == "i"
+
+
 class TestAddAccuracyStats:
     @pytest.mark.it("Returns None")
     def test_returns_none(self, test_aporian_w_game_history_df):
@@ -309,9 +920,7 @@ class TestQueryGameHistory:
 
     @pytest.mark.it("If 'url' selected as fact, df has games_played column")
     def test_df_has_result_cols(self, test_aporian_w_game_history_df):
-        output = test_aporian_w_game_history_df.query_game_history(
-            "url", ["op_rating"]
-        )
+        output = test_aporian_w_game_history_df.query_game_history("url", ["op_rating"])
         expected = ["games_played"]
         assert output.columns.to_list() == expected
 
@@ -347,10 +956,411 @@ class TestQueryGameHistory:
                 )
                 assert True
 
+    @pytest.mark.it("Only returns observed combinations of categorical dimensions")
+    def test_observed_only(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.query_game_history(
+            "url", ["eco", "colour"]
+        )
+        assert (output["games_played"] > 0).all()
+
+    @pytest.mark.it("Result percentages sum to 100")
+    def test_result_pcs(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.query_game_history(
+            "result", ["time_class"]
+        )
+        totals = output.sum(axis=1)
+        assert ((totals - 100).abs() <= 0.2).all()
+
+
+class TestQuery:
+    @pytest.mark.it("Computes several measures in one df")
+    def test_measures(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        measures = ["games_played", "accuracy", "win_pc", "draw_pc", "loss_pc"]
+        output = user.query(measures, ["eco", "colour"])
+        assert output.columns.to_list() == measures
+        counts = user.query_game_history("url", ["eco", "colour"])
+        assert (
+            output["games_played"]
+            .sort_index()
+            .equals(counts["games_played"].sort_index())
+        )
+        accuracies = user.query_game_history("accuracy", ["eco", "colour"])
+        assert output.loc[accuracies.index, "accuracy"].equals(accuracies["accuracy"])
+
+    @pytest.mark.it("Applies filters")
+    def test_filters(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        output = user.query(
+            ["games_played"],
+            ["colour"],
+            filters={"rated": True, "time_class": ["blitz", "rapid"]},
+        )
+        expected = df["rated"] & df["time_class"].isin(["blitz", "rapid"])
+        assert output["games_played"].sum() == expected.sum()
+
+    @pytest.mark.it("Computes rating differential stats")
+    def test_rating_diff(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        output = user.query(["rating_diff_min", "rating_diff_max"], ["time_class"])
+        grouped = df.groupby("time_class", observed=True)["rating_differential"]
+        assert (output["rating_diff_min"] == grouped.min()).all()
+        assert (output["rating_diff_max"] == grouped.max()).all()
+
+    @pytest.mark.it("Sorts and limits the rows")
+    def test_sort_limit(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.query(
+            ["win_pc"], ["opponent"], sort="win_pc", ascending=True, limit=5
+        )
+        assert len(output) == 5
+        assert output["win_pc"].is_monotonic_increasing
+
+    @pytest.mark.it("Answers from the aggregate cube as a full scan would")
+    def test_cube(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        measures = ["games_played", "win_pc", "loss_pc", "accuracy"]
+        for dims in [["eco", "colour"], ["op_rating", "rated"], ["opening_family"]]:
+            output = user.query_cube(measures, dims, {"time_class": ["blitz"]})
+            expected = user.scan_query(measures, dims, {"time_class": ["blitz"]})
+            pd.testing.assert_frame_equal(output, expected)
+
+    @pytest.mark.it("Falls back to a scan for columns outside the cube")
+    def test_cube_fallback(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        assert user.query_cube(["games_played"], ["opponent"]) is None
+        assert user.query_cube(["games_played"], ["weekday"]) is None
+        assert user.query_cube(["rating_diff_max"], ["eco"]) is None
+        assert user.query_cube(["games_played"], ["eco"], {"op_rating": 1000}) is None
+        assert user.query(["games_played"], ["opponent"])["games_played"].sum() == 828
+
+    @pytest.mark.it("Builds the aggregate cube once")
+    def test_cube_cached(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        cube = user.get_aggregate_cube()
+        user.query(["games_played"], ["eco"])
+        assert user.get_aggregate_cube() is cube
+        assert len(cube.cells) < len(user.game_history_df)
+
+    @pytest.mark.it("Shares the aggregate cube between instances with the same history")
+    @patch("classes.chess_user.get_profile")
+    def test_cube_shared(self, mock_profile, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        cube = user.get_aggregate_cube()
+        other = ChessUser("aporian")
+        other.game_history_df = user.game_history_df
+        with patch("classes.chess_user.AggregateCube") as mock_cube:
+            assert other.get_aggregate_cube() is cube
+            other.query(["games_played"], ["colour"])
+        mock_cube.assert_not_called()
+
+    @pytest.mark.it("Doesn't copy game_history_df")
+    def test_no_copy(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        user.get_aggregate_cube()
+        start = user.game_history_df.index[1]
+        with patch.object(pd.DataFrame, "copy", side_effect=AssertionError):
+            user.query(["games_played", "accuracy"], ["eco"], {"rated": True})
+            user.query(["games_played"], ["eco"], {"rated": True}, start=start)
+
+
+class TestOpponentIndex:
+    @pytest.mark.it("Matches grouping the history by opponent")
+    def test_stats(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        index = user.get_opponent_index()
+        expected = user.query(
+            ["games_played", "win_pc", "draw_pc", "loss_pc", "accuracy"], ["opponent"]
+        )
+        output = index.stats([index.ids[name] for name in expected.index])
+        assert output.index.to_list() == expected.index.to_list()
+        assert numpy.allclose(
+            output[expected.columns].to_numpy(dtype=float),
+            expected.to_numpy(dtype=float),
+            equal_nan=True,
+        )
+
+    @pytest.mark.it("Looks up one opponent's aggregates and games")
+    def test_lookup(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        opponent = df["opponent"].value_counts().index[0]
+        games = df[df["opponent"] == opponent]
+        output = user.get_opponent_stats(opponent)
+        assert output["games_played"] == len(games)
+        assert output["rating_diff_max"] == games["rating_differential"].max()
+        assert output["op_accuracy"] == round(
+            games["op_accuracy"].astype(float).mean(), 2
+        )
+        assert user.get_opponent_games(opponent)["uuid"].equals(games["uuid"])
+        assert user.get_opponent_stats("not an opponent") is None
+        assert user.get_opponent_games("not an opponent").empty
+
+    @pytest.mark.it("Ranks the most played opponents")
+    def test_most_played(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.get_most_played_opponents(5)
+        expected = user.game_history_df["opponent"].value_counts().head(5)
+        assert output["games_played"].to_list() == expected.to_list()
+
+    @pytest.mark.it("Is extended with new games without changing the old index")
+    def test_incremental(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        index = user.get_opponent_index()
+        n_old = index.games.sum()
+        with patch.object(OpponentIndex, "__init__") as mock_init:
+            user.wrangle_new_games({"2024-12": games[400:]})
+        mock_init.assert_not_called()
+        assert index.games.sum() == n_old
+        incremental = user.get_opponent_index()
+        full = ChessUser.build_opponent_index.__wrapped__(user)
+        assert incremental.names == full.names
+        pd.testing.assert_frame_equal(
+            incremental.most_played(20).sort_index(),
+            full.most_played(20).sort_index(),
+            check_exact=False,
+        )
+        assert all(
+            (incremental.rows[i] == full.rows[i]).all() for i in range(len(full.names))
+        )
+
+    @pytest.mark.it("Is shared by instances with the same history")
+    @patch("classes.chess_user.get_profile")
+    def test_shared(self, mock_profile, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        most_played = user.get_most_played_opponents()
+        other = ChessUser("aporian")
+        other.game_history_df = user.game_history_df
+        assert other.get_opponent_index() is user.get_opponent_index()
+        assert other.get_most_played_opponents() is most_played
+
+
+class TestRollingForm:
+    @pytest.mark.it("Computes rolling form per time class")
+    def test_rolling_form(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        blitz = df[df["time_class"] == "blitz"]
+        output = user.get_rolling_form("blitz", games=10)
+        assert output.index.equals(blitz.index)
+        wins = (blitz["result"] == "win") * 100.0
+        expected = wins.rolling(10, min_periods=1).mean().round(1)
+        assert output["win_pc"].to_list() == expected.to_list()
+        assert user.get_rolling_form("blitz", games=10) is output
+
+    @pytest.mark.it("Returns an empty df for a time class without games")
+    def test_no_games(self, test_aporian_w_game_history_df):
+        output = test_aporian_w_game_history_df.get_rolling_form("nope", days=7)
+        assert output.empty
+
+    @pytest.mark.it("Is extended with new games")
+    def test_incremental(self, test_aporian_w_game_history):
+        user = test_aporian_w_game_history
+        games = user.game_history
+        user.game_history = games[:400]
+        user.wrangle_game_history_df()
+        blitz = user.get_rolling_stats("blitz")
+        user.wrangle_new_games({"2024-12": games[400:]})
+        assert user.get_rolling_stats("blitz") is blitz
+        incremental = user.get_rolling_form("blitz", days=30)
+        user.rolling_stats = {}
+        pd.testing.assert_frame_equal(
+            incremental, user.get_rolling_stats("blitz").compute(days=30)
+        )
+
+
+class TestHistoryPages:
+    @pytest.mark.it("Returns one page sorted by a column")
+    def test_sorted_page(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        page, n_rows = user.get_history_page(2, 20, "rating", ascending=True)
+        expected = df.sort_values("rating", kind="stable").iloc[40:60]
+        assert n_rows == len(df)
+        assert page["uuid"].to_list() == expected["uuid"].to_list()
+
+    @pytest.mark.it("Defaults to newest first")
+    def test_default(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        page, _ = user.get_history_page()
+        assert len(page) == 50
+        assert page.index.is_monotonic_decreasing
+        assert page.index[0] == user.game_history_df.index[-1]
+
+    @pytest.mark.it("Sorts missing values last in both directions")
+    def test_missing_last(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        for ascending in [True, False]:
+            order = user.get_history_order("accuracy", ascending)
+            accuracies = user.game_history_df["accuracy"].to_numpy()[order]
+            known = accuracies[~numpy.isnan(accuracies)]
+            assert numpy.isnan(accuracies[len(known) :]).all()
+            assert (numpy.diff(known) >= 0).all() == ascending
+
+    @pytest.mark.it("Filters the view")
+    def test_filters(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        filters = {"time_class": ["blitz"], "result": ["win", "draw"]}
+        page, n_rows = user.get_history_page(0, 1000, "op_rating", False, filters)
+        expected = df[(df["time_class"] == "blitz") & (df["result"] != "loss")]
+        assert n_rows == len(page) == len(expected)
+        assert page["op_rating"].is_monotonic_decreasing
+
+    @pytest.mark.it("Computes each column's sort permutation once")
+    def test_cached_permutation(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        order, _ = user.get_sort_permutation("op_rating")
+        user.get_history_page(1, sort_by="op_rating", ascending=True)
+        assert user.get_sort_permutation("op_rating")[0] is order
+
+
+class TestGetRatingOhlc:
+    @pytest.mark.it("Rolls up a time class's ratings per period")
+    def test_rating_ohlc(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        blitz = df[df["time_class"] == "blitz"]["rating"]
+        output = user.get_rating_ohlc("blitz", "month")
+        expected = blitz.groupby(blitz.index.strftime("%Y-%m"))
+        assert output["games_played"].to_list() == expected.size().to_list()
+        assert output["high"].to_list() == expected.max().to_list()
+        assert output["close"].to_list() == expected.last().to_list()
+        months = expected.size().index.to_list()
+        assert output.index.strftime("%Y-%m").to_list() == months
+
+    @pytest.mark.it("Only includes games from the last n days")
+    def test_days(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        latest, time_class = df.index[-1], df["time_class"].iloc[-1]
+        start = latest.normalize() - pd.Timedelta(days=30)
+        with patch("pandas.Timestamp.now", return_value=latest):
+            output = user.get_rating_ohlc(time_class, "day", days=30)
+        window = df[(df.index >= start) & (df["time_class"] == time_class)]
+        assert output["games_played"].sum() == len(window) > 0
+        assert (output.index >= start).all()
+
+
+class TestResultCache:
+    @pytest.mark.it("Returns the cached result for repeated queries")
+    def test_hit(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        output = user.query(["games_played"], ["eco"], {"rated": True})
+        counts = user.query_game_history("url", ["eco"])
+        with patch.object(user, "query_cube") as mock_cube, patch.object(
+            user, "scan_query"
+        ) as mock_scan:
+            assert user.query(["games_played"], ["eco"], {"rated": True}) is output
+            assert user.query_game_history("url", ["eco"]) is counts
+        mock_cube.assert_not_called()
+        mock_scan.assert_not_called()
+
+    @pytest.mark.it("Shares results between instances for the same user")
+    @patch("classes.chess_user.get_profile")
+    def test_shared(self, mock_profile, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        other = ChessUser("aporian")
+        other.game_history_df = user.game_history_df
+        assert other.get_top_10("accuracy") is user.get_top_10("accuracy")
+
+    @pytest.mark.it("Case variants of the username share results for one history")
+    @patch("classes.chess_user.get_profile")
+    def test_username_case(
+        self, mock_profile, test_aporian_w_game_history_df, aporian_game_history
+    ):
+        user = test_aporian_w_game_history_df
+        output = user.query(["games_played"], ["colour"])
+        other = ChessUser("aporian")
+        other.game_history = aporian_game_history
+        other.wrangle_game_history_df()
+        pd.testing.assert_frame_equal(other.game_history_df, user.game_history_df)
+        assert other.query(["games_played"], ["colour"]) is output
+        assert output["games_played"].to_dict() == {"white": 431, "black": 397}
+
+    @pytest.mark.it("Misses once the game history changes")
+    def test_invalidated(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        before = user.query(["games_played"], ["colour"])
+        user.game_history_df = user.game_history_df.iloc[:-10]
+        user.clear_history_caches()
+        after = user.query(["games_played"], ["colour"])
+        assert after["games_played"].sum() == before["games_played"].sum() - 10
+
+    @pytest.mark.it("Computes the data version once per game_history_df")
+    @patch("classes.chess_user.history_version", wraps=history_version)
+    def test_data_version(self, mock_version, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        version = user.data_version()
+        assert user.data_version() == version
+        assert mock_version.call_count == 1
+        user.game_history_df = user.game_history_df.iloc[:-1]
+        assert user.data_version() != version
+        assert mock_version.call_count == 2
+
+    @pytest.mark.it("Keys get_current_v_best on the stats")
+    def test_stats_version(self, TestAporianStatsAdded):
+        user = TestAporianStatsAdded
+        output = user.get_current_v_best()
+        assert user.get_current_v_best() is output
+        user.stats = {"chess_blitz": {"last": {"rating": 1}, "best": {"rating": 2}}}
+        assert user.get_current_v_best().loc["blitz"].to_list() == [1, 2]
+
+    @pytest.mark.it("Evicts the least recently used results")
+    def test_lru(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        with patch("helpers.memo_helpers.result_cache_size", 2):
+            first = user.query(["games_played"], ["eco"])
+            user.query(["games_played"], ["colour"])
+            user.query(["games_played"], ["eco"])
+            user.query(["games_played"], ["rated"])
+            assert len(result_cache) == 2
+            assert user.query(["games_played"], ["eco"]) is first
+
+
 class TestGetTop10:
     @pytest.mark.it("Returns data frame")
     def test_returns_df(self, test_aporian_w_game_history_df):
         output = test_aporian_w_game_history_df.get_top_10("rating_differential")
         assert isinstance(output, pd.DataFrame)
 
-st_cache_patcher.stop()
\ No newline at end of file
+    @pytest.mark.it("Returns the 10 best rated wins")
+    def test_top_10(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        wins = df[(df["result"] == "win") & df["rated"]]
+        output = user.get_top_10("accuracy")
+        expected = wins["accuracy"].sort_values(ascending=False).head(10)
+        assert output["accuracy"].to_list() == expected.to_list()
+        assert (output["result"] == "win").all() and output["rated"].all()
+        output = user.get_top_10("rating_differential", asc=True, rated_only=False)
+        expected = df[df["result"] == "win"]["rating_differential"].nsmallest(10)
+        assert output["rating_differential"].to_list() == expected.to_list()
+
+
+class TestGetTopK:
+    @pytest.mark.it("Returns any number of wins filtered by time class")
+    def test_top_k(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        df = user.game_history_df
+        wins = df[(df["result"] == "win") & df["time_class"].isin(["blitz", "daily"])]
+        for k in [1, 25, 1000]:
+            output = user.get_top_k(
+                "rating_differential", k, time_classes=["blitz", "daily"]
+            )
+            expected = wins["rating_differential"].nlargest(k)
+            assert output["rating_differential"].to_list() == expected.to_list()
+
+    @pytest.mark.it("Doesn't sort the history when reading")
+    def test_no_sort(self, test_aporian_w_game_history_df):
+        user = test_aporian_w_game_history_df
+        user.get_top_k_index("accuracy")
+        with patch.object(pd.DataFrame, "sort_values", side_effect=AssertionError):
+            user.get_top_k("accuracy", 10)
+
+
+st_cache_patcher.stop()
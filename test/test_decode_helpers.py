@@ -0,0 +1,80 @@
+from json import dumps, load
+
+import msgspec
+import pytest
+
+from helpers.decode_helpers import decode_archive
+from helpers.vars import required_game_archive_keys, wrangled_game_fields
+
+
+### Fixtures ###
+
+
+@pytest.fixture(scope="module")
+def aporian_games():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        return load(f)
+
+
+@pytest.fixture(scope="module")
+def archive_body(aporian_games):
+    return dumps({"games": aporian_games}).encode()
+
+
+### Tests ###
+
+
+class TestDecodeArchive:
+    @pytest.mark.it("Returns a list of game dicts")
+    def test_returns_dicts(self, archive_body):
+        output = decode_archive(archive_body)
+        assert isinstance(output, list)
+        assert len(output) == 828
+        assert all(isinstance(game, dict) for game in output)
+
+    @pytest.mark.it("Decodes the same values as generic JSON decoding")
+    def test_same_values(self, archive_body, aporian_games):
+        output = decode_archive(archive_body)
+        for game, expected in zip(output, aporian_games):
+            for key, value in game.items():
+                if key in ("white", "black"):
+                    assert value.items() <= expected[key].items()
+                else:
+                    assert value == expected[key]
+
+    @pytest.mark.it("Only decodes the requested fields")
+    def test_requested_fields(self, archive_body):
+        output = decode_archive(archive_body, wrangled_game_fields)
+        assert all(set(game) <= wrangled_game_fields for game in output)
+        assert all("pgn" not in game for game in output)
+        assert set(output[0]["white"]) == {"username", "rating", "result"}
+
+    @pytest.mark.it("Omits optional fields that are missing")
+    def test_missing_optional(self):
+        game = {key: "" for key in required_game_archive_keys}
+        game["rated"] = True
+        game["white"] = game["black"] = {
+            "username": "a",
+            "rating": 1,
+            "result": "win",
+        }
+        output = decode_archive(dumps({"games": [game]}).encode(), {"url", "eco"})
+        assert output == [{"url": ""}]
+
+    @pytest.mark.it("Skips and logs games that lack a required key")
+    @pytest.mark.parametrize("missing", ["pgn", "url"])
+    def test_missing_required(self, aporian_games, missing, caplog):
+        game = dict(aporian_games[0])
+        del game[missing]
+        body = dumps({"games": [aporian_games[1], game, aporian_games[2]]})
+        output = decode_archive(body.encode(), {"url"})
+        assert output == [{"url": aporian_games[i]["url"]} for i in (1, 2)]
+        assert "skipped game 1" in caplog.text
+
+    @pytest.mark.it("Raises a DecodeError when the body isn't an archive")
+    @pytest.mark.parametrize("body", [b"{", b'{"games": 1}'])
+    def test_invalid_archive(self, body):
+        with pytest.raises(msgspec.DecodeError):
+            decode_archive(body, {"url"})
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers.derived_helpers import (
+    per_category,
+    base_times,
+    increments,
+    ply_counts,
+    weekdays,
+    hours,
+    pgn_header_values,
+    pgn_headers_input,
+    derived_column_registry,
+)
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def time_controls():
+    return pd.Series(["180+2", "600", "1/86400", "180+2", None], dtype="category")
+
+
+@pytest.fixture
+def end_times():
+    return pd.Series(pd.to_datetime(["2024-12-02 09:30", "2024-12-08 23:59"], utc=True))
+
+
+### Tests ###
+
+
+class TestPerCategory:
+    @pytest.mark.it("Calls the function once with each distinct value")
+    def test_calls_per_category(self, time_controls):
+        calls = []
+
+        def func(categories):
+            calls.append(categories.to_list())
+            return np.arange(len(categories))
+
+        output = per_category(time_controls, func)
+        assert len(calls) == 1
+        assert sorted(calls[0]) == ["1/86400", "180+2", "600"]
+        assert output[0] == output[3]
+        assert np.isnan(output[4])
+
+
+class TestTimeControls:
+    @pytest.mark.it("base_times and increments parse time controls in seconds")
+    def test_base_and_increment(self, time_controls):
+        base, increment = base_times(time_controls), increments(time_controls)
+        assert base[:2].tolist() == [180, 600]
+        assert increment[:2].tolist() == [2, 0]
+        assert np.isnan(base[2]) and np.isnan(increment[2])
+
+
+class TestOtherColumns:
+    @pytest.mark.it("ply_counts counts plies from TCN strings")
+    def test_ply_counts(self):
+        assert ply_counts(["mC0K", None, "lB"]).tolist() == [2, 0, 1]
+
+    @pytest.mark.it("weekdays returns ordered weekday names")
+    def test_weekdays(self, end_times):
+        output = weekdays(end_times)
+        assert output.tolist() == ["Monday", "Sunday"]
+        assert output.ordered and output.categories[0] == "Monday"
+
+    @pytest.mark.it("hours returns the UTC hour")
+    def test_hours(self, end_times):
+        assert hours(end_times).tolist() == [9, 23]
+
+
+class TestRegistry:
+    @pytest.mark.it("Declares the inputs of every derived column")
+    def test_registry(self):
+        assert set(derived_column_registry) == {
+            "base_time",
+            "increment",
+            "ply_count",
+            "game_date",
+            "weekday",
+            "hour",
+            "termination",
+            "start_clock",
+            "end_date",
+            "white_elo",
+            "black_elo",
+        }
+        assert all(
+            isinstance(column.inputs, tuple) and callable(column.compute)
+            for column in derived_column_registry.values()
+        )
+
+
+class TestPgnHeaderValues:
+    @pytest.mark.it("Returns the parsed values of a header, None if missing")
+    def test_values(self):
+        headers = pd.DataFrame({"Termination": ["x won", None]})
+        assert pgn_header_values("Termination", headers).to_list() == ["x won", None]
+        assert pgn_header_values("EndDate", headers).isna().all()
+
+    @pytest.mark.it("Elo headers are numeric")
+    def test_elo(self):
+        headers = pd.DataFrame({"WhiteElo": ["1500", "?"]}, dtype="category")
+        output = pgn_header_values("WhiteElo", headers)
+        assert output[0] == 1500
+        assert np.isnan(output[1])
+        assert np.isnan(pgn_header_values("BlackElo", headers)).all()
+
+    @pytest.mark.it("Registers common PGN headers as derived columns")
+    def test_registered(self):
+        assert derived_column_registry["termination"].inputs == (pgn_headers_input,)
+        assert "start_clock" in derived_column_registry
+        assert "white_elo" in derived_column_registry
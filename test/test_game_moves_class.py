@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from classes.game_moves import GameMoves, TcnMoves
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def game_moves():
+    pgns = [
+        '[Event "a"]\n\n1. e4 {[%clk 0:03:00]} 1... e5 {[%clk 0:02:59.5]} 2. Nf3 {[%clk 0:02:58]} 1-0\n',
+        None,
+        '[Event "b"]\n\n1. d4 1... d5 2. c4 2... dxc4 3. e8=Q+ 0-1\n',
+    ]
+    return GameMoves.from_pgns(pgns)
+
+
+### Tests ###
+
+
+class TestFromPgns:
+    @pytest.mark.it("Stores moves and clocks in flat compact arrays")
+    def test_flat_arrays(self, game_moves):
+        assert game_moves.clocks.dtype == np.int32
+        assert game_moves.offsets.tolist() == [0, 3, 3, 8]
+        assert len(game_moves.sans) == len(game_moves.clocks) == 8
+
+    @pytest.mark.it("Has one game per PGN, including missing PGNs")
+    def test_len(self, game_moves):
+        assert len(game_moves) == 3
+        assert game_moves.ply_counts().tolist() == [3, 0, 5]
+
+
+class TestGameAccessors:
+    @pytest.mark.it("game_moves returns SAN strings of one game")
+    def test_game_moves(self, game_moves):
+        assert game_moves.game_moves(0) == ["e4", "e5", "Nf3"]
+        assert game_moves.game_moves(2)[-1] == "e8=Q+"
+
+    @pytest.mark.it("game_clocks returns clocks in tenths of a second, -1 if missing")
+    def test_game_clocks(self, game_moves):
+        assert game_moves.game_clocks(0).tolist() == [1800, 1795, 1780]
+        assert (game_moves.game_clocks(2) == -1).all()
+
+    @pytest.mark.it("game_index and ply_index locate every ply")
+    def test_indices(self, game_moves):
+        assert game_moves.game_index().tolist() == [0, 0, 0, 2, 2, 2, 2, 2]
+        assert game_moves.ply_index().tolist() == [0, 1, 2, 0, 1, 2, 3, 4]
+
+
+class TestTcnMoves:
+    @pytest.mark.it("Decodes TCN strings into per-game moves")
+    def test_from_tcns(self):
+        tcn_moves = TcnMoves.from_tcns(["kAXPmC0K", "lB"])
+        assert len(tcn_moves) == 2
+        assert tcn_moves.ply_counts().tolist() == [4, 1]
+        assert tcn_moves.game_moves(0) == ["c2c4", "b7b6", "e2e4", "e7e5"]
+
+    @pytest.mark.it("first_n_moves pads shorter games with -1")
+    def test_first_n_moves(self):
+        tcn_moves = TcnMoves.from_tcns(["kAXPmC0K", "lB"])
+        first_n = tcn_moves.first_n_moves(2)
+        assert first_n.shape == (2, 2)
+        assert first_n[0].tolist() == [10 * 64 + 26, 49 * 64 + 41]
+        assert first_n[1, 1] == -1
@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from helpers.memo_helpers import (
+    freeze,
+    memoize_result,
+    result_cache,
+    clear_result_cache,
+)
+
+
+### Fixtures ###
+
+
+class User:
+    def __init__(self, username, version):
+        self.username = username
+        self.version = version
+        self.calls = 0
+
+    @memoize_result(lambda self: self.version)
+    def count(self, dims, filters=None):
+        self.calls += 1
+        return (tuple(dims), self.version)
+
+    @memoize_result(lambda self: self.version, latest_only=True)
+    def build(self):
+        self.calls += 1
+        return self.version
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    clear_result_cache()
+    yield
+    clear_result_cache()
+
+
+### Tests ###
+
+
+class TestFreeze:
+    @pytest.mark.it("Makes dicts, lists and sets hashable")
+    def test_freeze(self):
+        output = freeze({"b": [1, 2], "a": {"c": {3}}})
+        assert output == (("a", (("c", frozenset({3})),)), ("b", (1, 2)))
+        assert freeze({"a": 1, "b": 2}) == freeze({"b": 2, "a": 1})
+        hash(freeze({"accuracy": pd.notna, "eco": ["A", "B"]}))
+
+
+class TestMemoizeResult:
+    @pytest.mark.it("Computes each result once")
+    def test_hit(self):
+        user = User("Aporian", "1")
+        assert user.count(["eco"], {"rated": True}) == (("eco",), "1")
+        assert user.count(["eco"], {"rated": True}) == (("eco",), "1")
+        assert user.calls == 1
+        user.count(["eco"], {"rated": False})
+        assert user.calls == 2
+
+    @pytest.mark.it("Shares results between instances with the same username")
+    def test_shared(self):
+        User("Aporian", "1").count(["eco"])
+        other = User("aporian", "1")
+        other.count(["eco"])
+        assert other.calls == 0
+        User("someone", "1").count(["eco"])
+        assert len(result_cache) == 2
+
+    @pytest.mark.it("Misses when the version changes")
+    def test_version(self):
+        user = User("Aporian", "1")
+        user.count(["eco"])
+        user.version = "2"
+        assert user.count(["eco"]) == (("eco",), "2")
+        assert user.calls == 2
+
+    @pytest.mark.it("Evicts the least recently used result")
+    def test_lru(self):
+        user = User("Aporian", "1")
+        with patch("helpers.memo_helpers.result_cache_size", 2):
+            user.count(["a"])
+            user.count(["b"])
+            user.count(["a"])
+            user.count(["c"])
+            assert len(result_cache) == 2
+            user.count(["a"])
+            assert user.calls == 3
+            user.count(["b"])
+            assert user.calls == 4
+
+    @pytest.mark.it("Doesn't cache calls with unhashable arguments")
+    def test_unhashable(self):
+        user = User("Aporian", "1")
+        user.count([["a"]], {"x": bytearray(b"1")})
+        user.count([["a"]], {"x": bytearray(b"1")})
+        assert user.calls == 2
+        assert len(result_cache) == 0
+
+    @pytest.mark.it("latest_only drops the method's results for other versions")
+    def test_latest_only(self):
+        user = User("Aporian", "1")
+        User("Other", "1").build()
+        user.build()
+        user.count(["eco"])
+        user.version = "2"
+        user.build()
+        assert ("aporian", "build", "1", (), ()) not in result_cache
+        assert ("aporian", "build", "2", (), ()) in result_cache
+        assert ("aporian", "count", "1", (("eco",),), ()) in result_cache
+        assert ("other", "build", "1", (), ()) in result_cache
+
+    @pytest.mark.it("Looks up and stores results without computing them")
+    def test_cached_and_cache(self):
+        user = User("Aporian", "1")
+        assert User.build.cached(user) is None
+        User.build.cache(user, "extended")
+        assert User.build.cached(user) == "extended"
+        assert user.build() == "extended"
+        assert user.calls == 0
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classes.opening_dictionary import OpeningDictionary
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def slugs():
+    return [
+        "Sicilian-Defense-Old-Sicilian-Variation-3.b3",
+        "Sicilian-Defense-Old-Sicilian-Variation",
+        "Sicilian-Defense-2.Nf3-d6",
+        "Bishops-Opening",
+    ]
+
+
+@pytest.fixture
+def opening_dictionary(slugs):
+    return OpeningDictionary(slugs)
+
+
+### Tests ###
+
+
+class TestSplitSlug:
+    @pytest.mark.it("Splits a slug into family and variation")
+    def test_split(self):
+        assert OpeningDictionary.split_slug(
+            "Sicilian-Defense-Old-Sicilian-Variation-3.b3"
+        ) == ("Sicilian-Defense", "Sicilian-Defense-Old-Sicilian-Variation")
+
+    @pytest.mark.it("Uses the family as the variation if there is no named variation")
+    def test_no_variation(self):
+        assert OpeningDictionary.split_slug("Sicilian-Defense-2.Nf3-d6") == (
+            "Sicilian-Defense",
+            "Sicilian-Defense",
+        )
+        assert OpeningDictionary.split_slug("Bishops-Opening") == (
+            "Bishops-Opening",
+            "Bishops-Opening",
+        )
+
+    @pytest.mark.it("Drops joining words before the moves")
+    def test_joining_words(self):
+        assert OpeningDictionary.split_slug("Modern-Defense-with-1-e4-2.d4") == (
+            "Modern-Defense",
+            "Modern-Defense",
+        )
+
+
+class TestInterning:
+    @pytest.mark.it("Interns every slug and prefix once")
+    def test_interned(self, opening_dictionary, slugs):
+        assert len(opening_dictionary) == len(set(opening_dictionary.names)) == 5
+        assert [
+            opening_dictionary.names[i] for i in opening_dictionary.slug_ids
+        ] == slugs
+
+    @pytest.mark.it("Links each id to its parent and ancestors")
+    def test_ancestors(self, opening_dictionary):
+        ids = opening_dictionary.ids
+        slug = ids["Sicilian-Defense-Old-Sicilian-Variation-3.b3"]
+        variation = ids["Sicilian-Defense-Old-Sicilian-Variation"]
+        family = ids["Sicilian-Defense"]
+        assert opening_dictionary.parents[slug] == variation
+        assert opening_dictionary.parents[variation] == family
+        assert opening_dictionary.parents[family] == -1
+        assert opening_dictionary.ancestors["family"][slug] == family
+        assert opening_dictionary.ancestors["variation"][slug] == variation
+
+
+class TestRollup:
+    @pytest.mark.it("Maps slug codes to names at each level")
+    def test_rollup(self, opening_dictionary):
+        codes = np.array([0, 2, 3, -1])
+        assert opening_dictionary.rollup(codes, "family").tolist()[:3] == [
+            "Sicilian-Defense",
+            "Sicilian-Defense",
+            "Bishops-Opening",
+        ]
+        assert pd.isna(opening_dictionary.rollup(codes, "family")[3])
+        assert opening_dictionary.rollup(codes, "variation")[0] == (
+            "Sicilian-Defense-Old-Sicilian-Variation"
+        )
+
+    @pytest.mark.it("Rolls up a categorical eco column")
+    def test_family_column(self, slugs):
+        eco = pd.Series(slugs * 2, dtype="category")
+        output = OpeningDictionary.family_column(eco)
+        assert pd.Series(output).value_counts()[lambda x: x > 0].to_dict() == {
+            "Sicilian-Defense": 6,
+            "Bishops-Opening": 2,
+        }
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classes.game_moves import TcnMoves
+from classes.opening_tree import OpeningTree
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def opening_tree():
+    # c2c4 b7b6 e2e4 e7e5 / c2c4 b7b6 / c2c4 / d2d4
+    tcn_moves = TcnMoves.from_tcns(["kAXPmC0K", "kAXP", "kA", "lB"])
+    return OpeningTree(
+        tcn_moves.first_n_moves(3),
+        pd.Categorical(["white", "white", "black", "white"]),
+        pd.Categorical(["blitz", "rapid", "blitz", "blitz"]),
+        np.array(["win", "loss", "draw", "win"], dtype=object),
+        np.array([80.0, np.nan, 70.0, 90.0]),
+    )
+
+
+### Tests ###
+
+
+class TestBuild:
+    @pytest.mark.it("Has one node per distinct move sequence plus the root")
+    def test_nodes(self, opening_tree):
+        assert len(opening_tree) == 5
+        assert opening_tree.depths.tolist() == [0, 1, 1, 2, 3]
+
+    @pytest.mark.it("Stores the children of each node as a contiguous range")
+    def test_children_contiguous(self, opening_tree):
+        for node in range(len(opening_tree)):
+            start, end = opening_tree.child_starts[node], opening_tree.child_ends[node]
+            assert (opening_tree.parents[start:end] == node).all()
+            assert (opening_tree.parents == node).sum() == end - start
+
+    @pytest.mark.it("Counts every game at every node along its path")
+    def test_counts(self, opening_tree):
+        assert opening_tree.games[0].sum() == 4
+        assert opening_tree.games[opening_tree.find_node(["c2c4"])].sum() == 3
+        node = opening_tree.find_node(["c2c4", "b7b6", "e2e4"])
+        assert opening_tree.games[node].sum() == 1
+
+
+class TestFindNode:
+    @pytest.mark.it("Returns None for sequences no game followed")
+    def test_missing(self, opening_tree):
+        assert opening_tree.find_node(["e2e4"]) is None
+
+    @pytest.mark.it("Can start from a node other than the root")
+    def test_from_node(self, opening_tree):
+        node = opening_tree.find_node(["c2c4"])
+        assert opening_tree.find_node(["b7b6"], node) == opening_tree.find_node(
+            ["c2c4", "b7b6"]
+        )
+
+
+class TestChildren:
+    @pytest.mark.it("Returns per-move stats sorted by games played")
+    def test_root_children(self, opening_tree):
+        df = opening_tree.children()
+        assert df.index.tolist() == ["c2c4", "d2d4"]
+        assert df.loc["c2c4"].to_dict() == {
+            "games_played": 3,
+            "win_pc": 33.3,
+            "draw_pc": 33.3,
+            "loss_pc": 33.3,
+            "accuracy": 75.0,
+        }
+
+    @pytest.mark.it("Filters by colour and time class")
+    def test_filters(self, opening_tree):
+        df = opening_tree.children(colour="white", time_class="blitz")
+        assert df["games_played"].to_dict() == {"c2c4": 1, "d2d4": 1}
+        df = opening_tree.children(colour="black")
+        assert df.index.tolist() == ["c2c4"]
+        assert df.loc["c2c4", "draw_pc"] == 100.0
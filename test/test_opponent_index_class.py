@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from classes.opponent_index import OpponentIndex
+
+
+### Fixtures ###
+
+
+@pytest.fixture()
+def index():
+    index = OpponentIndex()
+    index.add_games(
+        ["a", "b", "a", "c"],
+        ["win", "loss", "draw", "win"],
+        [80.0, np.nan, 70.0, 60.0],
+        [50.0, 60.0, np.nan, np.nan],
+        [10, -20, 30, 5],
+        [0, 1, 2, 3],
+    )
+    return index
+
+
+### Tests ###
+
+
+class TestOpponentIndex:
+    @pytest.mark.it("Encodes opponents in order of first appearance")
+    def test_encoding(self, index):
+        assert index.names == ["a", "b", "c"]
+        assert index.ids == {"a": 0, "b": 1, "c": 2}
+        assert len(index) == 3
+
+    @pytest.mark.it("Looks up an opponent's aggregates")
+    def test_lookup(self, index):
+        output = index.lookup("a")
+        assert output["games_played"] == 2
+        assert output["win_pc"] == 50.0
+        assert output["draw_pc"] == 50.0
+        assert output["accuracy"] == 75.0
+        assert output["op_accuracy"] == 50.0
+        assert output["rating_diff_mean"] == 20.0
+        assert (output["rating_diff_min"], output["rating_diff_max"]) == (10, 30)
+        assert index.lookup("d") is None
+
+    @pytest.mark.it("Gives NaN accuracy when none is known")
+    def test_unknown_accuracy(self, index):
+        assert np.isnan(index.lookup("b")["accuracy"])
+
+    @pytest.mark.it("Keeps each opponent's rows sorted")
+    def test_rows(self, index):
+        index.add_games(["a", "d"], ["loss", "win"], [1, 2], [3, 4], [0, 0], [5, 4])
+        assert index.opponent_rows("a").tolist() == [0, 2, 5]
+        assert index.opponent_rows("d").tolist() == [4]
+        assert index.opponent_rows("e").tolist() == []
+
+    @pytest.mark.it("Updates aggregates and ranking when games are added")
+    def test_add(self, index):
+        assert index.most_played(1).index.to_list() == ["a"]
+        index.add_games(
+            ["c", "c"], ["loss", "loss"], [50.0, 50.0], [50.0, 50.0], [-40, 0], [4, 5]
+        )
+        output = index.most_played(2)
+        assert output.index.to_list() == ["c", "a"]
+        assert output.loc["c", "loss_pc"] == 66.7
+        assert output.loc["c", "rating_diff_min"] == -40
+
+    @pytest.mark.it("Copies can be extended without changing the original")
+    def test_copy(self, index):
+        other = index.copy()
+        other.add_games(
+            ["d", "a"], ["win", "win"], [1.0, 1.0], [1.0, 1.0], [0, 0], [4, 5]
+        )
+        assert index.names == ["a", "b", "c"]
+        assert index.games.tolist() == [2, 1, 1]
+        assert index.opponent_rows("a").tolist() == [0, 2]
+        assert other.games.tolist() == [3, 1, 1, 1]
+        assert other.opponent_rows("a").tolist() == [0, 2, 5]
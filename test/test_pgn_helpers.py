@@ -0,0 +1,89 @@
+import pytest
+
+from helpers.pgn_helpers import (
+    parse_pgn_headers,
+    extract_pgn_headers,
+    header_to_column_name,
+    parse_pgn_moves,
+    parse_time_controls,
+)
+import pandas as pd
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def pgn():
+    return (
+        '[Event "Live Chess"]\n'
+        '[Site "Chess.com"]\n'
+        '[White "Aporian"]\n'
+        '[Black "Azucr"]\n'
+        '[WhiteElo "1512"]\n'
+        '[TimeControl "180+2"]\n'
+        '[Termination "Aporian won by checkmate"]\n'
+        "\n"
+        '1. e4 {[%clk 0:03:01.9]} 1... e5 {[%clk 0:03:00]} 2. Qh5 [Black "Fake"] 1-0\n'
+    )
+
+
+### Tests ###
+
+
+class TestParsePgnHeaders:
+    @pytest.mark.it("Returns dict of header names and values")
+    def test_returns_headers(self, pgn):
+        output = parse_pgn_headers(pgn)
+        assert output["White"] == "Aporian"
+        assert output["WhiteElo"] == "1512"
+        assert output["Termination"] == "Aporian won by checkmate"
+
+    @pytest.mark.it("Stops scanning at the first blank line")
+    def test_ignores_movetext(self, pgn):
+        output = parse_pgn_headers(pgn)
+        assert output["Black"] == "Azucr"
+        assert len(output) == 7
+
+    @pytest.mark.it("Returns empty dict for empty string")
+    def test_empty_pgn(self):
+        assert parse_pgn_headers("") == {}
+
+
+class TestExtractPgnHeaders:
+    @pytest.mark.it("Returns one list per header, aligned with passed pgns")
+    def test_columns_aligned(self, pgn):
+        output = extract_pgn_headers([pgn, '[Event "Other"]\n\n1. d4 *', None])
+        assert output["Event"] == ["Live Chess", "Other", None]
+        assert output["WhiteElo"] == ["1512", None, None]
+
+
+class TestHeaderToColumnName:
+    @pytest.mark.it("Converts header names to snake case")
+    def test_snake_case(self):
+        assert header_to_column_name("WhiteElo") == "white_elo"
+        assert header_to_column_name("ECOUrl") == "eco_url"
+        assert header_to_column_name("UTCDate") == "utc_date"
+        assert header_to_column_name("Termination") == "termination"
+
+
+class TestParsePgnMoves:
+    @pytest.mark.it("Returns SAN moves and clocks in tenths of a second")
+    def test_moves_and_clocks(self, pgn):
+        sans, clocks = parse_pgn_moves(pgn)
+        assert sans == ["e4", "e5", "Qh5"]
+        assert clocks == [1819, 1800, -1]
+
+    @pytest.mark.it("Parses castling, promotions and checks")
+    def test_special_moves(self):
+        sans, _ = parse_pgn_moves('[A "b"]\n\n1. O-O-O+ 1... exd8=Q# 0-1')
+        assert sans == ["O-O-O+", "exd8=Q#"]
+
+
+class TestParseTimeControls:
+    @pytest.mark.it("Returns base and increment, NaN for daily games")
+    def test_time_controls(self):
+        base, inc = parse_time_controls(pd.Series(["180+2", "600", "1/86400"]))
+        assert base[:2].tolist() == [180, 600]
+        assert inc[:2].tolist() == [2, 0]
+        assert pd.isna(base[2]) and pd.isna(inc[2])
@@ -0,0 +1,101 @@
+import json
+import os
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+
+from helpers.pgn_store_helpers import (
+    pgn_store_dir,
+    list_pgn_months,
+    write_pgn_month,
+    read_pgn,
+    read_month_pgns,
+)
+
+
+### Fixtures ###
+
+
+@pytest.fixture(scope="module")
+def monthly_pgns():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        games = json.load(f)
+    monthly_pgns = defaultdict(dict)
+    for game in games:
+        month = pd.Timestamp(game["end_time"], unit="s").strftime("%Y-%m")
+        monthly_pgns[month][game["uuid"]] = game["pgn"]
+    return dict(monthly_pgns)
+
+
+@pytest.fixture()
+def store_path(tmp_path):
+    return str(tmp_path / "pgn_store")
+
+
+### Tests ###
+
+
+class TestWritePgnMonth:
+    @pytest.mark.it("Writes one file per month")
+    def test_months(self, monthly_pgns, store_path):
+        for month, pgns in monthly_pgns.items():
+            write_pgn_month("Aporian", month, pgns, store_path=store_path)
+        assert list_pgn_months("Aporian", store_path) == sorted(monthly_pgns)
+        assert list_pgn_months("nobody", store_path) == []
+
+    @pytest.mark.it("Is smaller than the PGN text")
+    def test_compression(self, monthly_pgns, store_path):
+        month = max(monthly_pgns, key=lambda month: len(monthly_pgns[month]))
+        write_pgn_month("Aporian", month, monthly_pgns[month], store_path=store_path)
+        path = os.path.join(pgn_store_dir("Aporian", store_path), f"{month}.pgnz")
+        text_size = sum(len(pgn.encode()) for pgn in monthly_pgns[month].values())
+        assert os.path.getsize(path) < text_size / 2
+
+    @pytest.mark.it("Keeps PGNs already stored for the month")
+    def test_merge(self, store_path):
+        write_pgn_month(
+            "Aporian", "2024-12", {"a": "1", "b": "2"}, store_path=store_path
+        )
+        write_pgn_month(
+            "Aporian", "2024-12", {"b": "3", "c": "4"}, store_path=store_path
+        )
+        output = read_month_pgns("Aporian", "2024-12", store_path)
+        assert output == {"a": "1", "b": "3", "c": "4"}
+        assert os.listdir(pgn_store_dir("Aporian", store_path)) == ["2024-12.pgnz"]
+
+    @pytest.mark.it("Writes via a unique temporary file")
+    @patch("helpers.pgn_store_helpers.os.replace", side_effect=os.replace)
+    def test_unique_tmp(self, mock_replace, store_path):
+        write_pgn_month("Aporian", "2024-12", {"a": "1"}, store_path=store_path)
+        write_pgn_month("Aporian", "2024-12", {"b": "2"}, store_path=store_path)
+        tmp_paths = [call.args[0] for call in mock_replace.call_args_list]
+        assert len(set(tmp_paths)) == 2
+        assert all(path.endswith(".tmp") for path in tmp_paths)
+
+
+class TestReadPgn:
+    @pytest.mark.it("Returns any game's PGN across several blocks")
+    def test_read_pgn(self, monthly_pgns, store_path):
+        month = max(monthly_pgns, key=lambda month: len(monthly_pgns[month]))
+        pgns = monthly_pgns[month]
+        write_pgn_month("Aporian", month, pgns, store_path=store_path, block_size=4096)
+        for uuid, pgn in pgns.items():
+            assert read_pgn("Aporian", month, uuid, store_path) == pgn
+
+    @pytest.mark.it("Returns None for unknown games and months")
+    def test_missing(self, store_path):
+        write_pgn_month("Aporian", "2024-12", {"b": "2"}, store_path=store_path)
+        assert read_pgn("Aporian", "2024-12", "a", store_path) is None
+        assert read_pgn("Aporian", "2024-12", "c", store_path) is None
+        assert read_pgn("Aporian", "2024-11", "b", store_path) is None
+        assert read_month_pgns("Aporian", "2024-11", store_path) is None
+
+    @pytest.mark.it("read_month_pgns returns every stored PGN")
+    def test_read_month(self, monthly_pgns, store_path):
+        for month, pgns in monthly_pgns.items():
+            write_pgn_month("Aporian", month, pgns, store_path=store_path)
+            assert read_month_pgns("Aporian", month, store_path) == pgns
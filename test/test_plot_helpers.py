@@ -1,8 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
-from helpers.plot_helpers import plot_pie
+from helpers.plot_helpers import plot_pie, lttb_indices, downsample
 from helpers.vars import indices
 
 
@@ -20,3 +21,52 @@ class TestPlotPie:
     def test_takes_passed_name_as_y_label(self, expanded_df):
         output = plot_pie(expanded_df, "Cazza", indices["totals"])
         assert output.get_axes()[0].get_ylabel() == "Cazza"
+
+
+@pytest.fixture()
+def noisy_series():
+    x = np.arange(20_000)
+    y = np.sin(x / 1000) * 100 + np.random.default_rng(0).normal(0, 5, len(x))
+    y[12_345] = 500
+    index = pd.date_range("2020-01-01", periods=len(x), freq="h", tz="UTC")
+    return pd.Series(y, index=index)
+
+
+class TestLttbIndices:
+    @pytest.mark.it("Keeps n_out sorted points including the first and last")
+    def test_n_out(self, noisy_series):
+        output = lttb_indices(np.arange(len(noisy_series)), noisy_series, 500)
+        assert len(output) == 500
+        assert output[0] == 0 and output[-1] == len(noisy_series) - 1
+        assert (np.diff(output) > 0).all()
+
+    @pytest.mark.it("Keeps spikes")
+    def test_spike(self, noisy_series):
+        output = lttb_indices(np.arange(len(noisy_series)), noisy_series, 100)
+        assert 12_345 in output
+
+    @pytest.mark.it("Keeps every point of short series")
+    def test_short(self):
+        output = lttb_indices(np.arange(5), np.array([0, 5, 0, 5, 0]), 10)
+        assert output.tolist() == [0, 1, 2, 3, 4]
+
+
+class TestDownsample:
+    @pytest.mark.it("Reduces series to the point budget")
+    def test_series(self, noisy_series):
+        output = downsample(noisy_series, 1000)
+        assert len(output) == 1000
+        assert output.max() == noisy_series.max()
+        assert output.index.is_monotonic_increasing
+
+    @pytest.mark.it("Keeps the shape of every column of a df")
+    def test_df(self, noisy_series):
+        df = pd.DataFrame({"high": noisy_series + 10, "low": -noisy_series})
+        output = downsample(df, 1000)
+        assert len(output) <= 1000
+        assert output["high"].max() == df["high"].max()
+        assert output["low"].min() == df["low"].min()
+
+    @pytest.mark.it("Returns small data unchanged")
+    def test_small(self, noisy_series):
+        assert downsample(noisy_series[:10]).equals(noisy_series[:10])
@@ -0,0 +1,91 @@
+import pytest
+
+from classes.game_moves import TcnMoves
+from helpers.position_helpers import (
+    parse_fen,
+    fen_to_hash,
+    replay_positions,
+    standard_fen,
+)
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def final_hash():
+    def final_hash(tcn, initial_fen=""):
+        tcn_moves = TcnMoves.from_tcns([tcn])
+        return replay_positions(tcn_moves, [initial_fen])[-1]
+
+    return final_hash
+
+
+### Tests ###
+
+
+class TestParseFen:
+    @pytest.mark.it("Reads the board, side to move and castling rights")
+    def test_standard(self):
+        board, black_to_move, rights = parse_fen(standard_fen)
+        assert board[4] == 6 and board[60] == 12
+        assert (board[8:16] == 1).all() and (board[16:48] == 0).all()
+        assert not black_to_move
+        assert rights == 15
+
+    @pytest.mark.it("Treats an empty FEN as the standard starting position")
+    def test_empty(self):
+        assert fen_to_hash("") == fen_to_hash(standard_fen)
+
+    @pytest.mark.it("Raises a ValueError for invalid FENs")
+    @pytest.mark.parametrize(
+        "fen",
+        [
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/ppppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/7/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQxq - 0 1",
+        ],
+    )
+    def test_invalid(self, fen):
+        with pytest.raises(ValueError, match="Invalid FEN"):
+            parse_fen(fen)
+
+
+class TestReplayPositions:
+    @pytest.mark.it("Returns one hash per position including the start")
+    def test_lengths(self):
+        tcn_moves = TcnMoves.from_tcns(["mC0K", "", "lB"])
+        output = replay_positions(tcn_moves, ["", "", ""])
+        assert len(output) == 3 + 1 + 2
+        assert output[0] == output[3] == output[4] == fen_to_hash(standard_fen)
+
+    @pytest.mark.it("Matches the hash of the FEN after the moves")
+    def test_simple_moves(self, final_hash):
+        # 1. e4 e5
+        assert final_hash("mC0K") == fen_to_hash(
+            "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2"
+        )
+
+    @pytest.mark.it("Treats transpositions as the same position")
+    def test_transposition(self, final_hash):
+        # 1. Nf3 Nf6 2. d4 and 1. d4 Nf6 2. Nf3
+        assert final_hash("gv!TlB") == final_hash("lB!Tgv")
+
+    @pytest.mark.it("Handles castling encoded as the king taking its rook")
+    def test_castling(self, final_hash):
+        fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+        # O-O (e1 takes h1) and O-O-O (e8 takes a8)
+        assert final_hash("eh84", fen) == fen_to_hash(
+            "2kr3r/8/8/8/8/8/8/R4RK1 w - - 2 2"
+        )
+
+    @pytest.mark.it("Handles en passant and promotions")
+    def test_en_passant_and_promotion(self, final_hash):
+        fen = "4k3/6P1/8/8/1p6/8/2P5/4K3 w - - 0 1"
+        # c4 bxc3 (en passant), g8=Q
+        tcn = "kA" + "zs" + "2~"
+        assert final_hash(tcn, fen) == fen_to_hash("4k1Q1/8/8/8/8/2p5/8/4K3 b - - 0 2")
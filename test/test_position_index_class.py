@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from classes.position_index import PositionIndex
+from helpers.position_helpers import fen_to_hash, standard_fen
+
+
+### Fixtures ###
+
+
+@pytest.fixture
+def position_index():
+    # 1. e4 e5 / 1. e4 / 1. d4 / 1. Nf3 Nf6 2. d4 / 1. d4 Nf6 2. Nf3
+    position_index = PositionIndex()
+    position_index.add_games(
+        ["mC0K", "mC", "lB"],
+        ["", "", ""],
+        ["a", "b", "c"],
+        ["white", "black", "white"],
+        ["win", "loss", "draw"],
+    )
+    position_index.add_games(
+        ["gv!TlB", "lB!Tgv"],
+        ["", ""],
+        ["d", "e"],
+        ["black", "white"],
+        ["draw", "win"],
+    )
+    return position_index
+
+
+### Tests ###
+
+
+class TestAddGames:
+    @pytest.mark.it("Stores one posting per position, sorted by hash and game")
+    def test_sorted(self, position_index):
+        assert len(position_index) == 3 + 2 + 2 + 4 + 4
+        order = np.lexsort((position_index.games, position_index.hashes))
+        assert (order == np.arange(len(position_index))).all()
+
+    @pytest.mark.it("Numbers games in the order they were added")
+    def test_game_numbers(self, position_index):
+        assert position_index.uuids.tolist() == ["a", "b", "c", "d", "e"]
+        assert position_index.colours.tolist() == [0, 1, 0, 1, 0]
+        assert position_index.results.tolist() == [0, 2, 1, 1, 0]
+
+    @pytest.mark.it("Gives the same index whether games are added at once or not")
+    def test_incremental(self, position_index):
+        full = PositionIndex()
+        full.add_games(
+            ["mC0K", "mC", "lB", "gv!TlB", "lB!Tgv"],
+            [""] * 5,
+            ["a", "b", "c", "d", "e"],
+            ["white", "black", "white", "black", "white"],
+            ["win", "loss", "draw", "draw", "win"],
+        )
+        assert (full.hashes == position_index.hashes).all()
+        assert (full.games == position_index.games).all()
+        assert (full.plies == position_index.plies).all()
+
+
+class TestLookup:
+    @pytest.mark.it("Finds every occurrence of a position")
+    def test_lookup(self, position_index):
+        games, plies = position_index.lookup(fen_to_hash(standard_fen))
+        assert games.tolist() == [0, 1, 2, 3, 4]
+        assert (plies == 0).all()
+
+    @pytest.mark.it("Finds transpositions at their own plies")
+    def test_transposition(self, position_index):
+        games, plies = position_index.lookup(
+            fen_to_hash("rnbqkb1r/pppppppp/5n2/8/3P4/5N2/PPP1PPPP/RNBQKB1R b KQkq -")
+        )
+        assert games.tolist() == [3, 4]
+        assert plies.tolist() == [3, 3]
+
+    @pytest.mark.it("Returns empty arrays for unseen positions")
+    def test_missing(self, position_index):
+        games, plies = position_index.lookup(np.uint64(1))
+        assert len(games) == len(plies) == 0
+
+
+class TestStats:
+    @pytest.mark.it("position_stats returns results per colour")
+    def test_position_stats(self, position_index):
+        output = position_index.position_stats(
+            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+        )
+        assert output["games_played"].to_dict() == {"white": 1, "black": 1}
+        assert output.loc["white", "win_pc"] == 100.0
+        assert output.loc["black", "loss_pc"] == 100.0
+
+    @pytest.mark.it("common_positions ranks positions by games reached")
+    def test_common_positions(self, position_index):
+        output = position_index.common_positions(min_ply=1, n=2)
+        assert output["games_played"].to_list() == [2, 2]
+        assert set(output["ply"]) <= {1, 3}
+        assert output.columns.to_list() == [
+            "hash",
+            "games_played",
+            "win_pc",
+            "draw_pc",
+            "loss_pc",
+            "uuid",
+            "ply",
+        ]
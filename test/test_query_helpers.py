@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers.query_helpers import (
+    filter_mask,
+    result_pc,
+    measure_registry,
+    bucket_ratings,
+)
+
+
+### Tests ###
+
+
+class TestFilterMask:
+    @pytest.mark.it("Compares single values for equality")
+    def test_value(self):
+        output = filter_mask(np.array([True, False, True]), True)
+        assert output.tolist() == [True, False, True]
+
+    @pytest.mark.it("Accepts any of a list of values")
+    def test_list(self):
+        values = pd.Categorical(["blitz", "rapid", "daily", "blitz"])
+        output = filter_mask(values, ["blitz", "daily"])
+        assert output.tolist() == [True, False, True, True]
+
+    @pytest.mark.it("Applies vectorised functions")
+    def test_callable(self):
+        output = filter_mask(np.array([1.0, np.nan, 3.0]), pd.notna)
+        assert output.tolist() == [True, False, True]
+
+
+class TestMeasures:
+    @pytest.mark.it("result_pc gives 100 for the result and 0 otherwise")
+    def test_result_pc(self):
+        output = result_pc("win")(pd.Categorical(["win", "loss", "draw", "win"]))
+        assert output.tolist() == [100.0, 0.0, 0.0, 100.0]
+
+    @pytest.mark.it("Registry holds the win/draw/loss % measures")
+    def test_registry(self):
+        for name in ["games_played", "win_pc", "draw_pc", "loss_pc", "accuracy"]:
+            assert name in measure_registry
+
+
+class TestBucketRatings:
+    @pytest.mark.it("Rounds ratings to the nearest multiple of the width")
+    def test_buckets(self):
+        ratings = np.array([1049, 1051, 1234, 780], dtype=np.int16)
+        assert bucket_ratings(ratings).tolist() == [1000, 1100, 1200, 800]
+        assert bucket_ratings(ratings, 250).tolist() == [1000, 1000, 1250, 750]
+        assert bucket_ratings(ratings).dtype == np.int16
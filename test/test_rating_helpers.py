@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers.rating_helpers import period_codes, period_starts, rating_ohlc
+
+
+### Fixtures ###
+
+
+@pytest.fixture()
+def times():
+    return pd.DatetimeIndex(
+        [
+            "2024-01-01 10:00",
+            "2024-01-01 12:00",
+            "2024-01-03 09:00",
+            "2024-01-08 00:00",
+            "2024-01-31 23:59",
+            "2024-02-01 00:00",
+        ],
+        tz="UTC",
+    )
+
+
+@pytest.fixture()
+def ratings():
+    return np.array([100, 120, 90, 110, 95, 105], dtype=np.int16)
+
+
+### Tests ###
+
+
+class TestPeriodCodes:
+    @pytest.mark.it("Gives games in the same period the same code")
+    def test_codes(self, times):
+        assert np.diff(period_codes(times, "day")).tolist() == [0, 2, 5, 23, 1]
+        assert np.diff(period_codes(times, "week")).tolist() == [0, 0, 1, 3, 0]
+        assert np.diff(period_codes(times, "month")).tolist() == [0, 0, 0, 0, 1]
+
+    @pytest.mark.it("Raises ValueError for unknown periods")
+    def test_unknown(self, times):
+        with pytest.raises(ValueError):
+            period_codes(times, "fortnight")
+
+    @pytest.mark.it("Weeks start on Monday")
+    def test_week_starts(self, times):
+        output = period_starts(times, "week")
+        assert (output.weekday == 0).all()
+        assert str(output[4].date()) == "2024-01-29"
+
+
+class TestRatingOhlc:
+    @pytest.mark.it("Returns OHLC, games played and net change per period")
+    def test_week(self, times, ratings):
+        output = rating_ohlc(times, ratings, "week")
+        assert output.index.name == "period"
+        assert [str(day.date()) for day in output.index] == [
+            "2024-01-01",
+            "2024-01-08",
+            "2024-01-29",
+        ]
+        assert output.loc["2024-01-01"].to_list() == [100, 120, 90, 90, 3, -10]
+        assert output["games_played"].sum() == len(ratings)
+        assert output["net_change"].sum() == ratings[-1] - ratings[0]
+
+    @pytest.mark.it("Rolls up by month")
+    def test_month(self, times, ratings):
+        output = rating_ohlc(times, ratings, "month")
+        assert output["open"].to_list() == [100, 105]
+        assert output["close"].to_list() == [95, 105]
+        assert output["net_change"].to_list() == [-5, 10]
+
+    @pytest.mark.it("Returns an empty df for no games")
+    def test_empty(self, times, ratings):
+        output = rating_ohlc(times[:0], ratings[:0], "day")
+        assert output.empty
+        assert "close" in output
@@ -1,4 +1,5 @@
 from unittest.mock import patch, Mock, AsyncMock
+from json import dumps, load
 import time
 import sys
 
@@ -9,7 +10,7 @@ from requests.exceptions import RequestException
 from helpers.vars import required_game_archive_keys
 
 # to remove unpatched module if already imported
-sys.modules.pop("helpers.request_helpers", None) 
+sys.modules.pop("helpers.request_helpers", None)
 
 
 def mock_streamlit_cache_data(func):
@@ -22,6 +23,7 @@ def mock_streamlit_cache_data(func):
 
     return wrapper
 
+
 # patch the st.cache_data decorator before the functions are defined
 st_cache_patcher = patch("streamlit.cache_data", mock_streamlit_cache_data)
 
@@ -37,6 +39,8 @@ from helpers.request_helpers import (
     get_random_compatriot,
     get_archives,
     get_archive,
+    archive_month,
+    get_game_history_by_month,
     get_game_history,
     return_game_history,
 )
@@ -51,6 +55,14 @@ def mock_response():
     return mock_response
 
 
+@pytest.fixture(scope="module")
+def aporian_archive_body():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        return dumps({"games": load(f)}).encode()
+
+
 ### Tests ###
 
 
@@ -219,6 +231,53 @@ class TestGetArchive:
         result = await get_archive(url, client)
         assert "Request error" in caplog.text
 
+    @pytest.mark.it("Decodes only the requested fields of a 200 response")
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_decodes_fields(self, aporian_archive_body):
+        client = AsyncMock()
+        client.get.return_value = Mock(status_code=200, content=aporian_archive_body)
+        output = await get_archive("egg", client, {"url", "white", "black"})
+        assert len(output) == 828
+        assert set(output[0]) == {"url", "white", "black"}
+
+    @pytest.mark.it("Skips games that don't match the schema")
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_skips_bad_games(self, caplog):
+        client = AsyncMock()
+        client.get.return_value = Mock(status_code=200, content=b'{"games": [{}]}')
+        output = await get_archive("egg", client)
+        assert output == []
+        assert "skipped game 0" in caplog.text
+
+    @pytest.mark.it("Returns None and logs bodies that aren't archives")
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_logs_decode_errors(self, caplog):
+        client = AsyncMock()
+        client.get.return_value = Mock(status_code=200, content=b'{"games": 1}')
+        output = await get_archive("egg", client)
+        assert output is None
+        assert "Decode error" in caplog.text
+
+    class TestArchiveMonth:
+        @pytest.mark.it("Returns YYYY-MM month of archive url")
+        def test_archive_month(self):
+            url = "https://api.chess.com/pub/player/aporian/games/2024/11"
+            assert archive_month(url) == "2024-11"
+
+    class TestGetGameHistoryByMonth:
+        @pytest.mark.it("Keys successful archives by month in url order")
+        @pytest.mark.asyncio(loop_scope="function")
+        @patch("helpers.request_helpers.get_archive")
+        async def test_keys_by_month(self, mock_get_archive):
+            mock_get_archive.side_effect = [[{"url": "a"}], None, [{"url": "b"}]]
+            urls = [
+                "https://api.chess.com/pub/player/aporian/games/2024/10",
+                "https://api.chess.com/pub/player/aporian/games/2024/11",
+                "https://api.chess.com/pub/player/aporian/games/2024/12",
+            ]
+            output = await get_game_history_by_month("Aporian", urls)
+            assert output == {"2024-10": [{"url": "a"}], "2024-12": [{"url": "b"}]}
+
     @pytest.mark.skip(
         "Skipping tests to avoid nigh number of API calls. Tests passing as of 12-05-25"
     )
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classes.rolling_stats import RollingStats
+
+
+### Fixtures ###
+
+
+@pytest.fixture()
+def times():
+    return pd.DatetimeIndex(
+        ["2024-01-01", "2024-01-02", "2024-01-05", "2024-01-06", "2024-01-06 12:00"],
+        tz="UTC",
+    )
+
+
+@pytest.fixture()
+def stats(times):
+    stats = RollingStats()
+    stats.add_games(
+        times,
+        ["win", "draw", "loss", "win", "win"],
+        [80.0, np.nan, 60.0, 70.0, np.nan],
+        [1000, 1005, 990, 1000, 1010],
+    )
+    return stats
+
+
+### Tests ###
+
+
+class TestRollingStats:
+    @pytest.mark.it("Computes stats over the last n games")
+    def test_games(self, stats):
+        output = stats.compute(games=2)
+        assert output.index.name == "end_time"
+        assert output["games"].to_list() == [1, 2, 2, 2, 2]
+        assert output["win_pc"].to_list() == [100.0, 50.0, 0.0, 50.0, 100.0]
+        assert output["score_pc"].to_list() == [100.0, 75.0, 25.0, 50.0, 100.0]
+        assert output["rating_change"].to_list() == [0, 5, -10, -5, 20]
+        assert output["accuracy"].iloc[:4].to_list() == [80.0, 80.0, 60.0, 65.0]
+
+    @pytest.mark.it("Gives NaN accuracy for windows without any")
+    def test_nan_accuracy(self):
+        stats = RollingStats()
+        stats.add_games(
+            pd.DatetimeIndex(["2024-01-01"], tz="UTC"), ["win"], [np.nan], [1000]
+        )
+        assert np.isnan(stats.compute(games=5)["accuracy"].iloc[0])
+
+    @pytest.mark.it("Computes stats over the last n days")
+    def test_days(self, stats):
+        output = stats.compute(days=3)
+        assert output["games"].to_list() == [1, 2, 1, 2, 3]
+        assert output["rating_change"].to_list() == [0, 5, -15, -5, 5]
+
+    @pytest.mark.it("Matches a pandas rolling window")
+    def test_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        times = pd.date_range("2024-01-01", periods=500, freq="7h", tz="UTC")
+        results = rng.choice(["win", "draw", "loss"], 500)
+        accuracies = np.where(rng.random(500) < 0.3, np.nan, rng.random(500) * 100)
+        stats = RollingStats()
+        stats.add_games(times, results, accuracies, np.arange(500))
+        output = stats.compute(games=20)
+        wins = pd.Series((results == "win") * 100.0)
+        expected = wins.rolling(20, min_periods=1).mean().round(1)
+        assert output["win_pc"].to_list() == expected.to_list()
+        expected = pd.Series(accuracies).rolling(20, min_periods=1).mean()
+        assert np.allclose(output["accuracy"], expected.round(2), equal_nan=True)
+
+    @pytest.mark.it("Is extended incrementally")
+    def test_add_games(self, stats, times):
+        incremental = RollingStats()
+        results = ["win", "draw", "loss", "win", "win"]
+        accuracies = [80.0, np.nan, 60.0, 70.0, np.nan]
+        ratings = [1000, 1005, 990, 1000, 1010]
+        incremental.add_games(times[:2], results[:2], accuracies[:2], ratings[:2])
+        incremental.add_games(times[2:], results[2:], accuracies[2:], ratings[2:])
+        pd.testing.assert_frame_equal(
+            incremental.compute(games=3), stats.compute(games=3)
+        )
+
+    @pytest.mark.it("Raises ValueError without a window")
+    def test_no_window(self, stats):
+        with pytest.raises(ValueError):
+            stats.compute()
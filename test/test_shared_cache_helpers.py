@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from helpers.shared_cache_helpers import (
+    history_version,
+    version_order,
+    publish_shared_history,
+    read_shared_history,
+    current_shared_version,
+    cleanup_shared_history,
+    shared_cache_dir,
+)
+from helpers.wrangle_helpers import wrangle_games
+
+
+### Fixtures ###
+
+
+@pytest.fixture(scope="module")
+def aporian_df():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        games = json.load(f)
+    return wrangle_games(games, "Aporian")
+
+
+### Tests ###
+
+
+class TestHistoryVersion:
+    @pytest.mark.it("Changes when games are added")
+    def test_version(self, aporian_df):
+        assert history_version(aporian_df) != history_version(aporian_df.iloc[:-1])
+        assert history_version(aporian_df) == history_version(aporian_df.copy())
+
+    @pytest.mark.it("Differs for different games with the same count and latest")
+    def test_no_collision(self, aporian_df):
+        other = aporian_df.copy()
+        other["uuid"] = other["uuid"].iloc[::-1].to_numpy()
+        assert history_version(other) != history_version(aporian_df)
+        assert version_order(history_version(other)) == (
+            828,
+            version_order(history_version(aporian_df))[1],
+        )
+
+
+class TestPublishAndRead:
+    @pytest.mark.it("Returns None if nothing is published")
+    def test_nothing_published(self, tmp_path):
+        assert read_shared_history("Aporian", cache_path=tmp_path) is None
+
+    @pytest.mark.it("Round trips a game history")
+    def test_round_trip(self, tmp_path, aporian_df):
+        publish_shared_history("Aporian", aporian_df, tmp_path)
+        output = read_shared_history("aporian", cache_path=tmp_path)
+        assert output.index.equals(aporian_df.index)
+        assert (
+            output.dtypes.drop(["url", "uuid"])
+            == aporian_df.dtypes.drop(["url", "uuid"])
+        ).all()
+        assert output["url"].tolist() == aporian_df["url"].tolist()
+
+    @pytest.mark.it("Reads only the requested columns")
+    def test_columns(self, tmp_path, aporian_df):
+        publish_shared_history("Aporian", aporian_df, tmp_path)
+        output = read_shared_history("Aporian", ["rating"], tmp_path)
+        assert output.columns.tolist() == ["rating"]
+        assert output.index.name == "end_time"
+
+    @pytest.mark.it("Switches CURRENT to the latest published version")
+    def test_versions(self, tmp_path, aporian_df):
+        old = publish_shared_history("Aporian", aporian_df.iloc[:100], tmp_path)
+        new = publish_shared_history("Aporian", aporian_df, tmp_path)
+        assert old != new
+        assert current_shared_version("Aporian", tmp_path) == new
+        assert len(read_shared_history("Aporian", cache_path=tmp_path)) == len(
+            aporian_df
+        )
+
+    @pytest.mark.it("Doesn't move CURRENT back to an older history")
+    def test_monotonic(self, tmp_path, aporian_df):
+        new = publish_shared_history("Aporian", aporian_df, tmp_path)
+        assert publish_shared_history("Aporian", aporian_df.iloc[:100], tmp_path) == new
+        assert current_shared_version("Aporian", tmp_path) == new
+        files = os.listdir(shared_cache_dir("Aporian", tmp_path))
+        assert [file for file in files if file.endswith(".arrow")] == [f"{new}.arrow"]
+
+    @pytest.mark.it("Leaves no temporary files behind")
+    def test_no_tmp_files(self, tmp_path, aporian_df):
+        publish_shared_history("Aporian", aporian_df, tmp_path)
+        files = os.listdir(shared_cache_dir("Aporian", tmp_path))
+        assert not any(file.endswith(".tmp") for file in files)
+
+
+class TestCleanup:
+    @pytest.mark.it("Removes unreferenced versions older than the grace period")
+    def test_cleanup(self, tmp_path, aporian_df):
+        old = publish_shared_history("Aporian", aporian_df.iloc[:100], tmp_path)
+        new = publish_shared_history("Aporian", aporian_df, tmp_path)
+        assert cleanup_shared_history("Aporian", tmp_path, grace_seconds=3600) == []
+        assert cleanup_shared_history("Aporian", tmp_path, grace_seconds=0) == [
+            f"{old}.arrow"
+        ]
+        assert set(os.listdir(shared_cache_dir("Aporian", tmp_path))) == {
+            "CURRENT",
+            "LOCK",
+            f"{new}.arrow",
+        }
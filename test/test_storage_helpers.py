@@ -0,0 +1,124 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+
+from helpers.storage_helpers import (
+    list_stored_months,
+    write_month_partition,
+    read_game_history_store,
+    list_raw_field_months,
+    write_raw_fields,
+    read_raw_fields,
+)
+from helpers.wrangle_helpers import wrangle_games
+
+
+### Fixtures ###
+
+
+@pytest.fixture(scope="module")
+def aporian_df():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        games = json.load(f)
+    return wrangle_games(games, "Aporian")
+
+
+@pytest.fixture
+def store(tmp_path, aporian_df):
+    write_month_partition("Aporian", "2024-11", aporian_df.iloc[:300], tmp_path)
+    write_month_partition("Aporian", "2024-12", aporian_df.iloc[300:], tmp_path)
+    return tmp_path
+
+
+### Tests ###
+
+
+class TestListStoredMonths:
+    @pytest.mark.it("Returns empty list for unknown user")
+    def test_unknown_user(self, tmp_path):
+        assert list_stored_months("nobody", tmp_path) == []
+
+    @pytest.mark.it("Returns sorted months of stored partitions")
+    def test_sorted_months(self, store):
+        assert list_stored_months("aporian", store) == ["2024-11", "2024-12"]
+
+
+class TestWriteMonthPartition:
+    @pytest.mark.it("Writing a new month doesn't rewrite existing partitions")
+    def test_append_only(self, store, aporian_df):
+        old_file = store / "aporian" / "2024-11.parquet"
+        mtime = old_file.stat().st_mtime_ns
+        write_month_partition("Aporian", "2025-01", aporian_df.iloc[:5], store)
+        assert old_file.stat().st_mtime_ns == mtime
+        assert list_stored_months("Aporian", store)[-1] == "2025-01"
+
+    @pytest.mark.it("Writes via a unique temporary file and leaves none behind")
+    def test_unique_tmp(self, store, aporian_df):
+        tmp_paths = []
+        to_parquet = pd.DataFrame.to_parquet
+
+        def record(df, path, *args, **kwargs):
+            tmp_paths.append(path)
+            return to_parquet(df, path, *args, **kwargs)
+
+        with patch.object(pd.DataFrame, "to_parquet", record):
+            write_month_partition("Aporian", "2025-01", aporian_df.iloc[:5], store)
+            write_month_partition("Aporian", "2025-01", aporian_df.iloc[:5], store)
+        assert len(set(tmp_paths)) == 2
+        assert not [p for p in (store / "aporian").iterdir() if p.suffix == ".tmp"]
+
+
+class TestReadGameHistoryStore:
+    @pytest.mark.it("Returns None if nothing is stored")
+    def test_returns_none(self, tmp_path):
+        assert read_game_history_store("nobody", store_path=tmp_path) is None
+
+    @pytest.mark.it("Round-trips all months in order with compact schema")
+    def test_round_trip(self, store, aporian_df):
+        output = read_game_history_store("Aporian", store_path=store)
+        pd.testing.assert_frame_equal(output, aporian_df, check_categorical=False)
+        assert output["eco"].dtype == "category"
+        assert output["rating"].dtype == "int16"
+
+    @pytest.mark.it("Only reads requested columns and months")
+    def test_projection(self, store):
+        output = read_game_history_store(
+            "Aporian",
+            columns=["rating", "result"],
+            months=["2024-12"],
+            store_path=store,
+        )
+        assert output.columns.to_list() == ["rating", "result"]
+        assert output.shape[0] == 528
+
+
+class TestRawFieldStore:
+    @pytest.mark.it("Returns None if none of the months are stored")
+    def test_returns_none(self, tmp_path):
+        assert read_raw_fields("nobody", ["2024-12"], store_path=tmp_path) is None
+
+    @pytest.mark.it("Round-trips raw fields indexed by uuid")
+    def test_round_trip(self, tmp_path):
+        df = pd.DataFrame({"uuid": ["a", "b"], "tcn": ["mC0K", None]})
+        write_raw_fields("Aporian", "2024-12", df, tmp_path)
+        assert list_raw_field_months("aporian", tmp_path) == ["2024-12"]
+        output = read_raw_fields("Aporian", ["2024-11", "2024-12"], ["tcn"], tmp_path)
+        assert output["tcn"].to_dict() == {"a": "mC0K", "b": None}
+
+    @pytest.mark.it("Keeps stored rows and replaces rows with the same uuid")
+    def test_merges(self, tmp_path):
+        write_raw_fields(
+            "Aporian", "2024-12", pd.DataFrame({"uuid": ["a"], "tcn": ["x"]}), tmp_path
+        )
+        write_raw_fields(
+            "Aporian",
+            "2024-12",
+            pd.DataFrame({"uuid": ["a", "b"], "tcn": ["y", "z"]}),
+            tmp_path,
+        )
+        output = read_raw_fields("Aporian", ["2024-12"], store_path=tmp_path)
+        assert output["tcn"].to_dict() == {"a": "y", "b": "z"}
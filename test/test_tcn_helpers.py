@@ -0,0 +1,37 @@
+import pytest
+
+from helpers.tcn_helpers import decode_tcns, move_codes_to_uci
+
+
+### Tests ###
+
+
+class TestDecodeTcns:
+    @pytest.mark.it("Decodes from and to squares of every ply")
+    def test_squares(self):
+        # 1. c4 b6 2. e4 e5
+        from_squares, to_squares, promotions, offsets = decode_tcns(["kAXPmC0K"])
+        assert from_squares.tolist() == [10, 49, 12, 52]
+        assert to_squares.tolist() == [26, 41, 28, 36]
+        assert promotions.tolist() == [0, 0, 0, 0]
+        assert offsets.tolist() == [0, 4]
+
+    @pytest.mark.it("Resolves promotion codes relative to the from square")
+    def test_promotions(self):
+        # d2-d1=Q (straight on), b2xa1=Q (capture left), g7-g8=N
+        from_squares, to_squares, promotions, _ = decode_tcns(["l~j{2^"])
+        assert from_squares.tolist() == [11, 9, 54]
+        assert to_squares.tolist() == [3, 0, 62]
+        assert promotions.tolist() == [1, 1, 2]
+
+    @pytest.mark.it("Offsets locate each game, including missing ones")
+    def test_offsets(self):
+        *_, offsets = decode_tcns(["kA", None, "kAXP", "kAX"])
+        assert offsets.tolist() == [0, 1, 1, 3, 4]
+
+
+class TestMoveCodesToUci:
+    @pytest.mark.it("Converts move codes to UCI strings, padding to ''")
+    def test_uci(self):
+        codes = [12 * 64 + 28, 54 * 64 + 62 + 2 * 4096, -1]
+        assert move_codes_to_uci(codes).tolist() == ["e2e4", "g7g8n", ""]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from classes.top_k_index import TopKIndex
+
+
+### Fixtures ###
+
+
+@pytest.fixture()
+def values():
+    return np.array([5.0, 1.0, np.nan, 9.0, 3.0, 7.0, 2.0, 8.0])
+
+
+@pytest.fixture()
+def rated():
+    return np.array([True, True, True, False, True, False, True, True])
+
+
+@pytest.fixture()
+def time_classes():
+    return np.array(
+        ["blitz", "rapid", "blitz", "blitz", "blitz", "rapid", "blitz", "rapid"]
+    )
+
+
+@pytest.fixture()
+def index(values, rated, time_classes):
+    index = TopKIndex()
+    index.add(values, np.arange(len(values)), rated, time_classes)
+    return index
+
+
+### Tests ###
+
+
+class TestTopKIndex:
+    @pytest.mark.it("Returns the rows with the highest values")
+    def test_top(self, index):
+        assert index.top(3).tolist() == [3, 7, 5]
+
+    @pytest.mark.it("Returns the rows with the lowest values if ascending")
+    def test_ascending(self, index):
+        assert index.top(3, ascending=True).tolist() == [1, 6, 4]
+
+    @pytest.mark.it("Doesn't index NaN values")
+    def test_nan(self, index):
+        assert 2 not in index.top(100).tolist()
+        assert len(index.top(100)) == 7
+
+    @pytest.mark.it("Filters by rated and time class")
+    def test_filters(self, index):
+        assert index.top(10, rated=True).tolist() == [7, 0, 4, 6, 1]
+        assert index.top(10, rated=False, time_classes=["blitz"]).tolist() == [3]
+        assert index.top(2, time_classes=["rapid"]).tolist() == [7, 5]
+
+    @pytest.mark.it("Merges added rows in order")
+    def test_add(self, index):
+        index.add([6.0, 10.0], [8, 9], [True, True], ["blitz", "bullet"])
+        assert index.top(4).tolist() == [9, 3, 7, 5]
+        assert index.top(2, rated=True, time_classes=["blitz"]).tolist() == [8, 0]
@@ -0,0 +1,162 @@
+from json import load
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+
+from helpers import wrangle_helpers
+from helpers.wrangle_helpers import (
+    wrangle_games,
+    wrangle_games_parallel,
+    wrangle_chunks,
+    split_games,
+    concat_game_histories,
+    union_categories,
+    shutdown_executor,
+)
+
+
+### Fixtures ###
+
+
+@pytest.fixture(scope="module")
+def aporian_game_history():
+    with open(
+        "test/test_data/test_aporian_game_history.json", "r", encoding="utf8"
+    ) as f:
+        aporian_game_history = load(f)
+    return aporian_game_history
+
+
+### Tests ###
+
+
+class TestSplitGames:
+    @pytest.mark.it("Splits games into contiguous chunks covering every game")
+    def test_split(self, aporian_game_history):
+        chunks = split_games(aporian_game_history, 3)
+        assert len(chunks) == 3
+        assert [game for chunk in chunks for game in chunk] == aporian_game_history
+
+    @pytest.mark.it("Returns no chunks for no games")
+    def test_split_empty(self):
+        assert split_games([], 4) == []
+
+
+class TestConcatGameHistories:
+    @pytest.mark.it("Keeps compact schema and end_time order")
+    def test_concat(self, aporian_game_history):
+        second = wrangle_games(aporian_game_history[400:], "Aporian")
+        first = wrangle_games(aporian_game_history[:400], "Aporian")
+        output = concat_game_histories([second, first])
+        assert output["eco"].dtype == "category"
+        assert output.index.is_monotonic_increasing
+        assert output.shape[0] == len(aporian_game_history)
+
+    @pytest.mark.it("Matches a full re-cast of the concatenated frame")
+    def test_matches_recast(self, aporian_game_history):
+        first = wrangle_games(aporian_game_history[:400], "Aporian")
+        second = wrangle_games(aporian_game_history[400:], "Aporian")
+        output = concat_game_histories([first, second])
+        expected = wrangle_games(aporian_game_history, "Aporian")
+        pd.testing.assert_frame_equal(output, expected)
+
+
+class TestUnionCategories:
+    @pytest.mark.it("Gives every frame the sorted union of the categories")
+    def test_sorted_union(self, aporian_game_history):
+        history = wrangle_games(aporian_game_history[:-5], "Aporian")
+        new = wrangle_games(aporian_game_history[-5:], "Aporian")
+        output = union_categories([history, new])
+        categories = output[0]["opponent"].cat.categories
+        assert categories.equals(output[1]["opponent"].cat.categories)
+        assert categories.is_monotonic_increasing
+        assert set(categories) == set(history["opponent"]) | set(new["opponent"])
+        assert output[0]["opponent"].to_list() == history["opponent"].to_list()
+        assert output[1]["opponent"].to_list() == new["opponent"].to_list()
+
+    @pytest.mark.it("Keeps groupby results in alphabetical order")
+    def test_groupby_order(self, aporian_game_history):
+        first = wrangle_games(aporian_game_history[400:], "Aporian")
+        second = wrangle_games(aporian_game_history[:400], "Aporian")
+        output = concat_game_histories([first, second])
+        groups = output.groupby("opponent", observed=True).size().index
+        assert groups.to_list() == sorted(groups)
+
+    @pytest.mark.it("Doesn't modify the passed frames")
+    def test_no_mutation(self, aporian_game_history):
+        history = wrangle_games(aporian_game_history[:-5], "Aporian")
+        new = wrangle_games(aporian_game_history[-5:], "Aporian")
+        categories = history["opponent"].cat.categories
+        union_categories([history, new])
+        assert history["opponent"].cat.categories.equals(categories)
+
+
+class TestWrangleGames:
+    @pytest.mark.it("Matches the username case-insensitively")
+    def test_username_case(self, aporian_game_history):
+        output = wrangle_games(aporian_game_history, "aporian")
+        assert output["colour"].value_counts().to_dict() == {
+            "white": 431,
+            "black": 397,
+        }
+        pd.testing.assert_frame_equal(
+            output, wrangle_games(aporian_game_history, "Aporian")
+        )
+
+
+class TestWrangleGamesParallel:
+    @pytest.mark.it("Returns same frames as serial wrangling, in chunk order")
+    def test_matches_serial(self, aporian_game_history):
+        chunks = split_games(aporian_game_history, 3)
+        output = wrangle_games_parallel(chunks, "Aporian", max_workers=2)
+        for chunk, df in zip(chunks, output):
+            pd.testing.assert_frame_equal(df, wrangle_games(chunk, "Aporian"))
+
+
+class TestWrangleChunks:
+    @pytest.mark.it("Wrangles in this process below the threshold")
+    @patch("helpers.wrangle_helpers.wrangle_games_parallel")
+    def test_serial_below_threshold(self, mock_parallel, aporian_game_history):
+        wrangle_chunks(split_games(aporian_game_history, 2), "Aporian")
+        mock_parallel.assert_not_called()
+
+    @pytest.mark.it("Switches to the process pool at the threshold if enabled")
+    @patch("helpers.wrangle_helpers.os.cpu_count", return_value=4)
+    @patch("helpers.wrangle_helpers.parallel_wrangle", True)
+    @patch("helpers.wrangle_helpers.parallel_wrangle_threshold", 100)
+    @patch("helpers.wrangle_helpers.wrangle_games_parallel")
+    def test_parallel_above_threshold(
+        self, mock_parallel, mock_cpu_count, aporian_game_history
+    ):
+        chunks = split_games(aporian_game_history, 2)
+        wrangle_chunks(chunks, "Aporian")
+        mock_parallel.assert_called_once_with(chunks, "Aporian")
+
+    @pytest.mark.it("Stays in this process unless parallel wrangling is enabled")
+    @patch("helpers.wrangle_helpers.os.cpu_count", return_value=4)
+    @patch("helpers.wrangle_helpers.parallel_wrangle_threshold", 100)
+    @patch("helpers.wrangle_helpers.wrangle_games_parallel")
+    def test_opt_in(self, mock_parallel, mock_cpu_count, aporian_game_history):
+        wrangle_chunks(split_games(aporian_game_history, 2), "Aporian")
+        mock_parallel.assert_not_called()
+
+    @pytest.mark.it("Stays in this process with a single CPU")
+    @patch("helpers.wrangle_helpers.os.cpu_count", return_value=1)
+    @patch("helpers.wrangle_helpers.parallel_wrangle", True)
+    @patch("helpers.wrangle_helpers.parallel_wrangle_threshold", 100)
+    @patch("helpers.wrangle_helpers.wrangle_games_parallel")
+    def test_single_cpu(self, mock_parallel, mock_cpu_count, aporian_game_history):
+        wrangle_chunks(split_games(aporian_game_history, 2), "Aporian")
+        mock_parallel.assert_not_called()
+
+
+class TestShutdownExecutor:
+    @pytest.mark.it("Shuts down the process pool and forgets it")
+    def test_shutdown(self, aporian_game_history):
+        wrangle_games_parallel(split_games(aporian_game_history, 2), "Aporian", 1)
+        pool = wrangle_helpers.executor
+        shutdown_executor()
+        assert wrangle_helpers.executor is None
+        with pytest.raises(RuntimeError):
+            pool.submit(len, [])